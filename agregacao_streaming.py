@@ -0,0 +1,163 @@
+"""
+🌊 Agregação em Fluxo (Streaming)
+Acumuladores combináveis por estação e mês, alimentados bloco a bloco
+"""
+
+import numpy as np
+import pandas as pd
+
+from estatisticas_online import combinar_momentos
+
+# Variáveis usadas nos relatórios de texto
+VARIAVEIS_RELATORIO = [
+    'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)',
+    'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)',
+    'UMIDADE RELATIVA DO AR, HORARIA (%)',
+    'VENTO, VELOCIDADE HORARIA (m/s)',
+    'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)'
+]
+
+# Colunas numéricas que não são medições (ano do arquivo, máscara de lacunas da grade)
+COLUNAS_NAO_MEDIDAS = ['ano', 'lacunas']
+
+# Mês -> estação do ano (hemisfério sul), igual a definir_estacao das análises
+ESTACAO_POR_MES = {
+    12: 'Verão', 1: 'Verão', 2: 'Verão',
+    3: 'Outono', 4: 'Outono', 5: 'Outono',
+    6: 'Inverno', 7: 'Inverno', 8: 'Inverno',
+    9: 'Primavera', 10: 'Primavera', 11: 'Primavera'
+}
+
+# Estatísticas parciais guardadas por grupo e variável (média e M2 combinadas por Chan)
+ESTATISTICAS_PARCIAIS = ['n', 'soma', 'media', 'm2', 'minimo', 'maximo']
+
+
+def variaveis_medidas(df, excluir=()):
+    """Colunas numéricas de medição de `df`, na ordem do DataFrame (sem ano, lacunas e `excluir`)"""
+    return [col for col in df.select_dtypes('number').columns
+            if col not in COLUNAS_NAO_MEDIDAS and col not in excluir]
+
+
+class AcumuladorGrupos:
+    """Contagem, soma, média, M2, mínimo e máximo por grupo e variável.
+
+    Os acumuladores de blocos, arquivos ou processos diferentes podem ser
+    combinados com `mesclar`; o tamanho do estado depende só do número de
+    grupos (ex.: estação × mês), não do número de linhas processadas. A
+    variância é combinada com as fórmulas de Welford/Chan (ver
+    estatisticas_online), sem a perda de precisão da soma dos quadrados.
+    """
+
+    def __init__(self, chaves=('cidade', 'mes'), variaveis=None):
+        self.chaves = list(chaves)
+        self.variaveis = list(variaveis) if variaveis is not None else list(VARIAVEIS_RELATORIO)
+        # estatística -> DataFrame (linhas: grupos, colunas: variáveis)
+        self.parciais = None
+        self.linhas = 0
+
+    def atualizar(self, bloco):
+        """Incorpora um bloco de dados (DataFrame com as chaves e as variáveis)"""
+        variaveis = [var for var in self.variaveis if var in bloco.columns]
+        if bloco.empty or not variaveis:
+            return self
+
+        valores = bloco[variaveis].astype('float64')
+        grupos = [bloco[chave] for chave in self.chaves]
+        agrupado = valores.groupby(grupos, observed=True)
+
+        n = agrupado.count()
+        parciais = {
+            'n': n,
+            'soma': agrupado.sum(),
+            'media': agrupado.mean().fillna(0.0),
+            'm2': (agrupado.var(ddof=0) * n).fillna(0.0),
+            'minimo': agrupado.min(),
+            'maximo': agrupado.max(),
+        }
+
+        self.parciais = parciais if self.parciais is None else self._combinar(self.parciais, parciais)
+        self.linhas += len(bloco)
+        return self
+
+    def mesclar(self, outro):
+        """Combina com outro acumulador com as mesmas chaves"""
+        if outro.parciais is not None:
+            if self.parciais is None:
+                self.parciais = {est: df.copy() for est, df in outro.parciais.items()}
+            else:
+                self.parciais = self._combinar(self.parciais, outro.parciais)
+        self.linhas += outro.linhas
+        return self
+
+    def _combinar(self, a, b):
+        indice = a['n'].index.union(b['n'].index)
+        colunas = a['n'].columns.union(b['n'].columns, sort=False)
+
+        def alinhar(parcial, estatistica, vazio):
+            alinhado = parcial[estatistica].reindex(index=indice, columns=colunas)
+            return alinhado.to_numpy(dtype='float64', na_value=vazio)
+
+        n_a, media_a, m2_a = (alinhar(a, est, 0.0) for est in ('n', 'media', 'm2'))
+        n_b, media_b, m2_b = (alinhar(b, est, 0.0) for est in ('n', 'media', 'm2'))
+        n, media, m2 = combinar_momentos(n_a, media_a, m2_a, n_b, media_b, m2_b)
+
+        combinado = {
+            'n': n,
+            'soma': alinhar(a, 'soma', 0.0) + alinhar(b, 'soma', 0.0),
+            'media': media,
+            'm2': m2,
+            'minimo': np.fmin(alinhar(a, 'minimo', np.nan), alinhar(b, 'minimo', np.nan)),
+            'maximo': np.fmax(alinhar(a, 'maximo', np.nan), alinhar(b, 'maximo', np.nan)),
+        }
+        return {
+            estatistica: pd.DataFrame(valores, index=indice, columns=colunas)
+            for estatistica, valores in combinado.items()
+        }
+
+    def tabela_longa(self):
+        """Estatísticas parciais com uma linha por grupo e variável"""
+        if self.parciais is None:
+            return pd.DataFrame(columns=self.chaves + ['variavel'] + ESTATISTICAS_PARCIAIS)
+
+        contagem = self.parciais['n']
+        longa = contagem.reset_index().melt(id_vars=self.chaves, var_name='variavel', value_name='n')
+        for estatistica in ESTATISTICAS_PARCIAIS:
+            if estatistica != 'n':
+                # melt empilha coluna a coluna, a mesma ordem de ravel(order='F')
+                parcial = self.parciais[estatistica].reindex(index=contagem.index, columns=contagem.columns)
+                longa[estatistica] = parcial.to_numpy().ravel(order='F')
+        return longa
+
+    def resumo(self, por=('cidade',)):
+        """Tabela organizada (uma linha por grupo e variável) com n, média, desvio, mínimo, máximo e soma.
+
+        `por` pode usar as chaves do acumulador e também 'estacao' (derivada de 'mes').
+        """
+        por = list(por)
+        colunas = ['variavel', 'n', 'media', 'desvio_padrao', 'minimo', 'maximo', 'soma']
+        if self.parciais is None:
+            return pd.DataFrame(columns=por + colunas)
+
+        longa = self.tabela_longa()
+        if 'estacao' in por and 'estacao' not in longa.columns:
+            longa['estacao'] = longa['mes'].map(ESTACAO_POR_MES)
+
+        grupos = por + ['variavel']
+        agrupado = longa.groupby(grupos, sort=False)
+        tabela = agrupado.agg({'n': 'sum', 'soma': 'sum', 'minimo': 'min', 'maximo': 'max'})
+
+        # Chan para várias partes: M2 = soma de M2_i + n_i * (média_i - média)^2
+        n_grupo = agrupado['n'].transform('sum').to_numpy(dtype='float64')
+        soma_grupo = agrupado['soma'].transform('sum').to_numpy(dtype='float64')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media_grupo = np.where(n_grupo > 0, soma_grupo / n_grupo, 0.0)
+        desvios = longa['m2'] + longa['n'] * (longa['media'] - media_grupo) ** 2
+        m2 = desvios.groupby([longa[chave] for chave in grupos], sort=False).sum()
+
+        n = tabela['n'].to_numpy(dtype='float64')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tabela['media'] = np.where(n > 0, tabela['soma'].to_numpy() / n, np.nan)
+            variancia = m2.reindex(tabela.index).to_numpy() / (n - 1)
+        tabela['desvio_padrao'] = np.where(n > 1, np.sqrt(variancia), np.nan)
+
+        return tabela.reset_index()[por + colunas]
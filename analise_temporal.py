@@ -1,6 +1,10 @@
 import pandas as pd 
 import warnings
-import glob
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 # Imports condicionais para bibliotecas que podem não estar disponíveis
 try:
@@ -28,13 +32,156 @@ except ImportError:
     MATPLOTLIB_DISPONIVEL = False
     print("⚠️ Módulo de visualizações matplotlib não encontrado.")
 
+from cache_dados import CacheColunar, PYARROW_DISPONIVEL
+from catalogo_estacoes import CatalogoEstacoes
+from fontes_inmet import abrir_binario
+from leitura_inmet import (VALORES_AUSENTES, construir_datetime, ler_csv_em_blocos, ler_csv_rapido,
+                           padronizar_colunas)
+from agregacao_streaming import AcumuladorGrupos, VARIAVEIS_RELATORIO
+from motor_estatisticas import calcular_estatisticas, comparacao_pareada, indexar_estatisticas, matriz_pareada
+from indice_estacoes import IndiceEstacoes
+from cubo_agregados import CuboAgregados, assinatura_dados
+from calendario import construir_calendario
+from esbocos_quantis import EsbocosGrupos
+from janelas_moveis import calcular_janelas_moveis
+from climatologia import Climatologia
+from eventos_extremos import detectar_eventos
+from grade_horaria import COBERTURA_MINIMA, cobertura_mensal, reindexar_grade_horaria
+from cubo_denso import CuboDenso
+from correlacao_cruzada import CORRELACAO_MINIMA, defasagem_clara, defasagens_estacoes
+from espectro import harmonicos, periodograma, picos_espectrais, welch
+from pareamento import EstacoesAlinhadas
+from reamostragem import (N_REAMOSTRAGENS, NIVEL_CONFIANCA, TAMANHO_BLOCO, resultado_par,
+                          testar_estacoes_do_ano, testar_pares_estacoes)
+from ingestao_incremental import IngestaoIncremental
+
 warnings.filterwarnings("ignore")
 
+# Estações e anos carregados quando nada é especificado
+ESTACOES_PADRAO = ['A802', 'A887']
+ANOS_PADRAO = ['2023', '2024', '2025']
+
+# Colunas extraídas de cada CSV
+COLUNAS_IMPORTANTES = [
+    'Data', 'Hora UTC', 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)',
+    'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)',
+    'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)',
+    'TEMPERATURA DO PONTO DE ORVALHO (°C)',
+    'UMIDADE RELATIVA DO AR, HORARIA (%)',
+    'VENTO, VELOCIDADE HORARIA (m/s)',
+    'VENTO, DIREÇÃO HORARIA (gr) (° (gr))',
+    'RADIACAO GLOBAL (Kj/m²)'
+]
+
+# Janelas móveis (variável, janela, estatística) usadas no relatório e no modelo
+JANELAS_ANALISE = [
+    ('PRECIPITAÇÃO TOTAL, HORÁRIO (mm)', '72h', 'soma'),
+    ('PRECIPITAÇÃO TOTAL, HORÁRIO (mm)', '30d', 'soma'),
+    ('TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', '7d', 'media'),
+    ('UMIDADE RELATIVA DO AR, HORARIA (%)', '24h', 'media'),
+]
+
+
+def processar_arquivo_inmet(arquivo, parser_rapido=False, engine_csv='c', tempos=None):
+    """Processa um arquivo CSV individual (datetime + COLUNAS_IMPORTANTES numéricas); None se não puder ser lido"""
+    inicio = time.perf_counter()
+    try:
+        if parser_rapido:
+            # Só as colunas usadas, já numéricas e com vírgula decimal tratada na leitura
+            df = ler_csv_rapido(arquivo, COLUNAS_IMPORTANTES, engine=engine_csv)
+        else:
+            # Ler arquivo pulando as linhas de metadados (CSV solto ou membro de ZIP)
+            with abrir_binario(arquivo) as f:
+                df = pd.read_csv(f, sep=';', skiprows=8, encoding='latin-1', na_values=VALORES_AUSENTES)
+            
+            # Limpar nomes das colunas (e padronizar os nomes antigos de data/hora)
+            df.columns = padronizar_colunas(df.columns)
+        
+        # Criar datetime combinando data e hora (cada data/hora distinta é convertida uma vez)
+        df['datetime'] = construir_datetime(df['Data'], df['Hora UTC'])
+        
+        # Verificar quais colunas existem
+        colunas_existentes = [col for col in COLUNAS_IMPORTANTES if col in df.columns]
+        df_processado = df[['datetime'] + colunas_existentes].copy()
+        
+        # Converter colunas numéricas (o modo rápido já as lê como float)
+        if not parser_rapido:
+            for col in colunas_existentes:
+                if col not in ['Data', 'Hora UTC']:
+                    df_processado[col] = pd.to_numeric(df_processado[col], errors='coerce')
+        
+        # Remover linhas com datetime inválido
+        df_processado = df_processado.dropna(subset=['datetime'])
+        
+        if tempos is not None:
+            tempos[arquivo] = time.perf_counter() - inicio
+        return df_processado
+        
+    except (FileNotFoundError, pd.errors.EmptyDataError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        print(f"Erro ao processar arquivo {arquivo}: {e}")
+        return None
+
+
+def carregar_arquivo_inmet(arquivo, cache=None, parser_rapido=False, engine_csv='c', tempos=None):
+    """Carrega um arquivo do cache colunar ou processa o CSV e atualiza o cache"""
+    if cache is not None:
+        df = cache.carregar(arquivo)
+        if df is not None:
+            return df
+    
+    df = processar_arquivo_inmet(arquivo, parser_rapido, engine_csv, tempos)
+    
+    if cache is not None and df is not None:
+        try:
+            cache.salvar(arquivo, df)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar o cache de {arquivo}: {e}")
+    
+    return df
+
+
+def _carregar_arquivo_em_processo(opcoes, arquivo):
+    """Carrega um arquivo em um processo do pool (função de módulo, sem a classe de análise nem o catálogo)"""
+    cache = (CacheColunar(opcoes['diretorio_cache'], versao=opcoes['versao_cache'])
+             if opcoes['diretorio_cache'] is not None else None)
+    tempos = {}
+    df = carregar_arquivo_inmet(arquivo, cache, opcoes['parser_rapido'], opcoes['engine_csv'], tempos)
+    if cache is None:
+        return df, 0, 0, tempos
+    return df, cache.acertos, cache.falhas, tempos
+
+
 class AnaliseMeteorolgicaRS:
-    def __init__(self):
+    def __init__(self, usar_cache=True, diretorio_cache='.cache_inmet',
+                 diretorio_dados='.', caminho_catalogo='catalogo_estacoes.json',
+                 parser_rapido=False, engine_csv='c', compacto=False,
+                 grade_regular=False, max_lacuna=0):
         self.dados_rio_grande = []
         self.dados_capao_leao = []
+        # Listas de DataFrames por cidade; as duas listas acima são as entradas de Rio Grande e Capão do Leão
+        self.dados_por_estacao = {
+            'Rio Grande': self.dados_rio_grande,
+            'Capão do Leão': self.dados_capao_leao
+        }
         self.dados_combinados = None
+        # (dados_combinados, tabela) da última passada agrupada
+        self._estatisticas = None
+        self.indice_estacoes = None
+        self.cubo = None
+        # (dados_combinados, tabela de calendário alinhada a eles)
+        self._calendario = None
+        # (dados_combinados, esboços de quantis por cidade × ano)
+        self._esbocos = None
+        # (dados_combinados, estatísticas em janelas móveis alinhadas a eles)
+        self._janelas = None
+        # (dados_combinados, {parâmetros do teste: tabela de significância})
+        self._significancia = None
+        # (dados_combinados, {(método, opções): espectro}) e (dados_combinados, tabela de harmônicos)
+        self._espectros = None
+        self._harmonicos = None
+        self.clima = None
+        self.diretorio_dados = diretorio_dados
+        self.catalogo = CatalogoEstacoes(caminho_catalogo)
         self.colunas_mapeadas = {
             'Data': 'data',
             'Hora UTC': 'hora',
@@ -47,159 +194,590 @@ class AnaliseMeteorolgicaRS:
             'VENTO, DIREÇÃO HORARIA (gr) (° (gr))': 'vento_direcao',
             'RADIACAO GLOBAL (Kj/m²)': 'radiacao'
         }
+        # Leitura rápida: usecols + dtypes + decimal na leitura (engine 'c' ou 'pyarrow')
+        self.parser_rapido = parser_rapido
+        self.engine_csv = engine_csv
+        self.tempos_leitura = {}
+        # Cache colunar dos CSVs já processados (requer pyarrow); cada modo de leitura tem suas entradas
+        versao_cache = 'rapido-3' if parser_rapido else 'padrao-3'
+        self.cache = (CacheColunar(diretorio_cache, versao=versao_cache)
+                      if usar_cache and PYARROW_DISPONIVEL else None)
+        # Representação compacta de dados_combinados (float32, cidade categórica, sem Data/Hora texto)
+        self.compacto = compacto
+        self.memoria_original = None
+        # Grade horária completa por estação em dados_combinados (lacunas curtas interpoladas até max_lacuna horas)
+        self.grade_regular = grade_regular
+        self.max_lacuna = max_lacuna
+        # (dados_combinados, max_lacuna, grade horária)
+        self._grade = None
+        # (dados_combinados, CuboDenso estações × horas × variáveis)
+        self._cubo_denso = None
+        # (dados_combinados, (tolerancia, variáveis), EstacoesAlinhadas no índice de tempo comum)
+        self._alinhadas = None
     
-    def carregar_dados_multiplos_anos(self):
-        """Carrega dados de todos os anos disponíveis (2023, 2024, 2025)"""
-        anos = ['2023', '2024', '2025']
+    def carregar_dados_multiplos_anos(self, paralelo=False, n_workers=None, estacoes=None, anos=None):
+        """Carrega dados de todos os anos disponíveis (2023, 2024, 2025)
+        
+        Os arquivos são escolhidos pelo catálogo de estações (códigos WMO ou nomes
+        de cidade em `estacoes`; padrão: Rio Grande e Capão do Leão). Com
+        paralelo=True os arquivos são processados ao mesmo tempo em um pool
+        de processos (n_workers processos; padrão: número de CPUs).
+        """
+        estacoes = ESTACOES_PADRAO if estacoes is None else estacoes
+        anos = ANOS_PADRAO if anos is None else anos
+        
+        # Atualizar o índice (só relê cabeçalhos de arquivos novos ou modificados)
+        self.catalogo.atualizar(self.diretorio_dados)
+        
+        # A ordem da lista (ano, estação) define a ordem final dos dados
+        tarefas = self.catalogo.selecionar(estacoes=estacoes, anos=anos)
+        
+        arquivos = [arquivo for _, _, arquivo in tarefas]
+        if paralelo and len(arquivos) > 1:
+            dataframes = self._carregar_arquivos_paralelo(arquivos, n_workers)
+        else:
+            dataframes = [self._carregar_arquivo(arquivo) for arquivo in arquivos]
         
-        for ano in anos:
-            # Rio Grande
-            arquivo_rg = f"{ano}/INMET_S_RS_A802_RIO GRANDE_01-01-{ano}_A_*.CSV"
-            arquivos_rg = glob.glob(arquivo_rg)
-            
-            if arquivos_rg:
-                df_rg = self._processar_arquivo(arquivos_rg[0])
-                if df_rg is not None:
-                    df_rg['cidade'] = 'Rio Grande'
-                    df_rg['ano'] = int(ano)
-                    self.dados_rio_grande.append(df_rg)
-            
-            # Capão do Leão
-            arquivo_cl = f"{ano}/INMET_S_RS_A887_CAPAO DO LEAO (PELOTAS)_01-01-{ano}_A_*.CSV"
-            arquivos_cl = glob.glob(arquivo_cl)
-            
-            if arquivos_cl:
-                df_cl = self._processar_arquivo(arquivos_cl[0])
-                if df_cl is not None:
-                    df_cl['cidade'] = 'Capão do Leão'
-                    df_cl['ano'] = int(ano)
-                    self.dados_capao_leao.append(df_cl)
+        for (cidade, ano, _), df in zip(tarefas, dataframes):
+            if df is None:
+                continue
+            df['cidade'] = cidade
+            df['ano'] = int(ano)
+            self.dados_por_estacao.setdefault(cidade, []).append(df)
         
         # Combinar todos os dados
         self._combinar_dados()
         print("✅ Dados carregados com sucesso!")
-        print(f"   📊 Rio Grande: {len(self.dados_rio_grande)} arquivos")
-        print(f"   📊 Capão do Leão: {len(self.dados_capao_leao)} arquivos")
+        for cidade, dados in self.dados_por_estacao.items():
+            print(f"   📊 {cidade}: {len(dados)} arquivos")
+        if self.cache is not None:
+            print(f"   💾 Cache: {self.cache.acertos} acertos, {self.cache.falhas} arquivos processados")
+        self._relatorio_tempos_leitura()
+    
+    def _relatorio_tempos_leitura(self):
+        """Mostra o tempo de leitura de cada CSV processado nesta carga"""
+        if not self.tempos_leitura:
+            return
+        modo = f"rápido/{self.engine_csv}" if self.parser_rapido else "padrão"
+        print(f"   ⏱️ Tempo de leitura por arquivo (modo {modo}):")
+        for arquivo, segundos in self.tempos_leitura.items():
+            print(f"      {os.path.basename(arquivo)}: {segundos:.3f}s")
+        print(f"      Total: {sum(self.tempos_leitura.values()):.3f}s")
+    
+    def atualizar_incremental(self, estacoes=None, anos=None, diretorio='dados_persistidos'):
+        """Acrescenta ao conjunto persistido só as linhas novas e carrega o conjunto completo
+        
+        Cada estação tem uma marca d'água (último horário gravado); arquivos que
+        cresceram são lidos a partir de onde pararam na execução anterior. Por
+        padrão considera todos os anos do catálogo.
+        """
+        estacoes = ESTACOES_PADRAO if estacoes is None else estacoes
+        
+        self.catalogo.atualizar(self.diretorio_dados)
+        tarefas = self.catalogo.selecionar(estacoes=estacoes, anos=anos)
+        
+        ingestao = IngestaoIncremental(diretorio)
+        novas = ingestao.atualizar(tarefas, COLUNAS_IMPORTANTES)
+        
+        print("✅ Ingestão incremental concluída!")
+        cidades = list(dict.fromkeys(cidade for cidade, _, _ in tarefas))
+        for cidade in cidades:
+            marca = ingestao.marca_dagua(cidade)
+            print(f"   📊 {cidade}: {novas.get(cidade, 0)} registros novos (até {marca})")
+        
+        df = ingestao.carregar(cidades)
+        if df is not None:
+            self.dados_combinados = df
+            if self.compacto:
+                self._compactar_dados()
+            self._indexar_estacoes()
+            if self.grade_regular:
+                self._regularizar_grade()
+        return novas
+    
+    def _opcoes_leitura(self):
+        """Parâmetros necessários para reproduzir a leitura em outro processo (sem catálogo nem análise)"""
+        return {
+            'diretorio_cache': self.cache.diretorio if self.cache is not None else None,
+            'versao_cache': self.cache.versao if self.cache is not None else None,
+            'parser_rapido': self.parser_rapido,
+            'engine_csv': self.engine_csv,
+        }
+    
+    def _carregar_arquivos_paralelo(self, arquivos, n_workers=None):
+        """Processa vários arquivos em um pool de processos, preservando a ordem de entrada"""
+        n_workers = min(n_workers or os.cpu_count() or 1, len(arquivos))
+        tarefa = partial(_carregar_arquivo_em_processo, self._opcoes_leitura())
+        
+        print(f"⚙️ Processando {len(arquivos)} arquivos com {n_workers} processos...")
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            resultados = list(executor.map(tarefa, arquivos))
+        
+        dataframes = []
+        for df, acertos, falhas, tempos in resultados:
+            self.tempos_leitura.update(tempos)
+            if self.cache is not None:
+                self.cache.acertos += acertos
+                self.cache.falhas += falhas
+            dataframes.append(df)
+        return dataframes
+    
+    def _carregar_arquivo(self, arquivo):
+        """Carrega um arquivo do cache colunar ou processa o CSV e atualiza o cache"""
+        return carregar_arquivo_inmet(arquivo, self.cache, self.parser_rapido, self.engine_csv, self.tempos_leitura)
     
     def _processar_arquivo(self, arquivo):
         """Processa um arquivo CSV individual"""
-        try:
-            # Ler arquivo pulando as linhas de metadados
-            df = pd.read_csv(arquivo, sep=';', skiprows=8, encoding='latin-1')
-            
-            # Limpar nomes das colunas
-            df.columns = df.columns.str.strip()
-            
-            # Criar datetime combinando data e hora
-            df['datetime'] = pd.to_datetime(df['Data'] + ' ' + df['Hora UTC'], 
-                                         format='%Y/%m/%d %H%M UTC', errors='coerce')
-            
-            # Selecionar e renomear colunas importantes
-            colunas_importantes = [
-                'Data', 'Hora UTC', 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)',
-                'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)',
-                'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)',
-                'TEMPERATURA DO PONTO DE ORVALHO (°C)',
-                'UMIDADE RELATIVA DO AR, HORARIA (%)',
-                'VENTO, VELOCIDADE HORARIA (m/s)',
-                'VENTO, DIREÇÃO HORARIA (gr) (° (gr))',
-                'RADIACAO GLOBAL (Kj/m²)'
-            ]
-            
-            # Verificar quais colunas existem
-            colunas_existentes = [col for col in colunas_importantes if col in df.columns]
-            df_processado = df[['datetime'] + colunas_existentes].copy()
-            
-            # Converter colunas numéricas
-            for col in colunas_existentes:
-                if col not in ['Data', 'Hora UTC']:
-                    df_processado[col] = pd.to_numeric(df_processado[col], errors='coerce')
-            
-            # Remover linhas com datetime inválido
-            df_processado = df_processado.dropna(subset=['datetime'])
-            
-            return df_processado
-            
-        except (FileNotFoundError, pd.errors.EmptyDataError, ValueError) as e:
-            print(f"Erro ao processar arquivo {arquivo}: {e}")
-            return None
+        return processar_arquivo_inmet(arquivo, self.parser_rapido, self.engine_csv, self.tempos_leitura)
     
     def _combinar_dados(self):
         """Combina todos os dados em um único DataFrame"""
-        if self.dados_rio_grande and self.dados_capao_leao:
-            # Concatenar dados de Rio Grande
-            df_rg_completo = pd.concat(self.dados_rio_grande, ignore_index=True)
+        frames = [df for dados in self.dados_por_estacao.values() for df in dados]
+        if frames:
+            # Combinar todas as cidades
+            self.dados_combinados = pd.concat(frames, ignore_index=True)
             
-            # Concatenar dados de Capão do Leão
-            df_cl_completo = pd.concat(self.dados_capao_leao, ignore_index=True)
+            if self.compacto:
+                self._compactar_dados()
             
-            # Combinar ambas as cidades
-            self.dados_combinados = pd.concat([df_rg_completo, df_cl_completo], ignore_index=True)
+            # Ordenar por cidade e datetime
+            self._indexar_estacoes()
             
-            # Ordenar por datetime
-            self.dados_combinados = self.dados_combinados.sort_values('datetime').reset_index(drop=True)
+            if self.grade_regular:
+                self._regularizar_grade()
     
-    def estatisticas_descritivas(self):
-        """Gera estatísticas descritivas completas"""
+    def _indexar_estacoes(self):
+        """Ordena dados_combinados por cidade e datetime e guarda onde começa e termina cada cidade"""
+        self.indice_estacoes = IndiceEstacoes(self.dados_combinados)
+        self.dados_combinados = self.indice_estacoes.dados
+    
+    def _regularizar_grade(self):
+        """Troca dados_combinados pela grade horária completa (uma linha por hora e estação)"""
+        self.dados_combinados = self.grade_horaria(self.max_lacuna)
+        self._indexar_estacoes()
+    
+    def grade_horaria(self, max_lacuna=0):
+        """Dados de cada cidade numa grade horária UTC completa, com a máscara de lacunas
+        
+        Horas ausentes viram linhas com NaN e a coluna 'lacunas' marca, bit a bit,
+        o que não foi medido (ver grade_horaria.HORA_AUSENTE e bit_variavel).
+        Lacunas de até `max_lacuna` horas são interpoladas linearmente (menos chuva e direção do vento).
+        """
         if self.dados_combinados is None:
-            print("❌ Dados não carregados. Execute carregar_dados_multiplos_anos() primeiro.")
+            return None
+        
+        if 'lacunas' in self.dados_combinados.columns and max_lacuna == self.max_lacuna:
+            # dados_combinados já é a grade
+            return self.dados_combinados
+        
+        if (self._grade is None or self._grade[0] is not self.dados_combinados
+                or self._grade[1] != max_lacuna):
+            if self.indice_estacoes is None or self.indice_estacoes.dados is not self.dados_combinados:
+                self._indexar_estacoes()
+            grade = reindexar_grade_horaria(self.indice_estacoes, max_lacuna=max_lacuna)
+            self._grade = (self.dados_combinados, max_lacuna, grade)
+        return self._grade[2]
+    
+    def cubo_denso(self):
+        """Grade horária como array float32 (cidades × horas × variáveis), ver cubo_denso.CuboDenso
+        
+        Com o cache ativo, o array fica em disco e é aberto por memory-map
+        (processos diferentes compartilham a mesma cópia) enquanto os dados não mudarem.
+        """
+        if self.dados_combinados is None:
+            return None
+        
+        if self._cubo_denso is None or self._cubo_denso[0] is not self.dados_combinados:
+            grade = self.grade_horaria(self.max_lacuna)
+            variaveis = [col for col in COLUNAS_IMPORTANTES if col in grade.columns and col not in ['Data', 'Hora UTC']]
+            assinatura = f"{assinatura_dados(grade, variaveis)}-{self.max_lacuna}"
+            
+            # Um diretório por assinatura: cargas com dados ou max_lacuna diferentes não disputam os mesmos arquivos
+            diretorio = (os.path.join(self.cache.diretorio, 'cubo_denso', assinatura)
+                         if self.cache is not None and self.cache.ativo else None)
+            cubo = CuboDenso.abrir(diretorio) if diretorio is not None else None
+            if cubo is None or cubo.assinatura != assinatura:
+                cubo = CuboDenso.de_grade(grade, variaveis=variaveis, assinatura=assinatura)
+                if diretorio is not None:
+                    try:
+                        cubo.gravar(diretorio)
+                        cubo = CuboDenso.abrir(diretorio)
+                    except OSError as e:
+                        print(f"⚠️ Não foi possível gravar o cubo denso: {e}")
+            self._cubo_denso = (self.dados_combinados, cubo)
+        return self._cubo_denso[1]
+    
+    def correlacao_entre_cidades(self):
+        """Correlação hora a hora de cada variável entre as cidades (a partir do cubo denso)"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados.")
+            return
+        
+        print("\n" + "=" * 60)
+        print("🔗 CORRELAÇÃO HORÁRIA ENTRE CIDADES")
+        print("=" * 60)
+        
+        cubo = self.cubo_denso()
+        if len(cubo.cidades) < 2:
+            print("⚠️ É preciso ter pelo menos duas cidades.")
+            return
+        
+        for variavel in VARIAVEIS_RELATORIO:
+            if variavel not in cubo.variaveis:
+                continue
+            correlacao = cubo.correlacao_estacoes(variavel)
+            print(f"\n{variavel}:")
+            print(correlacao.round(3))
+    
+    def defasagens_entre_cidades(self, max_defasagem=72, sem_ciclo_diario=True, sem_sazonalidade=True):
+        """Defasagem (horas) de maior correlação de cada variável entre os pares de cidades
+        
+        Correlação cruzada por FFT sobre o cubo denso, ver correlacao_cruzada.defasagens_estacoes.
+        Com `sem_sazonalidade`, usa as anomalias em relação à climatologia (dia do ano e hora).
+        """
+        if self.dados_combinados is None:
+            return None
+        climatologia = self.climatologia() if sem_sazonalidade else None
+        return defasagens_estacoes(self.cubo_denso(), VARIAVEIS_RELATORIO, max_defasagem, sem_ciclo_diario,
+                                   climatologia=climatologia)
+    
+    def analise_defasagens(self, max_defasagem=72):
+        """Mostra quantas horas cada variável de uma cidade acompanha a da outra"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados.")
             return
         
+        print("\n" + "=" * 60)
+        print("⏱️ DEFASAGENS ENTRE CIDADES (CORRELAÇÃO CRUZADA)")
         print("=" * 60)
-        print("📊 ESTATÍSTICAS DESCRITIVAS METEOROLÓGICAS")
+        
+        defasagens = self.defasagens_entre_cidades(max_defasagem)
+        if len(defasagens) == 0:
+            print("⚠️ É preciso ter pelo menos duas cidades.")
+            return
+        
+        print(f"Defasagens de -{max_defasagem}h a +{max_defasagem}h, sobre as anomalias "
+              f"(sem os ciclos diário e sazonal de cada cidade)")
+        for (variavel, cidade_a, cidade_b), linha in defasagens.iterrows():
+            if pd.isna(linha['defasagem']):
+                continue
+            print(f"\n{variavel}:")
+            if not defasagem_clara(linha['defasagem'], linha['correlacao'], linha['correlacao_sem_defasagem']):
+                if abs(linha['correlacao']) < CORRELACAO_MINIMA:
+                    print(f"   Correlação desprezível entre {cidade_a} e {cidade_b} (pico: {linha['correlacao']:.3f})")
+                else:
+                    print(f"   Sem defasagem clara: o pico ({linha['correlacao']:.3f}) quase não supera "
+                          f"a correlação sem defasagem ({linha['correlacao_sem_defasagem']:.3f})")
+                continue
+            horas = int(linha['defasagem'])
+            if horas > 0:
+                descricao = f"{cidade_b} acompanha {cidade_a} com {horas}h de atraso"
+            elif horas < 0:
+                descricao = f"{cidade_a} acompanha {cidade_b} com {-horas}h de atraso"
+            else:
+                descricao = f"{cidade_a} e {cidade_b} variam juntas (sem defasagem)"
+            print(f"   {descricao}")
+            print(f"   Correlação no pico: {linha['correlacao']:.3f} · sem defasagem: {linha['correlacao_sem_defasagem']:.3f}")
+    
+    def estacoes_alinhadas(self, tolerancia=None, variaveis=None):
+        """Cidades alinhadas num índice de tempo comum, ver pareamento.EstacoesAlinhadas
+        
+        Sem tolerância, as horas precisam coincidir exatamente e o alinhamento sai
+        do cubo denso (float32, só as variáveis pedidas; padrão: VARIAVEIS_RELATORIO);
+        com `tolerancia` (ex.: '30min'), cada cidade entra com a medição mais
+        próxima de cada hora.
+        """
+        if self.dados_combinados is None:
+            return None
+        
+        variaveis = tuple(VARIAVEIS_RELATORIO if variaveis is None else variaveis)
+        if (self._alinhadas is None or self._alinhadas[0] is not self.dados_combinados
+                or self._alinhadas[1] != (tolerancia, variaveis)):
+            if tolerancia is None:
+                alinhadas = EstacoesAlinhadas.de_cubo(self.cubo_denso(), list(variaveis))
+            else:
+                alinhadas = EstacoesAlinhadas(self.dados_combinados, list(variaveis), tolerancia=tolerancia)
+            self._alinhadas = (self.dados_combinados, (tolerancia, variaveis), alinhadas)
+        return self._alinhadas[2]
+    
+    def relatorio_cobertura(self):
+        """Mostra a fração de horas medidas em cada mês e os meses abaixo da cobertura mínima"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados.")
+            return
+        
+        print("\n" + "=" * 60)
+        print("🕳️ COBERTURA DOS DADOS (HORAS MEDIDAS POR MÊS)")
         print("=" * 60)
         
-        for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_cidade = self.dados_combinados[self.dados_combinados['cidade'] == cidade]
+        cobertura = cobertura_mensal(self.cubo_agregados())
+        variaveis = [var for var in VARIAVEIS_RELATORIO if var in cobertura.columns]
+        
+        for cidade in cobertura.index.get_level_values(0).unique():
+            da_cidade = cobertura.xs(cidade, level=0)[variaveis]
+            print(f"\n🏙️ {cidade}: cobertura média {da_cidade.to_numpy().mean():.1%}")
             
+            baixa = da_cidade[(da_cidade < COBERTURA_MINIMA).any(axis=1)]
+            if baixa.empty:
+                print(f"   ✅ Todos os meses com pelo menos {COBERTURA_MINIMA:.0%} das horas")
+                continue
+            for mes, linha in baixa.iterrows():
+                faltando = [f"{var.split(',')[0].split(' (')[0].title()} {valor:.0%}"
+                            for var, valor in linha.items() if valor < COBERTURA_MINIMA]
+                print(f"   ⚠️ {mes:%m/%Y}: {', '.join(faltando)}")
+    
+    def cubo_agregados(self):
+        """Agregados por cidade e hora/dia/mês/estação, compartilhados por relatórios e gráficos
+        
+        Com o cache ativo, as tabelas do cubo também ficam em disco junto ao cache dos CSVs.
+        """
+        if self.dados_combinados is None:
+            return None
+        
+        if self.cubo is None or self.cubo.dados is not self.dados_combinados:
+            diretorio = os.path.join(self.cache.diretorio, 'cubo') if self.cache is not None and self.cache.ativo else None
+            self.cubo = CuboAgregados(self.dados_combinados, diretorio=diretorio, calendario=self.calendario())
+        return self.cubo
+    
+    def calendario(self):
+        """Hora, dia do ano, mês, estação, dia e horário local de cada linha de dados_combinados
+        
+        Calculada uma vez por carga, com o mesmo índice de dados_combinados; quem
+        precisa desses campos faz join com ela em vez de derivá-los de novo.
+        """
+        if self.dados_combinados is None:
+            return None
+        
+        if self._calendario is None or self._calendario[0] is not self.dados_combinados:
+            self._calendario = (self.dados_combinados, construir_calendario(self.dados_combinados['datetime']))
+        return self._calendario[1]
+    
+    def esbocos_quantis(self, k=200):
+        """Esboços KLL por cidade, ano e variável para percentis e boxplots
+        
+        Cada esboço ocupa poucos KB; o erro de rank típico é ~1,3% com k=200
+        (ver esbocos_quantis.erro_rank).
+        """
+        if self.dados_combinados is None:
+            return None
+        
+        if self._esbocos is None or self._esbocos[0] is not self.dados_combinados or self._esbocos[1].k != k:
+            esbocos = EsbocosGrupos(chaves=('cidade', 'ano'), variaveis=VARIAVEIS_RELATORIO, k=k, semente=0)
+            self._esbocos = (self.dados_combinados, esbocos.atualizar(self.dados_combinados))
+        return self._esbocos[1]
+    
+    def janelas_moveis(self, colunas=None):
+        """Estatísticas em janelas móveis (padrão: JANELAS_ANALISE), em float32
+        
+        Alinhadas às linhas de dados_combinados (colunas: variável, janela,
+        estatística). Só as combinações pedidas são calculadas, uma vez por
+        carga; janelas com menos de 80% das horas medidas ficam NaN.
+        """
+        if self.dados_combinados is None:
+            return None
+        
+        colunas = JANELAS_ANALISE if colunas is None else list(colunas)
+        if self._janelas is None or self._janelas[0] is not self.dados_combinados:
+            self._janelas = (self.dados_combinados, None)
+        calculadas = self._janelas[1]
+        faltantes = [coluna for coluna in colunas if calculadas is None or coluna not in calculadas.columns]
+        if faltantes:
+            if self.indice_estacoes is None or self.indice_estacoes.dados is not self.dados_combinados:
+                self._indexar_estacoes()
+            novas = calcular_janelas_moveis(self.indice_estacoes, colunas=faltantes)
+            calculadas = novas if calculadas is None else pd.concat([calculadas, novas], axis=1)
+            self._janelas = (self.dados_combinados, calculadas)
+        return calculadas[[coluna for coluna in colunas if coluna in calculadas.columns]]
+    
+    def climatologia(self):
+        """Normais por cidade, dia do ano e hora (média e desvio suavizados) para calcular anomalias
+        
+        Com o cache ativo, as normais ficam em disco e só são recalculadas quando os dados mudam.
+        """
+        if self.dados_combinados is None:
+            return None
+        
+        if self.clima is None or self.clima.dados is not self.dados_combinados:
+            diretorio = os.path.join(self.cache.diretorio, 'climatologia') if self.cache is not None and self.cache.ativo else None
+            self.clima = Climatologia(self.dados_combinados, diretorio=diretorio,
+                                      calendario=self.calendario(), cubo=self.cubo_agregados())
+        return self.clima
+    
+    def dados_cidade(self, cidade):
+        """Linhas de uma cidade em dados_combinados (recorte contíguo, sem máscara nem cópia)"""
+        if self.indice_estacoes is None or self.indice_estacoes.dados is not self.dados_combinados:
+            self._indexar_estacoes()
+        return self.indice_estacoes.fatia(cidade)
+    
+    def _compactar_dados(self):
+        """Reduz a memória de dados_combinados sem perder informação usada nas análises"""
+        df = self.dados_combinados
+        self.memoria_original = df.memory_usage(deep=True).sum()
+        
+        # Data e Hora UTC (texto) já estão representadas em 'datetime'
+        df = df.drop(columns=[col for col in ['Data', 'Hora UTC'] if col in df.columns])
+        
+        medicoes = [col for col in COLUNAS_IMPORTANTES if col in df.columns]
+        df[medicoes] = df[medicoes].astype('float32')
+        df['cidade'] = df['cidade'].astype('category')
+        df['ano'] = df['ano'].astype('int16')
+        
+        self.dados_combinados = df
+    
+    def relatorio_memoria(self):
+        """Mostra o uso de memória de dados_combinados por coluna"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados.")
+            return None
+        
+        uso = self.dados_combinados.memory_usage(deep=True, index=True)
+        total = uso.sum()
+        
+        print("\n" + "=" * 60)
+        print("🧠 USO DE MEMÓRIA DOS DADOS COMBINADOS")
+        print("=" * 60)
+        for coluna, bytes_coluna in uso.items():
+            tipo = self.dados_combinados[coluna].dtype if coluna in self.dados_combinados.columns else '-'
+            print(f"   {str(coluna)[:45]:<45} {str(tipo):>14} {bytes_coluna / 2**20:9.2f} MB")
+        print(f"   {'Total':<60} {total / 2**20:9.2f} MB")
+        
+        if self.memoria_original:
+            economia = 1 - total / self.memoria_original
+            print(f"   📉 Antes da compactação: {self.memoria_original / 2**20:.2f} MB "
+                  f"(economia de {economia:.0%})")
+        
+        return uso
+    
+    def analise_streaming(self, estacoes=None, anos=None, tamanho_bloco=100_000):
+        """Estatísticas descritivas, comparação e sazonalidade lendo os CSVs em blocos
+        
+        Não monta dados_combinados: cada bloco alimenta acumuladores por cidade e
+        mês, então a memória usada não depende da quantidade de estações/anos.
+        """
+        estacoes = ESTACOES_PADRAO if estacoes is None else estacoes
+        anos = ANOS_PADRAO if anos is None else anos
+        
+        self.catalogo.atualizar(self.diretorio_dados)
+        tarefas = self.catalogo.selecionar(estacoes=estacoes, anos=anos)
+        
+        acumulador = AcumuladorGrupos(chaves=('cidade', 'mes'))
+        for cidade, _, arquivo in tarefas:
+            try:
+                for bloco in ler_csv_em_blocos(arquivo, COLUNAS_IMPORTANTES, tamanho_bloco):
+                    bloco['cidade'] = cidade
+                    bloco['mes'] = bloco['datetime'].dt.month
+                    acumulador.atualizar(bloco)
+            except (FileNotFoundError, pd.errors.EmptyDataError, ValueError) as e:
+                print(f"Erro ao processar arquivo {arquivo}: {e}")
+        
+        print(f"✅ {acumulador.linhas} registros processados em blocos de {tamanho_bloco} linhas")
+        ordem_cidades = list(dict.fromkeys(cidade for cidade, _, _ in tarefas))
+        self._imprimir_resumo_streaming(acumulador, ordem_cidades)
+        return acumulador
+    
+    def _imprimir_resumo_streaming(self, acumulador, ordem_cidades):
+        """Imprime os relatórios de texto a partir dos acumuladores"""
+        estatisticas = indexar_estatisticas(acumulador.resumo(por=('cidade',)))
+        presentes = set(estatisticas.index.get_level_values('cidade'))
+        cidades = [cidade for cidade in ordem_cidades if cidade in presentes]
+        
+        self._imprimir_estatisticas_descritivas(estatisticas, cidades, titulo="(STREAMING)")
+        self._imprimir_comparacao(estatisticas, cidades, titulo="(STREAMING)")
+        
+        print("\n" + "=" * 60)
+        print("🌿 ANÁLISE DE SAZONALIDADE (STREAMING)")
+        print("=" * 60)
+        temp, precip, umid = VARIAVEIS_RELATORIO[0], VARIAVEIS_RELATORIO[1], VARIAVEIS_RELATORIO[2]
+        por_estacao = acumulador.resumo(por=('cidade', 'estacao'))
+        for cidade in cidades:
+            print(f"\n🏙️ {cidade}:")
+            dados_cidade = por_estacao[por_estacao['cidade'] == cidade]
+            tabela = dados_cidade.pivot(index='estacao', columns='variavel', values='media')
+            somas = dados_cidade.pivot(index='estacao', columns='variavel', values='soma')
+            colunas = {temp: tabela.get(temp), precip: somas.get(precip), umid: tabela.get(umid)}
+            print(pd.DataFrame({col: serie for col, serie in colunas.items() if serie is not None}).round(2))
+    
+    def tabela_estatisticas(self):
+        """Estatísticas por cidade e variável, calculadas em uma única passada agrupada.
+        
+        O resultado fica guardado enquanto dados_combinados for o mesmo objeto,
+        então os relatórios de texto compartilham o mesmo cálculo.
+        """
+        if self.dados_combinados is None:
+            return None
+        
+        if self._estatisticas is None or self._estatisticas[0] is not self.dados_combinados:
+            tabela = calcular_estatisticas(self.dados_combinados, VARIAVEIS_RELATORIO)
+            self._estatisticas = (self.dados_combinados, tabela)
+        return self._estatisticas[1]
+    
+    def _cidades_ordenadas(self, estatisticas):
+        """Cidades presentes na tabela, na ordem de dados_por_estacao"""
+        presentes = list(dict.fromkeys(estatisticas.index.get_level_values('cidade')))
+        ordem = [cidade for cidade in self.dados_por_estacao if cidade in presentes]
+        return ordem + [cidade for cidade in presentes if cidade not in ordem]
+    
+    def _imprimir_estatisticas_descritivas(self, estatisticas, cidades, titulo=""):
+        """Imprime as estatísticas descritivas de cada cidade a partir da tabela indexada"""
+        temp, precip, umid, vento = VARIAVEIS_RELATORIO[:4]
+        
+        print("=" * 60)
+        print(f"📊 ESTATÍSTICAS DESCRITIVAS METEOROLÓGICAS {titulo}".rstrip())
+        print("=" * 60)
+        
+        for cidade in cidades:
             print(f"\n🏙️  {cidade.upper()}")
             print("-" * 40)
             
             # Temperatura
-            if 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)' in dados_cidade.columns:
-                temp = dados_cidade['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].dropna()
+            if (cidade, temp) in estatisticas.index:
+                linha = estatisticas.loc[(cidade, temp)]
                 print("🌡️  Temperatura:")
-                print(f"   Média: {temp.mean():.1f}°C")
-                print(f"   Máxima: {temp.max():.1f}°C")
-                print(f"   Mínima: {temp.min():.1f}°C")
-                print(f"   Desvio Padrão: {temp.std():.1f}°C")
+                print(f"   Média: {linha['media']:.1f}°C")
+                print(f"   Máxima: {linha['maximo']:.1f}°C")
+                print(f"   Mínima: {linha['minimo']:.1f}°C")
+                print(f"   Desvio Padrão: {linha['desvio_padrao']:.1f}°C")
             
             # Precipitação
-            if 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)' in dados_cidade.columns:
-                precip = dados_cidade['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'].dropna()
+            if (cidade, precip) in estatisticas.index:
+                linha = estatisticas.loc[(cidade, precip)]
                 print("🌧️  Precipitação:")
-                print(f"   Total: {precip.sum():.1f}mm")
-                print(f"   Média horária: {precip.mean():.2f}mm")
-                print(f"   Máxima horária: {precip.max():.1f}mm")
+                print(f"   Total: {linha['soma']:.1f}mm")
+                print(f"   Média horária: {linha['media']:.2f}mm")
+                print(f"   Máxima horária: {linha['maximo']:.1f}mm")
             
             # Umidade
-            if 'UMIDADE RELATIVA DO AR, HORARIA (%)' in dados_cidade.columns:
-                umid = dados_cidade['UMIDADE RELATIVA DO AR, HORARIA (%)'].dropna()
+            if (cidade, umid) in estatisticas.index:
+                linha = estatisticas.loc[(cidade, umid)]
                 print("💧 Umidade:")
-                print(f"   Média: {umid.mean():.1f}%")
-                print(f"   Máxima: {umid.max():.1f}%")
-                print(f"   Mínima: {umid.min():.1f}%")
+                print(f"   Média: {linha['media']:.1f}%")
+                print(f"   Máxima: {linha['maximo']:.1f}%")
+                print(f"   Mínima: {linha['minimo']:.1f}%")
             
             # Vento
-            if 'VENTO, VELOCIDADE HORARIA (m/s)' in dados_cidade.columns:
-                vento = dados_cidade['VENTO, VELOCIDADE HORARIA (m/s)'].dropna()
+            if (cidade, vento) in estatisticas.index:
+                linha = estatisticas.loc[(cidade, vento)]
                 print("💨 Vento:")
-                print(f"   Velocidade média: {vento.mean():.1f}m/s")
-                print(f"   Rajada máxima: {vento.max():.1f}m/s")
+                print(f"   Velocidade média: {linha['media']:.1f}m/s")
+                print(f"   Rajada máxima: {linha['maximo']:.1f}m/s")
     
-    def comparacao_cidades(self):
-        """Compara estatisticamente as duas cidades"""
-        if self.dados_combinados is None:
-            print("❌ Dados não carregados.")
-            return
-        
+    def _imprimir_comparacao(self, estatisticas, cidades, titulo="", pareados=None, testes=None):
+        """Compara as cidades par a par a partir da tabela indexada
+        
+        Todas as diferenças saem de comparacao_pareada (todos os pares de uma
+        vez); o texto detalha a primeira cidade contra cada uma das demais e,
+        com mais de duas cidades, mostra também as matrizes completas.
+        `pareados` (EstacoesAlinhadas.comparacao_pareada) acrescenta a diferença
+        e o teste t só nas horas em que as duas cidades mediram; `testes`
+        (reamostragem.testar_pares_estacoes) troca o limiar fixo de 5% pelo
+        bootstrap em blocos.
+        """
         print("\n" + "=" * 60)
-        print("🔄 COMPARAÇÃO ESTATÍSTICA ENTRE CIDADES")
+        print(f"🔄 COMPARAÇÃO ESTATÍSTICA ENTRE CIDADES {titulo}".rstrip())
         print("=" * 60)
         
-        # Preparar dados para comparação
-        rg_data = self.dados_combinados[self.dados_combinados['cidade'] == 'Rio Grande']
-        cl_data = self.dados_combinados[self.dados_combinados['cidade'] == 'Capão do Leão']
+        if len(cidades) < 2:
+            return
         
         variaveis = [
             ('TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', '🌡️ Temperatura'),
@@ -208,26 +786,146 @@ class AnaliseMeteorolgicaRS:
             ('VENTO, VELOCIDADE HORARIA (m/s)', '💨 Velocidade do Vento'),
             ('PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)', '📊 Pressão')
         ]
-        
-        for var_col, var_nome in variaveis:
-            if var_col in self.dados_combinados.columns:
-                rg_var = rg_data[var_col].dropna()
-                cl_var = cl_data[var_col].dropna()
+        presentes = set(estatisticas.index.get_level_values('variavel'))
+        variaveis = [(var_col, var_nome) for var_col, var_nome in variaveis if var_col in presentes]
+        pares = comparacao_pareada(estatisticas.reset_index(), [var_col for var_col, _ in variaveis])
+        
+        referencia = cidades[0]
+        for outra in cidades[1:]:
+            for var_col, var_nome in variaveis:
+                if (referencia, var_col) not in estatisticas.index or (outra, var_col) not in estatisticas.index:
+                    continue
+                a = estatisticas.loc[(referencia, var_col)]
+                b = estatisticas.loc[(outra, var_col)]
+                par = pares.loc[(var_col, referencia, outra)]
                 
-                if len(rg_var) > 0 and len(cl_var) > 0:
+                if a['n'] > 0 and b['n'] > 0:
                     print(f"\n{var_nome}:")
-                    print(f"   Rio Grande - Média: {rg_var.mean():.2f}")
-                    print(f"   Capão do Leão - Média: {cl_var.mean():.2f}")
-                    print(f"   Diferença: {rg_var.mean() - cl_var.mean():.2f}")
-                    print(f"   Rio Grande - Desvio Padrão: {rg_var.std():.2f}")
-                    print(f"   Capão do Leão - Desvio Padrão: {cl_var.std():.2f}")
+                    print(f"   {referencia} - Média: {a['media']:.2f}")
+                    print(f"   {outra} - Média: {b['media']:.2f}")
+                    print(f"   Diferença: {par['diferenca_media']:.2f}")
+                    if pareados is not None and (var_col, referencia, outra) in pareados.index:
+                        pareado = pareados.loc[(var_col, referencia, outra)]
+                        if pareado['n'] > 1:
+                            print(f"   Diferença pareada ({pareado['n']:.0f} horas em comum): "
+                                  f"{pareado['diferenca_media']:.2f} (t={pareado['t']:.2f}, p={pareado['p']:.3g})")
+                    print(f"   {referencia} - Desvio Padrão: {a['desvio_padrao']:.2f}")
+                    print(f"   {outra} - Desvio Padrão: {b['desvio_padrao']:.2f}")
                     
-                    # Análise simples de diferença percentual
-                    diff_percentual = abs(rg_var.mean() - cl_var.mean()) / ((rg_var.mean() + cl_var.mean()) / 2) * 100
-                    if diff_percentual > 5:
+                    diff_percentual = par['diferenca_percentual']
+                    teste = resultado_par(testes, var_col, referencia, outra) if testes is not None else None
+                    if teste is not None and pd.notna(teste['p_bootstrap']):
+                        print(f"   🎲 IC {NIVEL_CONFIANCA:.0%} (bootstrap em blocos): "
+                              f"[{teste['ic_inferior']:.2f}, {teste['ic_superior']:.2f}] · "
+                              f"p={teste['p_bootstrap']:.4f} (permutação: {teste['p_permutacao']:.4f})")
+                        significativa = teste['p_bootstrap'] < 1 - NIVEL_CONFIANCA
+                        print(f"   📊 Diferença {'significativa' if significativa else 'não significativa'} "
+                              f"({diff_percentual:.1f}%)")
+                    # Sem teste: análise simples de diferença percentual
+                    elif diff_percentual > 5:
                         print(f"   📊 Diferença considerável ({diff_percentual:.1f}%)")
                     else:
                         print(f"   📊 Diferença pequena ({diff_percentual:.1f}%)")
+        
+        if len(cidades) > 2:
+            for var_col, var_nome in variaveis:
+                matriz = matriz_pareada(pares, var_col).reindex(index=cidades, columns=cidades)
+                print(f"\n{var_nome} - diferença de médias (linha - coluna):")
+                print(matriz.round(2))
+    
+    def comparacao_todos_pares(self, variaveis=None):
+        """Diferença de médias, diferença percentual e razão de desvios de todos os pares de cidades
+        
+        Índice (variavel, cidade_a, cidade_b); ver motor_estatisticas.matriz_pareada para as matrizes.
+        """
+        if self.dados_combinados is None:
+            return None
+        variaveis = VARIAVEIS_RELATORIO if variaveis is None else variaveis
+        return comparacao_pareada(self.tabela_estatisticas(), variaveis)
+    
+    def estatisticas_descritivas(self):
+        """Gera estatísticas descritivas completas"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados. Execute carregar_dados_multiplos_anos() primeiro.")
+            return
+        
+        estatisticas = indexar_estatisticas(self.tabela_estatisticas())
+        self._imprimir_estatisticas_descritivas(estatisticas, self._cidades_ordenadas(estatisticas))
+    
+    def comparacao_cidades(self):
+        """Compara estatisticamente as cidades"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados.")
+            return
+        
+        estatisticas = indexar_estatisticas(self.tabela_estatisticas())
+        pareados = self.estacoes_alinhadas().comparacao_pareada(VARIAVEIS_RELATORIO)
+        testes = self.significancia_entre_cidades(paralelo=True)
+        self._imprimir_comparacao(estatisticas, self._cidades_ordenadas(estatisticas),
+                                  pareados=pareados, testes=testes)
+    
+    def significancia_entre_cidades(self, variaveis=None, tamanho_bloco=TAMANHO_BLOCO, n_reamostragens=N_REAMOSTRAGENS,
+                                    semente=0, paralelo=False, n_workers=None):
+        """Bootstrap em blocos e permutação das diferenças pareadas entre todos os pares de cidades
+        
+        Blocos de `tamanho_bloco` horas preservam a autocorrelação horária; ver
+        reamostragem.testar_pares_estacoes. Com `paralelo`, os pares são
+        distribuídos em n_workers processos (padrão: número de CPUs). Com
+        semente fixa, a tabela é calculada uma vez por carga.
+        """
+        if self.dados_combinados is None:
+            return None
+        variaveis = VARIAVEIS_RELATORIO if variaveis is None else variaveis
+        return self._tabela_significancia(
+            ('cidades', tuple(variaveis), tamanho_bloco, n_reamostragens, semente),
+            lambda: testar_pares_estacoes(
+                self.estacoes_alinhadas(variaveis=variaveis), variaveis, tamanho_bloco, n_reamostragens, semente,
+                paralelo=paralelo, n_workers=n_workers
+            )
+        )
+    
+    def significancia_sazonal(self, variaveis=None, tamanho_bloco=TAMANHO_BLOCO, n_reamostragens=N_REAMOSTRAGENS,
+                              semente=0, paralelo=False, n_workers=None):
+        """Bootstrap em blocos e permutação da diferença entre cada par de estações do ano, por cidade"""
+        if self.dados_combinados is None:
+            return None
+        variaveis = VARIAVEIS_RELATORIO if variaveis is None else variaveis
+        return self._tabela_significancia(
+            ('sazonal', tuple(variaveis), tamanho_bloco, n_reamostragens, semente),
+            lambda: testar_estacoes_do_ano(
+                self.dados_combinados, variaveis, calendario=self.calendario(),
+                tamanho_bloco=tamanho_bloco, n_reamostragens=n_reamostragens, semente=semente,
+                paralelo=paralelo, n_workers=n_workers
+            )
+        )
+    
+    def _tabela_significancia(self, chave, calcular):
+        """Tabela de testes guardada por carga; sem semente (chave[-1] None) o resultado muda a cada chamada"""
+        if chave[-1] is None:
+            return calcular()
+        if self._significancia is None or self._significancia[0] is not self.dados_combinados:
+            self._significancia = (self.dados_combinados, {})
+        tabelas = self._significancia[1]
+        if chave not in tabelas:
+            tabelas[chave] = calcular()
+        return tabelas[chave]
+    
+    def percentis(self, qs=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Mostra percentis aproximados de cada variável por cidade (a partir dos esboços)"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados.")
+            return
+        
+        print("\n" + "=" * 60)
+        print("📏 PERCENTIS POR CIDADE")
+        print("=" * 60)
+        
+        esbocos = self.esbocos_quantis()
+        for variavel in VARIAVEIS_RELATORIO:
+            if variavel not in self.dados_combinados.columns:
+                continue
+            print(f"\n{variavel}:")
+            print(esbocos.tabela_percentis(variavel, por='cidade', qs=qs).round(2))
     
     def visualizacoes_comparativas_avancadas(self):
         """Cria visualizações comparativas avançadas"""
@@ -289,11 +987,11 @@ class AnaliseMeteorolgicaRS:
         
         # 3. Scatter: Umidade vs Temperatura
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_scatter = self.dados_combinados[
-                (self.dados_combinados['cidade'] == cidade) &
-                (self.dados_combinados['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].notna()) &
-                (self.dados_combinados['UMIDADE RELATIVA DO AR, HORARIA (%)'].notna())
-            ].sample(n=min(1000, len(self.dados_combinados[self.dados_combinados['cidade'] == cidade])))
+            dados_cidade = self.dados_cidade(cidade)
+            dados_scatter = dados_cidade[
+                (dados_cidade['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].notna()) &
+                (dados_cidade['UMIDADE RELATIVA DO AR, HORARIA (%)'].notna())
+            ].sample(n=min(1000, len(dados_cidade)))
             
             fig.add_trace(
                 go.Scatter(
@@ -309,10 +1007,7 @@ class AnaliseMeteorolgicaRS:
         
         # 4. Histograma de temperaturas
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_temp = self.dados_combinados[
-                (self.dados_combinados['cidade'] == cidade) &
-                (self.dados_combinados['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].notna())
-            ]['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)']
+            dados_temp = self.dados_cidade(cidade)['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].dropna()
             
             fig.add_trace(
                 go.Histogram(
@@ -390,27 +1085,29 @@ class AnaliseMeteorolgicaRS:
         if self.dados_combinados is None:
             return pd.DataFrame()
         
-        # Adicionar colunas de data
-        self.dados_combinados['ano_mes'] = self.dados_combinados['datetime'].dt.to_period('M')
-        
-        # Agregar por mês e cidade
-        dados_mensais = self.dados_combinados.groupby(['cidade', 'ano_mes']).agg({
-            'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)': ['mean', 'max', 'min'],
-            'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)': 'sum',
-            'UMIDADE RELATIVA DO AR, HORARIA (%)': 'mean',
-            'VENTO, VELOCIDADE HORARIA (m/s)': 'mean',
-            'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)': 'mean'
-        }).reset_index()
-        
-        # Renomear colunas
-        dados_mensais.columns = [
-            'cidade', 'ano_mes', 'temp_media', 'temp_max', 'temp_min',
-            'precip_total', 'umidade_media', 'vento_medio', 'pressao_media'
-        ]
+        mensal = self.cubo_agregados().tabela('mes')
+        colunas = {
+            'temp_media': ('TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', 'media'),
+            'temp_max': ('TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', 'maximo'),
+            'temp_min': ('TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', 'minimo'),
+            'precip_total': ('PRECIPITAÇÃO TOTAL, HORÁRIO (mm)', 'soma'),
+            'umidade_media': ('UMIDADE RELATIVA DO AR, HORARIA (%)', 'media'),
+            'vento_medio': ('VENTO, VELOCIDADE HORARIA (m/s)', 'media'),
+            'pressao_media': ('PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)', 'media')
+        }
+        
+        # Agregados mensais por cidade (índice: cidade, início do mês)
+        dados_mensais = pd.DataFrame({nome: mensal[coluna] for nome, coluna in colunas.items()})
+        dados_mensais = dados_mensais.reset_index()
+        dados_mensais.insert(1, 'ano_mes', dados_mensais.pop('mes').dt.to_period('M'))
         
         # Converter período para datetime
         dados_mensais['data_mes'] = dados_mensais['ano_mes'].dt.to_timestamp()
         
+        # Fração das horas do mês com precipitação medida (totais de meses incompletos ficam subestimados)
+        cobertura = cobertura_mensal(self.cubo_agregados())
+        dados_mensais['cobertura'] = cobertura['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'].to_numpy()
+        
         return dados_mensais
     
     def analise_sazonalidade(self):
@@ -423,34 +1120,195 @@ class AnaliseMeteorolgicaRS:
         print("🌿 ANÁLISE DE SAZONALIDADE")
         print("=" * 60)
         
-        # Adicionar informações de estação
-        self.dados_combinados['mes'] = self.dados_combinados['datetime'].dt.month
-        
-        def definir_estacao(mes):
-            if mes in [12, 1, 2]:
-                return 'Verão'
-            elif mes in [3, 4, 5]:
-                return 'Outono'
-            elif mes in [6, 7, 8]:
-                return 'Inverno'
-            else:
-                return 'Primavera'
-        
-        self.dados_combinados['estacao'] = self.dados_combinados['mes'].apply(definir_estacao)
+        por_estacao = self.cubo_agregados()
         
         # Análise por estação
         for cidade in ['Rio Grande', 'Capão do Leão']:
             print(f"\n🏙️ {cidade}:")
-            dados_cidade = self.dados_combinados[self.dados_combinados['cidade'] == cidade]
+            dados_cidade = por_estacao.por_cidade('estacao', cidade)
             
-            estacoes_stats = dados_cidade.groupby('estacao').agg({
-                'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)': 'mean',
-                'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)': 'sum',
-                'UMIDADE RELATIVA DO AR, HORARIA (%)': 'mean'
+            estacoes_stats = pd.DataFrame({
+                'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)':
+                    dados_cidade[('TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', 'media')],
+                'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)':
+                    dados_cidade[('PRECIPITAÇÃO TOTAL, HORÁRIO (mm)', 'soma')],
+                'UMIDADE RELATIVA DO AR, HORARIA (%)':
+                    dados_cidade[('UMIDADE RELATIVA DO AR, HORARIA (%)', 'media')]
             }).round(2)
             
             print(estacoes_stats)
     
+    def analise_significancia_sazonal(self, paralelo=True, n_workers=None):
+        """Testa se as diferenças entre estações do ano são significativas (bootstrap e permutação em blocos)"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados.")
+            return
+        
+        print("\n" + "=" * 60)
+        print("🎲 SIGNIFICÂNCIA DAS DIFERENÇAS SAZONAIS")
+        print("=" * 60)
+        
+        variaveis = [
+            ('TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', '🌡️ Temperatura'),
+            ('PRECIPITAÇÃO TOTAL, HORÁRIO (mm)', '🌧️ Precipitação'),
+            ('UMIDADE RELATIVA DO AR, HORARIA (%)', '💧 Umidade')
+        ]
+        testes = self.significancia_sazonal([var_col for var_col, _ in variaveis],
+                                            paralelo=paralelo, n_workers=n_workers)
+        print(f"Blocos de 24h · IC {NIVEL_CONFIANCA:.0%} bootstrap · diferença = média de a - média de b")
+        for var_col, var_nome in variaveis:
+            if var_col not in testes.index.get_level_values('variavel'):
+                continue
+            tabela = testes.xs(var_col, level='variavel')[
+                ['diferenca', 'ic_inferior', 'ic_superior', 'p_bootstrap', 'p_permutacao']
+            ]
+            print(f"\n{var_nome}:")
+            print(tabela.round(4))
+    
+    def espectros(self, metodo='welch', **opcoes):
+        """Densidade espectral de todas as cidades e variáveis do cubo denso (uma FFT em lote)
+        
+        metodo='welch' (segmentos de 30 dias, ver espectro.welch) ou 'periodograma';
+        retorna (frequências em ciclos/dia, densidade (cidades, variáveis, frequências)).
+        Cada combinação de método e opções é calculada uma vez por carga.
+        """
+        if self.dados_combinados is None:
+            return None
+        if metodo not in ('welch', 'periodograma'):
+            raise ValueError(f"Método espectral desconhecido: {metodo}")
+        if self._espectros is None or self._espectros[0] is not self.dados_combinados:
+            self._espectros = (self.dados_combinados, {})
+        calculados = self._espectros[1]
+        chave = (metodo, repr(sorted(opcoes.items())))
+        if chave not in calculados:
+            cubo = self.cubo_denso()
+            if metodo == 'welch':
+                frequencias, densidade, _ = welch(cubo, **opcoes)
+                calculados[chave] = (frequencias, densidade)
+            else:
+                calculados[chave] = periodograma(cubo, **opcoes)
+        return calculados[chave]
+    
+    def harmonicos_ciclos(self):
+        """Amplitude, fase e horário de pico dos ciclos diurno, semidiurno e anual (ver espectro.harmonicos)"""
+        if self.dados_combinados is None:
+            return None
+        if self._harmonicos is None or self._harmonicos[0] is not self.dados_combinados:
+            self._harmonicos = (self.dados_combinados, harmonicos(self.cubo_denso()))
+        return self._harmonicos[1]
+    
+    def analise_espectral(self):
+        """Ciclos diário e anual de cada cidade e período dominante do espectro de Welch"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados.")
+            return
+        
+        print("\n" + "=" * 60)
+        print("🎼 ANÁLISE ESPECTRAL (CICLOS DIÁRIO E ANUAL)")
+        print("=" * 60)
+        
+        cubo = self.cubo_denso()
+        tabela = self.harmonicos_ciclos()
+        frequencias, densidade = self.espectros('welch')
+        picos = picos_espectrais(frequencias, densidade, cubo)
+        
+        for variavel in VARIAVEIS_RELATORIO:
+            if variavel not in cubo.variaveis:
+                continue
+            print(f"\n{variavel}:")
+            for cidade in cubo.cidades:
+                diurno = tabela.loc[(variavel, cidade, 'diurno')]
+                anual = tabela.loc[(variavel, cidade, 'anual')]
+                print(f"   🏙️ {cidade}:")
+                if pd.notna(diurno['amplitude']):
+                    print(f"      Ciclo diário: amplitude {diurno['amplitude']:.2f}, pico às "
+                          f"{diurno['pico_horas']:.1f}h UTC ({diurno['variancia_explicada']:.1%} da variância)")
+                if pd.notna(anual['amplitude']):
+                    print(f"      Ciclo anual: amplitude {anual['amplitude']:.2f}, pico perto do dia "
+                          f"{(anual['pico_horas'] / 24) % 365.25 + 1:.0f} do ano ({anual['variancia_explicada']:.1%} da variância)")
+                else:
+                    print("      Ciclo anual: série mais curta que um ano")
+                periodo = picos.loc[variavel, cidade]
+                if pd.notna(periodo):
+                    print(f"      Período dominante (Welch, até 30 dias): {periodo:.1f}h")
+    
+    def analise_janelas_moveis(self):
+        """Maiores acumulados de chuva e semanas mais quentes/frias em janelas móveis"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados.")
+            return
+        
+        print("\n" + "=" * 60)
+        print("🪟 EXTREMOS EM JANELAS MÓVEIS")
+        print("=" * 60)
+        
+        janelas = self.janelas_moveis()
+        precipitacao = 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'
+        temperatura = 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'
+        
+        if self.indice_estacoes is None or self.indice_estacoes.dados is not self.dados_combinados:
+            self._indexar_estacoes()
+        for cidade in self.indice_estacoes.cidades():
+            linhas = self.dados_cidade(cidade)
+            if linhas.empty:
+                continue
+            print(f"\n🏙️ {cidade}:")
+            datas = linhas['datetime']
+            
+            for rotulo, coluna, funcao, unidade in [
+                ("Maior chuva em 72h", (precipitacao, '72h', 'soma'), 'idxmax', 'mm'),
+                ("Maior chuva em 30 dias", (precipitacao, '30d', 'soma'), 'idxmax', 'mm'),
+                ("Semana mais quente (média 7d)", (temperatura, '7d', 'media'), 'idxmax', '°C'),
+                ("Semana mais fria (média 7d)", (temperatura, '7d', 'media'), 'idxmin', '°C'),
+            ]:
+                if coluna[0] not in janelas.columns:
+                    continue
+                serie = janelas.loc[linhas.index, coluna].dropna()
+                if serie.empty:
+                    continue
+                posicao = getattr(serie, funcao)()
+                print(f"   {rotulo}: {serie[posicao]:.1f}{unidade} (até {datas[posicao]:%d/%m/%Y %H}h)")
+    
+    def eventos_extremos(self, eventos=None):
+        """Tabela de ondas de calor/frio, estiagens e chuvas fortes (uma linha por evento)"""
+        if self.dados_combinados is None:
+            return None
+        return detectar_eventos(self.cubo_agregados(), eventos)
+    
+    def analise_eventos_extremos(self):
+        """Resume os eventos extremos de cada cidade"""
+        if self.dados_combinados is None:
+            print("❌ Dados não carregados.")
+            return
+        
+        print("\n" + "=" * 60)
+        print("🔥 EVENTOS EXTREMOS")
+        print("=" * 60)
+        
+        eventos = self.eventos_extremos()
+        nomes = {
+            'onda_de_calor': "🔥 Ondas de calor",
+            'onda_de_frio': "🥶 Ondas de frio",
+            'estiagem': "🏜️ Estiagens",
+            'chuva_forte': "⛈️ Chuvas fortes",
+        }
+        
+        if eventos.empty:
+            print("\nNenhum evento extremo encontrado")
+            return
+        
+        for cidade in pd.unique(eventos['cidade']):
+            print(f"\n🏙️ {cidade}:")
+            da_cidade = eventos[eventos['cidade'] == cidade]
+            for evento, rotulo in nomes.items():
+                do_tipo = da_cidade[da_cidade['evento'] == evento]
+                if do_tipo.empty:
+                    print(f"   {rotulo}: nenhum")
+                    continue
+                maior = do_tipo.loc[do_tipo['duracao'].idxmax()]
+                print(f"   {rotulo}: {len(do_tipo)} eventos; mais longo com {maior['duracao']} dias "
+                      f"({maior['inicio']:%d/%m/%Y} a {maior['fim']:%d/%m/%Y}, pico {maior['pico']:.1f})")
+    
     def modelo_previsao_temperatura(self):
         """Cria modelo de previsão de temperatura"""
         if self.dados_combinados is None:
@@ -466,12 +1324,23 @@ class AnaliseMeteorolgicaRS:
         print("=" * 60)
         
         # Preparar dados para modelagem
+        # Features temporais vêm da tabela de calendário (join pelo índice)
         dados_modelo = self.dados_combinados.dropna(subset=[
             'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)',
             'UMIDADE RELATIVA DO AR, HORARIA (%)',
             'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)',
             'VENTO, VELOCIDADE HORARIA (m/s)'
-        ]).copy()
+        ]).join(self.calendario()[['hora', 'dia_ano', 'mes']])
+        
+        # Features de janelas móveis (só horas passadas e a atual)
+        janelas_modelo = {
+            'precipitacao_72h': ('PRECIPITAÇÃO TOTAL, HORÁRIO (mm)', '72h', 'soma'),
+            'umidade_media_24h': ('UMIDADE RELATIVA DO AR, HORARIA (%)', '24h', 'media'),
+        }
+        janelas = self.janelas_moveis()
+        dados_modelo = dados_modelo.join(
+            pd.DataFrame({nome: janelas[coluna] for nome, coluna in janelas_modelo.items()})
+        ).dropna(subset=list(janelas_modelo))
         
         # Features
         features = [
@@ -481,10 +1350,8 @@ class AnaliseMeteorolgicaRS:
         ]
         
         # Adicionar features temporais
-        dados_modelo['hora'] = dados_modelo['datetime'].dt.hour
-        dados_modelo['dia_ano'] = dados_modelo['datetime'].dt.dayofyear
-        dados_modelo['mes'] = dados_modelo['datetime'].dt.month
         features.extend(['hora', 'dia_ano', 'mes'])
+        features.extend(janelas_modelo)
         
         # Encoding para cidade
         dados_modelo['cidade_encoded'] = dados_modelo['cidade'].map({'Rio Grande': 0, 'Capão do Leão': 1})
@@ -523,22 +1390,46 @@ class AnaliseMeteorolgicaRS:
         
         return rf_modelo
     
-    def relatorio_completo(self):
-        """Gera relatório completo da análise"""
+    def relatorio_completo(self, significancia_sazonal=False):
+        """Gera relatório completo da análise
+        
+        O teste de significância entre estações do ano (bootstrap e permutação
+        de cada par de estações, por cidade) é o passo mais caro; só roda com
+        significancia_sazonal=True.
+        """
         print("🚀 Executando Análise Meteorológica Completa...")
         print("=" * 60)
         
         # Carregar dados
         self.carregar_dados_multiplos_anos()
         
+        # Cobertura
+        self.relatorio_cobertura()
+        
         # Estatísticas
         self.estatisticas_descritivas()
         
         # Comparação
         self.comparacao_cidades()
         
+        # Percentis
+        self.percentis()
+        
+        # Correlação entre cidades
+        self.correlacao_entre_cidades()
+        self.analise_defasagens()
+        
         # Sazonalidade
         self.analise_sazonalidade()
+        if significancia_sazonal:
+            self.analise_significancia_sazonal()
+        self.analise_espectral()
+        
+        # Janelas móveis
+        self.analise_janelas_moveis()
+        
+        # Eventos extremos
+        self.analise_eventos_extremos()
         
         # Visualizações Plotly
         if PLOTLY_DISPONIVEL:
@@ -559,7 +1450,10 @@ class AnaliseMeteorolgicaRS:
         if MATPLOTLIB_DISPONIVEL and self.dados_combinados is not None:
             print("\n🎨 Criando visualizações estáticas (Matplotlib)...")
             try:
-                criar_visualizacoes_completas(self.dados_combinados)
+                criar_visualizacoes_completas(
+                    self.dados_combinados, self.indice_estacoes, self.cubo_agregados(), self.esbocos_quantis(),
+                    self.harmonicos_ciclos()
+                )
             except (ImportError, AttributeError) as e:
                 print(f"⚠️ Erro nas visualizações matplotlib: {e}")
         
@@ -581,49 +1475,62 @@ class AnaliseMeteorolgicaRS:
         print("🔍 INSIGHTS PRINCIPAIS")
         print("=" * 60)
         
-        # Calcular diferenças médias
-        rg_data = self.dados_combinados[self.dados_combinados['cidade'] == 'Rio Grande']
-        cl_data = self.dados_combinados[self.dados_combinados['cidade'] == 'Capão do Leão']
+        estatisticas = indexar_estatisticas(self.tabela_estatisticas())
+        cidades = self._cidades_ordenadas(estatisticas)
+        if len(cidades) < 2:
+            return
+        a, b = cidades[0], cidades[1]
+        
+        def estatistica(cidade, variavel, coluna):
+            if (cidade, variavel) not in estatisticas.index:
+                return float('nan')
+            return estatisticas.loc[(cidade, variavel), coluna]
+        
+        temp, precip, umid, vento = VARIAVEIS_RELATORIO[:4]
         
         # Temperatura
-        if 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)' in self.dados_combinados.columns:
-            temp_rg = rg_data['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].mean()
-            temp_cl = cl_data['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].mean()
+        if temp in self.dados_combinados.columns:
+            temp_a = estatistica(a, temp, 'media')
+            temp_b = estatistica(b, temp, 'media')
             
-            if temp_rg > temp_cl:
-                print(f"🌡️ Rio Grande é em média {temp_rg - temp_cl:.1f}°C mais quente que Capão do Leão")
+            if temp_a > temp_b:
+                print(f"🌡️ {a} é em média {temp_a - temp_b:.1f}°C mais quente que {b}")
             else:
-                print(f"🌡️ Capão do Leão é em média {temp_cl - temp_rg:.1f}°C mais quente que Rio Grande")
+                print(f"🌡️ {b} é em média {temp_b - temp_a:.1f}°C mais quente que {a}")
         
         # Precipitação
-        if 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)' in self.dados_combinados.columns:
-            precip_rg = rg_data['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'].sum()
-            precip_cl = cl_data['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'].sum()
+        if precip in self.dados_combinados.columns:
+            precip_a = estatistica(a, precip, 'soma')
+            precip_b = estatistica(b, precip, 'soma')
             
-            if precip_rg > precip_cl:
-                print(f"🌧️ Rio Grande teve {precip_rg - precip_cl:.0f}mm a mais de chuva no período")
+            if precip_a > precip_b:
+                print(f"🌧️ {a} teve {precip_a - precip_b:.0f}mm a mais de chuva no período")
             else:
-                print(f"🌧️ Capão do Leão teve {precip_cl - precip_rg:.0f}mm a mais de chuva no período")
+                print(f"🌧️ {b} teve {precip_b - precip_a:.0f}mm a mais de chuva no período")
         
         # Umidade
-        if 'UMIDADE RELATIVA DO AR, HORARIA (%)' in self.dados_combinados.columns:
-            umid_rg = rg_data['UMIDADE RELATIVA DO AR, HORARIA (%)'].mean()
-            umid_cl = cl_data['UMIDADE RELATIVA DO AR, HORARIA (%)'].mean()
+        if umid in self.dados_combinados.columns:
+            umid_a = estatistica(a, umid, 'media')
+            umid_b = estatistica(b, umid, 'media')
             
-            if umid_rg > umid_cl:
-                print(f"💧 Rio Grande é {umid_rg - umid_cl:.1f}% mais úmido em média")
+            if umid_a > umid_b:
+                print(f"💧 {a} é {umid_a - umid_b:.1f}% mais úmido em média")
             else:
-                print(f"💧 Capão do Leão é {umid_cl - umid_rg:.1f}% mais úmido em média")
+                print(f"💧 {b} é {umid_b - umid_a:.1f}% mais úmido em média")
         
         # Vento
-        if 'VENTO, VELOCIDADE HORARIA (m/s)' in self.dados_combinados.columns:
-            vento_rg = rg_data['VENTO, VELOCIDADE HORARIA (m/s)'].mean()
-            vento_cl = cl_data['VENTO, VELOCIDADE HORARIA (m/s)'].mean()
+        if vento in self.dados_combinados.columns:
+            vento_a = estatistica(a, vento, 'media')
+            vento_b = estatistica(b, vento, 'media')
             
-            if vento_rg > vento_cl:
-                print(f"💨 Rio Grande tem ventos {vento_rg - vento_cl:.1f}m/s mais fortes em média")
+            if vento_a > vento_b:
+                print(f"💨 {a} tem ventos {vento_a - vento_b:.1f}m/s mais fortes em média")
             else:
-                print(f"💨 Capão do Leão tem ventos {vento_cl - vento_rg:.1f}m/s mais fortes em média")
+                print(f"💨 {b} tem ventos {vento_b - vento_a:.1f}m/s mais fortes em média")
+        
+        # Anomalias em relação às normais de cada cidade
+        if temp in self.dados_combinados.columns:
+            self._insights_anomalias(cidades, temp)
         
         print("\n📋 Recomendações:")
         print("   • Use os modelos de previsão para planejamento agrícola")
@@ -631,6 +1538,30 @@ class AnaliseMeteorolgicaRS:
         print("   • Considere as diferenças climáticas para cultivos específicos")
         print("   • Utilize os gráficos para comunicar resultados a stakeholders")
 
+    
+    def _insights_anomalias(self, cidades, temp):
+        """Temperatura recente e mês mais atípico de cada cidade em relação à sua climatologia"""
+        calendario = self.calendario()
+        anomalias = self.climatologia().anomalias(self.dados_combinados, [temp], calendario=calendario)[temp]
+        
+        for cidade in cidades:
+            linhas = self.dados_cidade(cidade).index
+            datas = self.dados_combinados.loc[linhas, 'datetime']
+            if datas.isna().all():
+                continue
+            
+            recentes = anomalias[linhas[datas > datas.max() - pd.Timedelta(days=30)]].mean()
+            if pd.notna(recentes):
+                direcao = "acima" if recentes >= 0 else "abaixo"
+                print(f"📈 {cidade}: últimos 30 dias {abs(recentes):.1f}°C {direcao} da normal climatológica")
+            
+            mensal = anomalias[linhas].groupby(
+                [calendario.loc[linhas, 'ano'], calendario.loc[linhas, 'mes']]
+            ).mean().drop(index=-1, level='ano', errors='ignore').dropna()
+            if not mensal.empty:
+                ano, mes = mensal.abs().idxmax()
+                print(f"   Mês mais atípico: {mes:02d}/{ano} ({mensal[(ano, mes)]:+.1f}°C em relação à normal)")
+
 
 # Executar análise completa
 if __name__ == "__main__":
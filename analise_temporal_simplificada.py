@@ -41,11 +41,20 @@ except ImportError:
     MATPLOTLIB_VIZ_DISPONIVEL = False
     print("⚠️ Módulo de visualizações matplotlib não encontrado.")
 
+from calendario import construir_calendario, nomes_estacao
+from indice_estacoes import IndiceEstacoes
+from leitura_inmet import VALORES_AUSENTES
+from pareamento import EstacoesAlinhadas
+from reamostragem import NIVEL_CONFIANCA, resultado_par, testar_pares_estacoes
+
 class AnaliseMeteorolgicaRS:
     def __init__(self):
         self.dados_rio_grande = []
         self.dados_capao_leao = []
         self.dados_combinados = None
+        self.indice_estacoes = None
+        # (dados_combinados, tabela de calendário alinhada a eles)
+        self._calendario = None
         
     def carregar_dados_multiplos_anos(self):
         """Carrega dados de todos os anos disponíveis (2023, 2024, 2025)"""
@@ -84,7 +93,7 @@ class AnaliseMeteorolgicaRS:
         """Processa um arquivo CSV individual"""
         try:
             # Ler arquivo pulando as linhas de metadados
-            df = pd.read_csv(arquivo, sep=';', skiprows=8, encoding='latin-1')
+            df = pd.read_csv(arquivo, sep=';', skiprows=8, encoding='latin-1', na_values=VALORES_AUSENTES)
             
             # Limpar nomes das colunas
             df.columns = df.columns.str.strip()
@@ -135,8 +144,25 @@ class AnaliseMeteorolgicaRS:
             # Combinar ambas as cidades
             self.dados_combinados = pd.concat([df_rg_completo, df_cl_completo], ignore_index=True)
             
-            # Ordenar por datetime
-            self.dados_combinados = self.dados_combinados.sort_values('datetime').reset_index(drop=True)
+            # Ordenar por cidade e datetime
+            self._indexar_estacoes()
+    
+    def _indexar_estacoes(self):
+        """Ordena dados_combinados por cidade e datetime e guarda onde começa e termina cada cidade"""
+        self.indice_estacoes = IndiceEstacoes(self.dados_combinados)
+        self.dados_combinados = self.indice_estacoes.dados
+    
+    def calendario(self):
+        """Campos de calendário (hora, dia do ano, mês, estação...) de cada linha de dados_combinados"""
+        if self._calendario is None or self._calendario[0] is not self.dados_combinados:
+            self._calendario = (self.dados_combinados, construir_calendario(self.dados_combinados['datetime']))
+        return self._calendario[1]
+    
+    def dados_cidade(self, cidade):
+        """Linhas de uma cidade em dados_combinados (recorte contíguo, sem máscara nem cópia)"""
+        if self.indice_estacoes is None or self.indice_estacoes.dados is not self.dados_combinados:
+            self._indexar_estacoes()
+        return self.indice_estacoes.fatia(cidade)
     
     def estatisticas_descritivas(self):
         """Gera estatísticas descritivas completas"""
@@ -149,7 +175,7 @@ class AnaliseMeteorolgicaRS:
         print("=" * 60)
         
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_cidade = self.dados_combinados[self.dados_combinados['cidade'] == cidade]
+            dados_cidade = self.dados_cidade(cidade)
             
             print(f"\n🏙️  {cidade.upper()}")
             print("-" * 40)
@@ -197,8 +223,8 @@ class AnaliseMeteorolgicaRS:
         print("=" * 60)
         
         # Preparar dados para comparação
-        rg_data = self.dados_combinados[self.dados_combinados['cidade'] == 'Rio Grande']
-        cl_data = self.dados_combinados[self.dados_combinados['cidade'] == 'Capão do Leão']
+        rg_data = self.dados_cidade('Rio Grande')
+        cl_data = self.dados_cidade('Capão do Leão')
         
         variaveis = [
             ('TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', '🌡️ Temperatura'),
@@ -208,6 +234,10 @@ class AnaliseMeteorolgicaRS:
             ('PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)', '📊 Pressão')
         ]
         
+        # Bootstrap em blocos de 24h das diferenças pareadas (mesmas horas nas duas cidades)
+        alinhadas = EstacoesAlinhadas(self.dados_combinados, [var_col for var_col, _ in variaveis])
+        testes = testar_pares_estacoes(alinhadas, semente=0)
+        
         for var_col, var_nome in variaveis:
             if var_col in self.dados_combinados.columns:
                 rg_var = rg_data[var_col].dropna()
@@ -217,19 +247,26 @@ class AnaliseMeteorolgicaRS:
                     print(f"\n{var_nome}:")
                     print(f"   Rio Grande - Média: {rg_var.mean():.2f}")
                     print(f"   Capão do Leão - Média: {cl_var.mean():.2f}")
-                    print(f"   Diferença: {rg_var.mean() - cl_var.mean():.2f}")
                     
-                    # Comparação simples entre médias
-                    diferenca = abs(rg_var.mean() - cl_var.mean())
-                    if diferenca > rg_var.std() * 0.1:  # Diferença maior que 10% do desvio padrão
+                    # Com teste, a diferença é a pareada (mesmas horas), a mesma do IC abaixo
+                    teste = resultado_par(testes, var_col, 'Rio Grande', 'Capão do Leão')
+                    if teste is not None and pd.notna(teste['diferenca']):
+                        print(f"   Diferença (horas pareadas): {teste['diferenca']:.2f}")
+                    else:
+                        print(f"   Diferença: {rg_var.mean() - cl_var.mean():.2f}")
+                    if teste is not None and pd.notna(teste['p_bootstrap']):
+                        print(f"   🎲 IC {NIVEL_CONFIANCA:.0%} (bootstrap em blocos): "
+                              f"[{teste['ic_inferior']:.2f}, {teste['ic_superior']:.2f}] · "
+                              f"p={teste['p_bootstrap']:.4f} (permutação: {teste['p_permutacao']:.4f})")
+                        if teste['p_bootstrap'] < 1 - NIVEL_CONFIANCA:
+                            print("   ✅ Diferença significativa entre as cidades")
+                        else:
+                            print("   ❌ Diferença não significativa entre as cidades")
+                    # Sem teste (poucas horas em comum): comparação simples entre médias
+                    elif abs(rg_var.mean() - cl_var.mean()) > rg_var.std() * 0.1:
                         print("   ✅ Diferença considerável entre as cidades")
                     else:
                         print("   ❌ Diferença pequena entre as cidades")
-                    
-                    if SCIPY_DISPONIVEL:
-                        print("   📊 Teste estatístico disponível (scipy instalado)")
-                    else:
-                        print("   ⚠️ Teste estatístico não disponível (scipy não instalado)")
     
     def analise_sazonalidade(self):
         """Analisa padrões sazonais"""
@@ -241,25 +278,13 @@ class AnaliseMeteorolgicaRS:
         print("🌿 ANÁLISE DE SAZONALIDADE")
         print("=" * 60)
         
-        # Adicionar informações de estação
-        self.dados_combinados['mes'] = self.dados_combinados['datetime'].dt.month
-        
-        def definir_estacao(mes):
-            if mes in [12, 1, 2]:
-                return 'Verão'
-            elif mes in [3, 4, 5]:
-                return 'Outono'
-            elif mes in [6, 7, 8]:
-                return 'Inverno'
-            else:
-                return 'Primavera'
-        
-        self.dados_combinados['estacao'] = self.dados_combinados['mes'].apply(definir_estacao)
+        # Adicionar informações de estação (códigos da tabela de calendário)
+        self.dados_combinados['estacao'] = nomes_estacao(self.calendario()['estacao'])
         
         # Análise por estação
         for cidade in ['Rio Grande', 'Capão do Leão']:
             print(f"\n🏙️ {cidade}:")
-            dados_cidade = self.dados_combinados[self.dados_combinados['cidade'] == cidade]
+            dados_cidade = self.dados_cidade(cidade)
             
             colunas_analise = []
             if 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)' in dados_cidade.columns:
@@ -301,9 +326,7 @@ class AnaliseMeteorolgicaRS:
             cidades = ['Rio Grande', 'Capão do Leão']
             temps_medias = []
             for cidade in cidades:
-                temp_media = self.dados_combinados[
-                    self.dados_combinados['cidade'] == cidade
-                ]['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].mean()
+                temp_media = self.dados_cidade(cidade)['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].mean()
                 temps_medias.append(temp_media)
             
             axes[0, 0].bar(cidades, temps_medias, color=['blue', 'orange'], alpha=0.7)
@@ -314,9 +337,7 @@ class AnaliseMeteorolgicaRS:
         if 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)' in self.dados_combinados.columns:
             precips_total = []
             for cidade in cidades:
-                precip_total = self.dados_combinados[
-                    self.dados_combinados['cidade'] == cidade
-                ]['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'].sum()
+                precip_total = self.dados_cidade(cidade)['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'].sum()
                 precips_total.append(precip_total)
             
             axes[0, 1].bar(cidades, precips_total, color=['blue', 'orange'], alpha=0.7)
@@ -327,9 +348,7 @@ class AnaliseMeteorolgicaRS:
         if 'UMIDADE RELATIVA DO AR, HORARIA (%)' in self.dados_combinados.columns:
             umids_medias = []
             for cidade in cidades:
-                umid_media = self.dados_combinados[
-                    self.dados_combinados['cidade'] == cidade
-                ]['UMIDADE RELATIVA DO AR, HORARIA (%)'].mean()
+                umid_media = self.dados_cidade(cidade)['UMIDADE RELATIVA DO AR, HORARIA (%)'].mean()
                 umids_medias.append(umid_media)
             
             axes[1, 0].bar(cidades, umids_medias, color=['blue', 'orange'], alpha=0.7)
@@ -340,9 +359,7 @@ class AnaliseMeteorolgicaRS:
         if 'VENTO, VELOCIDADE HORARIA (m/s)' in self.dados_combinados.columns:
             ventos_medios = []
             for cidade in cidades:
-                vento_medio = self.dados_combinados[
-                    self.dados_combinados['cidade'] == cidade
-                ]['VENTO, VELOCIDADE HORARIA (m/s)'].mean()
+                vento_medio = self.dados_cidade(cidade)['VENTO, VELOCIDADE HORARIA (m/s)'].mean()
                 ventos_medios.append(vento_medio)
             
             axes[1, 1].bar(cidades, ventos_medios, color=['blue', 'orange'], alpha=0.7)
@@ -375,7 +392,7 @@ class AnaliseMeteorolgicaRS:
                 'UMIDADE RELATIVA DO AR, HORARIA (%)',
                 'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)',
                 'VENTO, VELOCIDADE HORARIA (m/s)'
-            ]).copy()
+            ]).join(self.calendario()[['hora', 'dia_ano', 'mes']])
             
             # Features
             features = [
@@ -384,10 +401,7 @@ class AnaliseMeteorolgicaRS:
                 'VENTO, VELOCIDADE HORARIA (m/s)'
             ]
             
-            # Adicionar features temporais
-            dados_modelo['hora'] = dados_modelo['datetime'].dt.hour
-            dados_modelo['dia_ano'] = dados_modelo['datetime'].dt.dayofyear
-            dados_modelo['mes'] = dados_modelo['datetime'].dt.month
+            # Adicionar features temporais (já vindas da tabela de calendário)
             features.extend(['hora', 'dia_ano', 'mes'])
             
             # Encoding para cidade
@@ -441,8 +455,8 @@ class AnaliseMeteorolgicaRS:
         print("=" * 60)
         
         # Calcular diferenças médias
-        rg_data = self.dados_combinados[self.dados_combinados['cidade'] == 'Rio Grande']
-        cl_data = self.dados_combinados[self.dados_combinados['cidade'] == 'Capão do Leão']
+        rg_data = self.dados_cidade('Rio Grande')
+        cl_data = self.dados_cidade('Capão do Leão')
         
         # Temperatura
         if 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)' in self.dados_combinados.columns:
@@ -517,7 +531,7 @@ class AnaliseMeteorolgicaRS:
         if MATPLOTLIB_VIZ_DISPONIVEL and self.dados_combinados is not None:
             print("\n🎨 Criando visualizações avançadas (Matplotlib)...")
             try:
-                criar_visualizacoes_completas(self.dados_combinados)
+                criar_visualizacoes_completas(self.dados_combinados, self.indice_estacoes)
             except (ImportError, AttributeError) as e:
                 print(f"⚠️ Erro nas visualizações avançadas: {e}")
         
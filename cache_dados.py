@@ -0,0 +1,133 @@
+"""
+💾 Cache Colunar dos Arquivos INMET
+Guarda em Parquet os DataFrames já processados, evitando reprocessar os CSVs a cada execução
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from fontes_inmet import abrir_binario, estado_arquivo
+
+# Import condicional: sem pyarrow o cache fica desativado
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
+
+CHAVE_METADADOS = b'cache_inmet'
+
+
+class CacheColunar:
+    """Cache em disco (Parquet) de arquivos CSV já processados.
+
+    Cada entrada é identificada pelo caminho do CSV de origem e validada pelo
+    tamanho, data de modificação e hash do conteúdo. Quando só a data de
+    modificação muda (arquivo copiado ou "tocado"), o hash decide se o cache
+    ainda vale.
+    """
+
+    def __init__(self, diretorio='.cache_inmet', versao='1'):
+        self.diretorio = diretorio
+        self.versao = versao
+        self.ativo = PYARROW_DISPONIVEL
+        self.acertos = 0
+        self.falhas = 0
+
+    def _caminho_cache(self, arquivo):
+        """Caminho do arquivo Parquet correspondente a um CSV"""
+        chave = f"{os.path.abspath(arquivo)}|{self.versao}"
+        nome = hashlib.sha1(chave.encode('utf-8')).hexdigest()
+        return os.path.join(self.diretorio, f"{nome}.parquet")
+
+    @staticmethod
+    def hash_conteudo(arquivo, tamanho_bloco=1 << 20):
+        """Hash BLAKE2 do conteúdo do arquivo, lido em blocos"""
+        h = hashlib.blake2b(digest_size=16)
+        with abrir_binario(arquivo) as f:
+            for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+                h.update(bloco)
+        return h.hexdigest()
+
+    def _ler_metadados(self, caminho):
+        metadados = pq.read_schema(caminho).metadata or {}
+        if CHAVE_METADADOS not in metadados:
+            return None
+        return json.loads(metadados[CHAVE_METADADOS])
+
+    def carregar(self, arquivo):
+        """Retorna o DataFrame em cache ou None se não houver entrada válida"""
+        if not self.ativo:
+            return None
+
+        caminho = self._caminho_cache(arquivo)
+        try:
+            meta = self._ler_metadados(caminho)
+            tamanho, mtime_ns = estado_arquivo(arquivo)
+        except (FileNotFoundError, OSError, KeyError, pa.ArrowInvalid):
+            self.falhas += 1
+            return None
+
+        valido = (
+            meta is not None
+            and meta.get('versao') == self.versao
+            and meta.get('tamanho') == tamanho
+        )
+        mtime_mudou = valido and meta.get('mtime_ns') != mtime_ns
+        if mtime_mudou:
+            valido = meta.get('hash') == self.hash_conteudo(arquivo)
+
+        if not valido:
+            self.falhas += 1
+            return None
+
+        # memory_map evita copiar o arquivo para um buffer antes de decodificar
+        tabela = pq.read_table(caminho, memory_map=True)
+        if mtime_mudou:
+            # Conteúdo igual: guardar o mtime novo para não recalcular o hash na próxima carga
+            try:
+                self._gravar(caminho, tabela, {**meta, 'mtime_ns': mtime_ns})
+            except OSError as e:
+                print(f"⚠️ Não foi possível atualizar o cache de {arquivo}: {e}")
+        self.acertos += 1
+        return tabela.to_pandas()
+
+    def salvar(self, arquivo, df):
+        """Grava o DataFrame processado de um CSV no cache"""
+        if not self.ativo or df is None:
+            return
+
+        tamanho, mtime_ns = estado_arquivo(arquivo)
+        meta = {
+            'origem': os.path.abspath(arquivo),
+            'versao': self.versao,
+            'tamanho': tamanho,
+            'mtime_ns': mtime_ns,
+            'hash': self.hash_conteudo(arquivo),
+        }
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._gravar(self._caminho_cache(arquivo), pa.Table.from_pandas(df, preserve_index=False), meta)
+
+    def _gravar(self, caminho, tabela, meta):
+        """Grava a tabela com os metadados de validação no esquema"""
+        metadados = dict(tabela.schema.metadata or {})
+        metadados[CHAVE_METADADOS] = json.dumps(meta).encode('utf-8')
+        tabela = tabela.replace_schema_metadata(metadados)
+
+        # Escrever em arquivo temporário e renomear evita entradas corrompidas
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        pq.write_table(tabela, temporario)
+        os.replace(temporario, caminho)
+
+    def limpar(self):
+        """Remove todas as entradas do cache"""
+        if os.path.isdir(self.diretorio):
+            shutil.rmtree(self.diretorio)
+        self.acertos = 0
+        self.falhas = 0
@@ -0,0 +1,71 @@
+"""
+📅 Tabela de Calendário
+Campos de calendário (hora, dia do ano, mês, estação...) calculados uma vez e alinhados aos dados
+"""
+
+import numpy as np
+import pandas as pd
+
+from agregacao_streaming import ESTACAO_POR_MES
+
+FUSO_LOCAL = 'America/Sao_Paulo'
+
+# Código da estação do ano (int8) -> nome
+NOMES_ESTACAO = np.array(['Verão', 'Outono', 'Inverno', 'Primavera'], dtype=object)
+
+# Mês (1-12) -> código da estação; posição 0 é o código de datetime ausente
+CODIGO_ESTACAO_POR_MES = np.array(
+    [-1] + [list(NOMES_ESTACAO).index(ESTACAO_POR_MES[mes]) for mes in range(1, 13)],
+    dtype='int8'
+)
+
+NS_POR_HORA = 3_600_000_000_000
+NS_POR_DIA = 24 * NS_POR_HORA
+
+
+def construir_calendario(datetimes, index=None):
+    """Tabela de calendário alinhada a uma coluna de datetimes (UTC, como nos CSVs do INMET).
+
+    Colunas: hora (int8), dia_ano (int16), mes (int8), ano (int16), estacao
+    (int8, ver NOMES_ESTACAO), dia (int32, dias desde 1970-01-01),
+    hora_local (int8) e datetime_local (America/Sao_Paulo). Tudo é calculado
+    com aritmética inteira sobre os nanossegundos, sem os acessores .dt nem
+    apply por linha; linhas sem datetime recebem -1 nos campos inteiros.
+    """
+    datetimes = pd.Series(datetimes)
+    if index is None:
+        index = datetimes.index
+    valores = datetimes.to_numpy(dtype='datetime64[ns]')
+    ausentes = np.isnat(valores)
+
+    ns = valores.astype('int64')
+    dias = np.floor_divide(ns, NS_POR_DIA)
+    anos = valores.astype('datetime64[Y]')
+    mes = (valores.astype('datetime64[M]').astype('int64') % 12 + 1).astype('int8')
+    locais = pd.DatetimeIndex(valores).tz_localize('UTC').tz_convert(FUSO_LOCAL)
+    # Horário de parede local, ainda como inteiros
+    ns_locais = locais.tz_localize(None).to_numpy(dtype='datetime64[ns]').astype('int64')
+
+    calendario = {
+        'hora': (np.floor_divide(ns, NS_POR_HORA) % 24).astype('int8'),
+        'dia_ano': (dias - anos.astype('datetime64[D]').astype('int64') + 1).astype('int16'),
+        'mes': mes,
+        'ano': (anos.astype('int64') + 1970).astype('int16'),
+        'estacao': CODIGO_ESTACAO_POR_MES[mes],
+        'dia': dias.astype('int32'),
+        'hora_local': (np.floor_divide(ns_locais, NS_POR_HORA) % 24).astype('int8'),
+    }
+    if ausentes.any():
+        for coluna in calendario.values():
+            coluna[ausentes] = -1
+    calendario['datetime_local'] = locais
+
+    return pd.DataFrame(calendario, index=index)
+
+
+def nomes_estacao(codigos):
+    """Códigos de estação (int8) -> nomes ('Verão', 'Outono', ...); -1 vira None"""
+    codigos = np.asarray(codigos)
+    nomes = NOMES_ESTACAO[np.clip(codigos, 0, None)]
+    nomes[codigos < 0] = None
+    return nomes
@@ -0,0 +1,285 @@
+"""
+🗂️ Catálogo de Estações INMET
+Indexa os arquivos CSV pelos metadados do cabeçalho (estação, UF, coordenadas, período)
+"""
+
+import glob
+import json
+import os
+import re
+from datetime import datetime
+
+import pandas as pd
+
+from fontes_inmet import abrir_texto, caminho_membro, eh_membro_zip, listar_membros_zip
+
+# Linhas de metadados no início de cada CSV do INMET (as mesmas puladas com skiprows=8)
+LINHAS_METADADOS = 8
+
+# Nomes de exibição das estações já usadas nas análises
+NOMES_CIDADES = {
+    'A802': 'Rio Grande',
+    'A887': 'Capão do Leão',
+}
+
+# Chaves do cabeçalho INMET -> nomes usados no catálogo
+CHAVES_CABECALHO = {
+    'REGIAO': 'regiao',
+    'REGIÃO': 'regiao',
+    'UF': 'uf',
+    'ESTACAO': 'estacao',
+    'ESTAÇÃO': 'estacao',
+    'CODIGO (WMO)': 'codigo',
+    'LATITUDE': 'latitude',
+    'LONGITUDE': 'longitude',
+    'ALTITUDE': 'altitude',
+    'DATA DE FUNDACAO': 'data_fundacao',
+}
+
+# Ex.: INMET_S_RS_A802_RIO GRANDE_01-01-2023_A_31-12-2023.CSV
+PADRAO_NOME = re.compile(
+    r'^INMET_(?P<regiao>[A-Z]+)_(?P<uf>[A-Z]{2})_(?P<codigo>[A-Z]\d{3})_(?P<estacao>.+?)_'
+    r'\d{2}-\d{2}-\d{4}_A_\d{2}-\d{2}-\d{4}\.CSV$', re.IGNORECASE
+)
+PADRAO_PERIODO = re.compile(r'_(\d{2}-\d{2}-\d{4})_A_(\d{2}-\d{2}-\d{4})\.CSV$', re.IGNORECASE)
+
+
+def ler_cabecalho_inmet(arquivo):
+    """Lê apenas as linhas de metadados de um CSV do INMET"""
+    metadados = {}
+    with abrir_texto(arquivo) as f:
+        for _ in range(LINHAS_METADADOS):
+            linha = f.readline()
+            if not linha:
+                break
+            chave, _, valor = linha.strip().partition(';')
+            chave = chave.rstrip(':').strip().upper()
+            # Arquivos antigos usam "DATA DE FUNDACAO (YYYY-MM-DD)"
+            chave = re.sub(r'\s*\(YYYY-MM-DD\)$', '', chave)
+            if chave in CHAVES_CABECALHO:
+                metadados[CHAVES_CABECALHO[chave]] = valor.strip().rstrip(';')
+
+    for campo in ('latitude', 'longitude', 'altitude'):
+        if campo in metadados:
+            try:
+                metadados[campo] = float(metadados[campo].replace(',', '.'))
+            except ValueError:
+                metadados[campo] = None
+    return metadados
+
+
+def periodo_do_nome(arquivo):
+    """Extrai (inicio, fim) em ISO do nome do arquivo, ou (None, None)"""
+    encontrado = PADRAO_PERIODO.search(os.path.basename(arquivo))
+    if not encontrado:
+        return None, None
+    inicio, fim = (datetime.strptime(d, '%d-%m-%Y').date().isoformat() for d in encontrado.groups())
+    return inicio, fim
+
+
+def primeira_data(arquivo):
+    """Data ISO da primeira linha de dados (para arquivos sem período no nome)"""
+    with abrir_texto(arquivo) as f:
+        for _ in range(LINHAS_METADADOS + 1):
+            f.readline()
+        campo = f.readline().split(';', 1)[0].strip()
+    for formato in ('%Y/%m/%d', '%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(campo, formato).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def metadados_do_nome(arquivo):
+    """Região, UF, código e estação a partir do nome do arquivo (sem abri-lo)"""
+    encontrado = PADRAO_NOME.match(os.path.basename(arquivo))
+    if not encontrado:
+        return None
+    return {chave: valor.upper() for chave, valor in encontrado.groupdict().items()}
+
+
+def nome_cidade(codigo, estacao):
+    """Nome de exibição de uma estação"""
+    if codigo in NOMES_CIDADES:
+        return NOMES_CIDADES[codigo]
+    return (estacao or codigo or '').title()
+
+
+class CatalogoEstacoes:
+    """Índice persistente estação -> arquivos -> período coberto.
+
+    Cada arquivo é lido uma única vez (só as linhas de metadados); nas
+    atualizações seguintes apenas arquivos novos ou modificados são relidos.
+    """
+
+    def __init__(self, caminho='catalogo_estacoes.json'):
+        self.caminho = caminho
+        self.arquivos = {}
+        self.zips = {}
+        self.carregar()
+
+    def carregar(self):
+        """Carrega o catálogo salvo em disco, se existir"""
+        if os.path.exists(self.caminho):
+            try:
+                with open(self.caminho, 'r', encoding='utf-8') as f:
+                    conteudo = json.load(f)
+                self.arquivos = conteudo.get('arquivos', {})
+                self.zips = conteudo.get('zips', {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Catálogo inválido em {self.caminho}, recriando: {e}")
+                self.arquivos = {}
+                self.zips = {}
+
+    def salvar(self):
+        """Grava o catálogo em disco"""
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'arquivos': self.arquivos, 'zips': self.zips}, f, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.caminho)
+
+    def atualizar(self, diretorio='.', padrao='**/INMET_*.CSV', padrao_zip='**/*.[zZ][iI][pP]'):
+        """Indexa os CSVs e ZIPs anuais encontrados em `diretorio`, relendo só os novos/modificados"""
+        encontrados = set()
+        novos = 0
+
+        for arquivo in glob.glob(os.path.join(diretorio, padrao_zip), recursive=True):
+            caminho_zip = os.path.normpath(arquivo)
+            membros, adicionados = self._indexar_zip(caminho_zip)
+            encontrados.update(membros)
+            encontrados.add(caminho_zip)
+            novos += adicionados
+
+        for arquivo in glob.glob(os.path.join(diretorio, padrao), recursive=True):
+            caminho = os.path.normpath(arquivo)
+            encontrados.add(caminho)
+            estado = os.stat(caminho)
+            registro = self.arquivos.get(caminho)
+            if (registro is not None and registro['tamanho'] == estado.st_size
+                    and registro['mtime_ns'] == estado.st_mtime_ns):
+                continue
+
+            try:
+                metadados = ler_cabecalho_inmet(caminho)
+                inicio, fim = periodo_do_nome(caminho)
+                if inicio is None:
+                    inicio = primeira_data(caminho)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"⚠️ Não foi possível ler o cabeçalho de {caminho}: {e}")
+                continue
+
+            metadados.update({
+                'inicio': inicio,
+                'fim': fim,
+                'tamanho': estado.st_size,
+                'mtime_ns': estado.st_mtime_ns,
+            })
+            self.arquivos[caminho] = metadados
+            novos += 1
+
+        # Remover do índice os arquivos que não existem mais no diretório varrido
+        raiz = os.path.normpath(diretorio)
+        removidos = 0
+        for indice in (self.arquivos, self.zips):
+            for caminho in list(indice):
+                dentro = raiz == '.' or caminho.startswith(raiz + os.sep)
+                if dentro and caminho not in encontrados:
+                    del indice[caminho]
+                    removidos += 1
+
+        if novos or removidos:
+            self.salvar()
+        return novos
+
+    def _indexar_zip(self, caminho_zip):
+        """Indexa os membros de um ZIP anual pelo nome, sem descomprimir nenhum deles.
+
+        Retorna (membros do ZIP no índice, quantidade de membros indexados agora).
+        """
+        estado = os.stat(caminho_zip)
+        registro = self.zips.get(caminho_zip)
+        if (registro is not None and registro['tamanho'] == estado.st_size
+                and registro['mtime_ns'] == estado.st_mtime_ns):
+            return registro['membros'], 0
+
+        membros = []
+        for membro in listar_membros_zip(caminho_zip):
+            metadados = metadados_do_nome(membro)
+            if metadados is None:
+                continue
+            inicio, fim = periodo_do_nome(membro)
+            caminho = caminho_membro(caminho_zip, membro)
+            metadados.update({
+                'inicio': inicio,
+                'fim': fim,
+                'tamanho': estado.st_size,
+                'mtime_ns': estado.st_mtime_ns,
+            })
+            self.arquivos[caminho] = metadados
+            membros.append(caminho)
+
+        self.zips[caminho_zip] = {
+            'tamanho': estado.st_size,
+            'mtime_ns': estado.st_mtime_ns,
+            'membros': membros,
+        }
+        return membros, len(membros)
+
+    def estacoes(self):
+        """Tabela de estações com coordenadas e período total coberto"""
+        if not self.arquivos:
+            return pd.DataFrame(columns=['codigo', 'estacao', 'cidade', 'uf', 'regiao', 'latitude',
+                                         'longitude', 'altitude', 'inicio', 'fim', 'n_arquivos'])
+
+        tabela = pd.DataFrame(list(self.arquivos.values()))
+        # Membros de ZIP são indexados só pelo nome, sem coordenadas
+        for campo in ('latitude', 'longitude', 'altitude'):
+            if campo not in tabela.columns:
+                tabela[campo] = None
+        tabela['cidade'] = [nome_cidade(c, e) for c, e in zip(tabela['codigo'], tabela['estacao'])]
+        resumo = tabela.groupby('codigo').agg(
+            estacao=('estacao', 'first'),
+            cidade=('cidade', 'first'),
+            uf=('uf', 'first'),
+            regiao=('regiao', 'first'),
+            latitude=('latitude', 'first'),
+            longitude=('longitude', 'first'),
+            altitude=('altitude', 'first'),
+            inicio=('inicio', 'min'),
+            fim=('fim', 'max'),
+            n_arquivos=('estacao', 'size'),
+        ).reset_index()
+        return resumo
+
+    def selecionar(self, estacoes=None, anos=None):
+        """Lista de (cidade, ano, arquivo) para as estações e anos pedidos, em ordem estável.
+
+        `estacoes` aceita códigos WMO ('A802') ou nomes de exibição ('Rio Grande').
+        Um arquivo por estação e ano: quando há um parcial e o do ano completo,
+        fica o que vai até mais tarde (`fim`), para que as horas em comum não
+        entrem duas vezes.
+        """
+        anos = {int(ano) for ano in anos} if anos is not None else None
+        estacoes = set(estacoes) if estacoes is not None else None
+
+        escolhidos = {}
+        for caminho, registro in self.arquivos.items():
+            codigo = registro.get('codigo')
+            cidade = nome_cidade(codigo, registro.get('estacao'))
+            if estacoes is not None and codigo not in estacoes and cidade not in estacoes:
+                continue
+            if registro.get('inicio') is None:
+                continue
+            ano = int(registro['inicio'][:4])
+            if anos is not None and ano not in anos:
+                continue
+            # Maior fim primeiro; no empate, CSV solto antes do mesmo arquivo dentro de um ZIP
+            prioridade = (registro.get('fim') or '', not eh_membro_zip(caminho), caminho)
+            chave = (codigo or cidade, ano)
+            if chave not in escolhidos or prioridade > escolhidos[chave][0]:
+                escolhidos[chave] = (prioridade, (ano, codigo, caminho, cidade))
+
+        selecionados = [selecionado for _, selecionado in escolhidos.values()]
+        selecionados.sort()
+        return [(cidade, ano, caminho) for ano, _, caminho, cidade in selecionados]
@@ -0,0 +1,266 @@
+"""
+🌡️ Climatologia e Anomalias
+Normais por estação, dia do ano e hora (média e desvio padrão suavizados) e anomalias em relação a elas
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from agregacao_streaming import variaveis_medidas
+from calendario import construir_calendario
+from cubo_agregados import CuboAgregados, assinatura_dados, gravar_tabela, ler_tabela
+
+DIAS_ANO = 366
+HORAS_DIA = 24
+
+# Muda quando o cálculo ou o formato das normais gravadas muda
+VERSAO_CLIMATOLOGIA = '1'
+
+
+def suavizar_circular(valores, meia_janela, eixo=1):
+    """Soma móvel centrada de 2·meia_janela + 1 posições ao longo de um eixo circular (dia do ano)"""
+    if meia_janela <= 0:
+        return valores
+    valores = np.moveaxis(valores, eixo, 0)
+    estendido = np.concatenate([valores[-meia_janela:], valores, valores[:meia_janela]])
+    acumulado = np.concatenate([np.zeros_like(valores[:1]), np.cumsum(estendido, axis=0)])
+    largura = 2 * meia_janela + 1
+    suavizado = acumulado[largura:] - acumulado[:-largura]
+    return np.moveaxis(suavizado, 0, eixo)
+
+
+def _normais(codigos, celulas, valores, n_grupos, tamanho, meia_janela):
+    """n, média e desvio padrão suavizados por (grupo, dia do ano, ...) de cada variável.
+
+    `celulas` é a posição de cada linha dentro do grupo (dia do ano e, se for o
+    caso, hora), com `tamanho` posições por grupo. Cada célula tem n, média e
+    M2 calculados com np.bincount (em duas passadas, sem soma de quadrados);
+    a suavização combina as células dos dias vizinhos pela fórmula de Chan,
+    então dias com poucas amostras não distorcem as normais.
+    """
+    chaves = codigos * tamanho + celulas
+    formato = (n_grupos, DIAS_ANO, tamanho // DIAS_ANO)
+    n_total = n_grupos * tamanho
+    media = np.full(formato + (valores.shape[1],), np.nan)
+    desvio = np.full_like(media, np.nan)
+    contagem = np.zeros_like(media)
+
+    for i in range(valores.shape[1]):
+        coluna = valores[:, i]
+        validos = ~np.isnan(coluna)
+        if not validos.any():
+            continue
+        x, k = coluna[validos], chaves[validos]
+
+        n = np.bincount(k, minlength=n_total).astype('float64')
+        soma = np.bincount(k, x, minlength=n_total)
+        media_celula = np.divide(soma, n, out=np.zeros_like(soma), where=n > 0)
+        m2 = np.bincount(k, (x - media_celula[k]) ** 2, minlength=n_total)
+        n, soma, media_celula, m2 = (v.reshape(formato) for v in (n, soma, media_celula, m2))
+
+        n_janela = suavizar_circular(n, meia_janela)
+        media_janela = np.divide(suavizar_circular(soma, meia_janela), n_janela,
+                                 out=np.zeros_like(soma), where=n_janela > 0)
+        # M2 da janela = Σ M2 das células + Σ n·(média da célula - média da janela)²
+        m2_janela = suavizar_circular(m2, meia_janela)
+        for deslocamento in range(-meia_janela, meia_janela + 1):
+            n_vizinho = np.roll(n, deslocamento, axis=1)
+            media_vizinho = np.roll(media_celula, deslocamento, axis=1)
+            m2_janela = m2_janela + n_vizinho * (media_vizinho - media_janela) ** 2
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media[..., i] = np.where(n_janela > 0, media_janela, np.nan)
+            desvio[..., i] = np.sqrt(np.where(n_janela > 1, m2_janela / (n_janela - 1), np.nan))
+        contagem[..., i] = n_janela
+
+    return contagem, media, desvio
+
+
+class Climatologia:
+    """Normais climatológicas por estação: dia do ano × hora e dia do ano (médias diárias).
+
+    Para cada variável guarda média e desvio padrão, suavizados com uma janela
+    circular de ±`meia_janela` dias. As normais são calculadas uma vez (com
+    `diretorio`, gravadas em Parquet e reaproveitadas enquanto os dados não
+    mudarem) e as anomalias são uma consulta vetorial por posição em arrays
+    (estação, dia do ano, hora, variável), sem merge com os dados.
+    """
+
+    def __init__(self, df, variaveis=None, coluna='cidade', calendario=None,
+                 meia_janela=15, diretorio=None, cubo=None):
+        self.dados = df
+        self.coluna = coluna
+        if variaveis is None:
+            variaveis = variaveis_medidas(df)
+        self.variaveis = [var for var in variaveis if var in df.columns]
+        self.meia_janela = meia_janela
+        self.diretorio = diretorio
+        self._calendario = calendario
+        # Médias diárias saem do cubo de agregados (resolução 'dia')
+        self._cubo = cubo
+        self.cidades = list(pd.unique(df[coluna].dropna()))
+        self.tabelas = {}
+        # resolução -> (média, desvio) em arrays (estação, dia do ano, [hora,] variável)
+        self._arrays = {}
+        self._assinatura = None
+
+    @property
+    def calendario(self):
+        if self._calendario is None:
+            self._calendario = construir_calendario(self.dados['datetime'])
+        return self._calendario
+
+    @property
+    def cubo(self):
+        if self._cubo is None or self._cubo.dados is not self.dados:
+            self._cubo = CuboAgregados(self.dados, self.variaveis, self.coluna, calendario=self.calendario)
+        return self._cubo
+
+    def assinatura(self):
+        if self._assinatura is None:
+            base = assinatura_dados(self.dados, self.variaveis, self.coluna)
+            chave = f"{base}|{VERSAO_CLIMATOLOGIA}|{self.meia_janela}|{self.cidades}"
+            self._assinatura = hashlib.sha1(chave.encode('utf-8')).hexdigest()
+        return self._assinatura
+
+    def normais(self, resolucao='hora'):
+        """Normais por (cidade, dia_ano, hora) ou, com resolucao='dia', por (cidade, dia_ano).
+
+        Colunas: (variável, 'n' | 'media' | 'desvio_padrao').
+        """
+        if resolucao not in self.tabelas:
+            caminho = (os.path.join(self.diretorio, f"climatologia_{resolucao}.parquet")
+                       if self.diretorio is not None else None)
+            tabela = ler_tabela(caminho, self.assinatura())
+            if tabela is None:
+                tabela = self._calcular(resolucao)
+                gravar_tabela(caminho, tabela, self.assinatura())
+            self.tabelas[resolucao] = tabela
+        return self.tabelas[resolucao]
+
+    def _calcular(self, resolucao):
+        if resolucao == 'hora':
+            codigos = pd.Categorical(self.dados[self.coluna], categories=self.cidades).codes
+            calendario = self.calendario
+            validos = (codigos >= 0) & (calendario['dia_ano'].to_numpy() > 0)
+            celulas = ((calendario['dia_ano'].to_numpy(dtype='int64') - 1) * HORAS_DIA
+                       + calendario['hora'].to_numpy(dtype='int64'))
+            valores = self.dados[self.variaveis].to_numpy(dtype='float64', na_value=np.nan)
+            tamanho = DIAS_ANO * HORAS_DIA
+            nomes = [self.coluna, 'dia_ano', 'hora']
+            niveis = [self.cidades, np.arange(1, DIAS_ANO + 1), np.arange(HORAS_DIA)]
+        elif resolucao == 'dia':
+            # Médias diárias de cada estação, depois normais por dia do ano
+            diario = self.cubo.tabela('dia')
+            diario = diario[diario.index.get_level_values(0).isin(self.cidades)]
+            codigos = pd.Categorical(diario.index.get_level_values(0), categories=self.cidades).codes
+            dias = diario.index.get_level_values(1)
+            validos = codigos >= 0
+            celulas = dias.dayofyear.to_numpy(dtype='int64') - 1
+            valores = np.column_stack([
+                diario[(var, 'media')].to_numpy(dtype='float64', na_value=np.nan) for var in self.variaveis
+            ]) if self.variaveis else np.empty((len(diario), 0))
+            tamanho = DIAS_ANO
+            nomes = [self.coluna, 'dia_ano']
+            niveis = [self.cidades, np.arange(1, DIAS_ANO + 1)]
+        else:
+            raise ValueError(f"Resolução desconhecida: {resolucao}")
+
+        contagem, media, desvio = _normais(
+            np.asarray(codigos, dtype='int64')[validos], celulas[validos], valores[validos],
+            len(self.cidades), tamanho, self.meia_janela
+        )
+        indice = pd.MultiIndex.from_product(niveis, names=nomes)
+        partes = {}
+        for i, var in enumerate(self.variaveis):
+            partes[(var, 'n')] = contagem[..., i].ravel()
+            partes[(var, 'media')] = media[..., i].ravel()
+            partes[(var, 'desvio_padrao')] = desvio[..., i].ravel()
+        return pd.DataFrame(partes, index=indice)
+
+    def _arrays_normais(self, resolucao):
+        """(média, desvio) como arrays (estação, dia do ano, [hora,] variável) para consulta por posição"""
+        if resolucao not in self._arrays:
+            tabela = self.normais(resolucao)
+            formato = (len(self.cidades), DIAS_ANO) + ((HORAS_DIA,) if resolucao == 'hora' else ())
+            self._arrays[resolucao] = tuple(
+                np.stack([tabela[(var, estatistica)].to_numpy() for var in self.variaveis], axis=-1)
+                .reshape(formato + (len(self.variaveis),))
+                for estatistica in ('media', 'desvio_padrao')
+            )
+        return self._arrays[resolucao]
+
+    def _variaveis_presentes(self, df, variaveis):
+        variaveis = self.variaveis if variaveis is None else variaveis
+        return [var for var in variaveis if var in df.columns and var in self.variaveis]
+
+    def _anomalias(self, valores, indices, resolucao, variaveis, padronizar):
+        media, desvio = self._arrays_normais(resolucao)
+        colunas = [self.variaveis.index(var) for var in variaveis]
+        validos = indices[0] >= 0
+        for posicoes in indices[1:]:
+            validos &= posicoes >= 0
+        posicoes = tuple(np.where(validos, p, 0) for p in indices)
+
+        normal = media[posicoes][:, colunas]
+        anomalia = valores - normal
+        if padronizar:
+            escala = desvio[posicoes][:, colunas]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                anomalia = np.where(escala > 0, anomalia / escala, np.nan)
+        anomalia[~validos] = np.nan
+        return anomalia
+
+    def anomalias(self, df, variaveis=None, padronizar=False, calendario=None):
+        """Anomalias horárias (valor - normal da estação, dia do ano e hora) das linhas de df.
+
+        Com `padronizar`, divide pelo desvio padrão (z-score). `calendario` é a
+        tabela de calendário alinhada a df; se omitida, é construída.
+        """
+        variaveis = self._variaveis_presentes(df, variaveis)
+        if calendario is None:
+            calendario = construir_calendario(df['datetime'], index=df.index)
+        indices = (
+            pd.Categorical(df[self.coluna], categories=self.cidades).codes.astype('int64'),
+            calendario['dia_ano'].to_numpy(dtype='int64') - 1,
+            calendario['hora'].to_numpy(dtype='int64'),
+        )
+        valores = df[variaveis].to_numpy(dtype='float64', na_value=np.nan)
+        anomalia = self._anomalias(valores, indices, 'hora', variaveis, padronizar)
+        return pd.DataFrame(anomalia, index=df.index, columns=variaveis)
+
+    def anomalias_cubo(self, cubo, variaveis=None, padronizar=False):
+        """Anomalias horárias de um cubo_denso.CuboDenso: array (estações, horas, variáveis) na ordem do cubo.
+
+        As variáveis são as pedidas (padrão: as do cubo) que também têm normais;
+        estações sem normais ficam NaN.
+        """
+        variaveis = [var for var in (cubo.variaveis if variaveis is None else variaveis)
+                     if var in cubo.variaveis and var in self.variaveis]
+        calendario = construir_calendario(cubo.datas())
+        n_estacoes, n_horas = len(cubo.cidades), len(calendario)
+        estacoes = pd.Categorical(cubo.cidades, categories=self.cidades).codes.astype('int64')
+        indices = (
+            np.repeat(estacoes, n_horas),
+            np.tile(calendario['dia_ano'].to_numpy(dtype='int64') - 1, n_estacoes),
+            np.tile(calendario['hora'].to_numpy(dtype='int64'), n_estacoes),
+        )
+        colunas = [cubo.variaveis.index(var) for var in variaveis]
+        valores = np.asarray(cubo.valores[:, :, colunas], dtype='float64').reshape(-1, len(colunas))
+        anomalia = self._anomalias(valores, indices, 'hora', variaveis, padronizar)
+        return anomalia.reshape(n_estacoes, n_horas, len(variaveis))
+
+    def anomalias_diarias(self, diario, variaveis=None, padronizar=False):
+        """Anomalias de médias diárias (índice (cidade, dia), colunas = variáveis) em relação às normais diárias"""
+        variaveis = self._variaveis_presentes(diario, variaveis)
+        dias = pd.DatetimeIndex(diario.index.get_level_values(1))
+        indices = (
+            pd.Categorical(diario.index.get_level_values(0), categories=self.cidades).codes.astype('int64'),
+            dias.dayofyear.to_numpy(dtype='int64', na_value=0) - 1,
+        )
+        valores = diario[variaveis].to_numpy(dtype='float64', na_value=np.nan)
+        anomalia = self._anomalias(valores, indices, 'dia', variaveis, padronizar)
+        return pd.DataFrame(anomalia, index=diario.index, columns=variaveis)
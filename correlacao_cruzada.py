@@ -0,0 +1,157 @@
+"""
+⏱️ Correlação Cruzada entre Estações
+Correlação defasada de cada variável entre todos os pares de estações, calculada por FFT
+sobre o cubo horário, e a defasagem (em horas) de maior correlação
+"""
+
+import numpy as np
+import pandas as pd
+
+# Defasagens de -MAX_DEFASAGEM a +MAX_DEFASAGEM horas
+MAX_DEFASAGEM = 72
+
+# Defasagens com menos pares de horas medidas que isso ficam sem correlação
+MIN_PARES = 48
+
+# Picos com |r| abaixo disso, ou que não superam a correlação sem defasagem por
+# pelo menos GANHO_MINIMO, não indicam uma defasagem real
+CORRELACAO_MINIMA = 0.1
+GANHO_MINIMO = 0.05
+
+HORAS_DIA = 24
+
+COLUNAS_DEFASAGENS = ['defasagem', 'correlacao', 'correlacao_sem_defasagem', 'n']
+
+
+def _tamanho_fft(n):
+    """Menor potência de 2 >= n"""
+    return 1 << max(int(n) - 1, 0).bit_length()
+
+
+def remover_ciclo_diario(valores, inicio):
+    """Subtrai de cada estação a média da sua hora do dia (valores: estações × horas, NaN = ausente)"""
+    hora_dia = (inicio + np.arange(valores.shape[1])) % HORAS_DIA
+    resultado = np.array(valores, dtype='float64')
+    for serie in resultado:
+        medidos = ~np.isnan(serie)
+        n = np.bincount(hora_dia[medidos], minlength=HORAS_DIA)
+        soma = np.bincount(hora_dia[medidos], serie[medidos], minlength=HORAS_DIA)
+        media = np.divide(soma, n, out=np.zeros(HORAS_DIA), where=n > 0)
+        serie -= media[hora_dia]
+    return resultado
+
+
+def defasagem_clara(defasagem, correlacao, correlacao_sem_defasagem,
+                    correlacao_minima=CORRELACAO_MINIMA, ganho_minimo=GANHO_MINIMO):
+    """Se o pico da correlação cruzada indica uma defasagem de fato (ou a simultaneidade, com defasagem 0)"""
+    if pd.isna(defasagem) or abs(correlacao) < correlacao_minima:
+        return False
+    return defasagem == 0 or correlacao - correlacao_sem_defasagem >= ganho_minimo
+
+
+def _series_variavel(cubo, variavel, sem_ciclo_diario, climatologia):
+    """Séries (estações × horas) de uma variável: anomalias, se houver normais dela, e sem o ciclo diário"""
+    valores = cubo.variavel(variavel)
+    if climatologia is not None and variavel in climatologia.variaveis:
+        valores = climatologia.anomalias_cubo(cubo, [variavel])[..., 0]
+    if sem_ciclo_diario:
+        valores = remover_ciclo_diario(valores, cubo.inicio)
+    return valores
+
+
+def correlacao_cruzada(valores, max_defasagem=MAX_DEFASAGEM, min_pares=MIN_PARES):
+    """Correlação de Pearson defasada entre todas as linhas de `valores` (estações × horas).
+
+    Retorna (correlacao, n), ambos (estações, estações, 2·max_defasagem + 1):
+    correlacao[a, b, max_defasagem + k] correlaciona a na hora t com b na
+    hora t + k, usando só os pares de horas em que as duas mediram (NaN =
+    ausente). Cada soma necessária (n, Σa, Σb, Σa², Σb², Σab para todas as
+    defasagens) é uma correlação cruzada de séries com zeros nas lacunas,
+    obtida por FFT: O(N log N) por par em vez de O(defasagens × N) com shift.
+    """
+    valores = np.asarray(valores, dtype='float64')
+    n_estacoes, n_horas = valores.shape
+    medidos = ~np.isnan(valores)
+    # Centrar cada estação reduz o cancelamento numérico nas somas
+    centro = np.where(medidos, valores, 0.0).sum(axis=1) / np.maximum(medidos.sum(axis=1), 1)
+    x = np.where(medidos, valores - centro[:, None], 0.0)
+    m = medidos.astype('float64')
+
+    # Sem sobreposição circular até max_defasagem
+    tamanho = _tamanho_fft(n_horas + max_defasagem + 1)
+    espectro_x = np.fft.rfft(x, tamanho, axis=1)
+    espectro_xx = np.fft.rfft(x * x, tamanho, axis=1)
+    espectro_m = np.fft.rfft(m, tamanho, axis=1)
+    posicoes = np.r_[tamanho - max_defasagem:tamanho, 0:max_defasagem + 1]
+
+    def cruzada(a, espectros_b):
+        # Σ_t f_a[t]·g_b[t + k] para todas as estações b, nas defasagens de interesse
+        return np.fft.irfft(np.conj(a)[None, :] * espectros_b, tamanho, axis=1)[:, posicoes]
+
+    n_defasagens = 2 * max_defasagem + 1
+    correlacao = np.full((n_estacoes, n_estacoes, n_defasagens), np.nan)
+    contagem = np.zeros((n_estacoes, n_estacoes, n_defasagens))
+    for a in range(n_estacoes):
+        n = np.rint(cruzada(espectro_m[a], espectro_m))
+        soma_a = cruzada(espectro_x[a], espectro_m)
+        soma_b = cruzada(espectro_m[a], espectro_x)
+        soma_aa = cruzada(espectro_xx[a], espectro_m)
+        soma_bb = cruzada(espectro_m[a], espectro_xx)
+        soma_ab = cruzada(espectro_x[a], espectro_x)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = n * soma_ab - soma_a * soma_b
+            var_a = n * soma_aa - soma_a ** 2
+            var_b = n * soma_bb - soma_b ** 2
+            r = cov / np.sqrt(var_a * var_b)
+        validos = (n >= max(min_pares, 2)) & (var_a > 0) & (var_b > 0)
+        correlacao[a] = np.where(validos, np.clip(r, -1.0, 1.0), np.nan)
+        contagem[a] = n
+    return correlacao, contagem
+
+
+def defasagens_estacoes(cubo, variaveis=None, max_defasagem=MAX_DEFASAGEM, sem_ciclo_diario=False,
+                        min_pares=MIN_PARES, climatologia=None):
+    """Defasagem de maior correlação de cada variável entre cada par de estações do cubo.
+
+    `cubo` é um cubo_denso.CuboDenso (grade horária, lacunas curtas já
+    interpoladas conforme max_lacuna). Índice: (variavel, cidade_a,
+    cidade_b) com a antes de b na ordem do cubo. defasagem > 0 significa que
+    b acompanha a com esse atraso em horas (a na hora t se parece mais com b
+    na hora t + defasagem). Com `sem_ciclo_diario`, a média de cada hora do dia
+    é removida antes, para que o ciclo diário comum não domine o pico. Com
+    `climatologia` (climatologia.Climatologia), as séries são as anomalias em
+    relação às normais por dia do ano e hora, sem o ciclo sazonal comum.
+    Use defasagem_clara para decidir se o pico vale ser relatado.
+    """
+    variaveis = cubo.variaveis if variaveis is None else [var for var in variaveis if var in cubo.variaveis]
+    defasagens = np.arange(-max_defasagem, max_defasagem + 1)
+    cidades = cubo.cidades
+
+    linhas, chaves = [], []
+    for variavel in variaveis:
+        valores = _series_variavel(cubo, variavel, sem_ciclo_diario, climatologia)
+        correlacao, contagem = correlacao_cruzada(valores, max_defasagem, min_pares)
+        for a in range(len(cidades)):
+            for b in range(a + 1, len(cidades)):
+                r = correlacao[a, b]
+                if np.isnan(r).all():
+                    linhas.append([np.nan, np.nan, r[max_defasagem], contagem[a, b, max_defasagem]])
+                else:
+                    pico = int(np.nanargmax(r))
+                    linhas.append([defasagens[pico], r[pico], r[max_defasagem], contagem[a, b, pico]])
+                chaves.append((variavel, cidades[a], cidades[b]))
+
+    nomes = ['variavel', 'cidade_a', 'cidade_b']
+    indice = (pd.MultiIndex.from_tuples(chaves, names=nomes) if chaves
+              else pd.MultiIndex.from_arrays([[], [], []], names=nomes))
+    return pd.DataFrame(linhas, index=indice, columns=COLUNAS_DEFASAGENS)
+
+
+def funcao_correlacao_cruzada(cubo, variavel, a, b, max_defasagem=MAX_DEFASAGEM, sem_ciclo_diario=False,
+                              min_pares=MIN_PARES, climatologia=None):
+    """Correlação de a (hora t) com b (hora t + defasagem) para cada defasagem, como Series"""
+    indices = [cubo.cidades.index(a), cubo.cidades.index(b)]
+    valores = _series_variavel(cubo, variavel, sem_ciclo_diario, climatologia)[indices]
+    correlacao, _ = correlacao_cruzada(valores, max_defasagem, min_pares)
+    return pd.Series(correlacao[0, 1], index=pd.Index(np.arange(-max_defasagem, max_defasagem + 1),
+                                                      name='defasagem'), name=variavel)
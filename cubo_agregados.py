@@ -0,0 +1,212 @@
+"""
+🧊 Cubo de Agregados
+Estatísticas por cidade e hora do dia, dia, mês ou estação do ano, calculadas uma vez por carga
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from agregacao_streaming import variaveis_medidas
+from calendario import construir_calendario, nomes_estacao
+
+# Import condicional: sem pyarrow o cubo fica só em memória
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
+
+RESOLUCOES = ('hora', 'dia', 'mes', 'estacao')
+
+# Agregação do pandas -> nome da estatística no cubo
+ESTATISTICAS = {
+    'count': 'n',
+    'sum': 'soma',
+    'mean': 'media',
+    'min': 'minimo',
+    'max': 'maximo',
+}
+
+# Muda quando o formato das tabelas gravadas muda
+VERSAO_CUBO = '3'
+
+# Chave da assinatura nos metadados do esquema Parquet (df.attrs só vai ao Parquet no pandas >= 2.1)
+CHAVE_ASSINATURA = b'assinatura_cubo'
+
+
+def chaves_periodo(calendario, resolucao):
+    """Chave inteira de agrupamento de cada linha, lida da tabela de calendário"""
+    if resolucao == 'hora':
+        return calendario['hora'].to_numpy()
+    if resolucao == 'dia':
+        return calendario['dia'].to_numpy()
+    if resolucao == 'mes':
+        # Meses desde 1970-01
+        return (calendario['ano'].to_numpy(dtype='int32') - 1970) * 12 + calendario['mes'].to_numpy() - 1
+    if resolucao == 'estacao':
+        return calendario['estacao'].to_numpy()
+    raise ValueError(f"Resolução desconhecida: {resolucao}")
+
+
+def rotulos_periodo(chaves, resolucao):
+    """Chaves inteiras -> rótulos do cubo (hora, data, início do mês ou nome da estação)"""
+    chaves = np.asarray(chaves)
+    if resolucao == 'dia':
+        return chaves.astype('int64').astype('datetime64[D]').astype('datetime64[ns]')
+    if resolucao == 'mes':
+        return chaves.astype('int64').astype('datetime64[M]').astype('datetime64[ns]')
+    if resolucao == 'estacao':
+        return nomes_estacao(chaves)
+    return chaves
+
+
+def para_float64(valores):
+    """Converte medições (ex.: float32 da representação compacta) para float64 pelo decimal de 7 algarismos.
+
+    Um float32 guarda ~7 algarismos significativos: 9.9 vira 9.8999996 e
+    somas, médias e percentis carregam esse erro. Arredondar a 7 algarismos
+    recupera o decimal medido (as medições do INMET têm poucas casas).
+    """
+    valores = np.asarray(valores)
+    if valores.dtype != np.float32:
+        return valores.astype('float64')
+    valores = valores.astype('float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expoente = np.floor(np.log10(np.abs(valores)))
+    casas = np.clip(np.where(np.isfinite(expoente), 6 - expoente, 0), 0, 22)
+    escala = 10.0 ** casas
+    return np.round(valores * escala) / escala
+
+
+def assinatura_dados(df, variaveis, coluna='cidade'):
+    """Resumo barato dos dados (linhas por cidade, intervalo de tempo e somas) para validar o cubo em disco"""
+    tempos = df['datetime'].dropna()
+    resumo = {
+        'versao': VERSAO_CUBO,
+        'linhas': df[coluna].astype(str).value_counts().sort_index().to_dict(),
+        'inicio': str(tempos.min()) if len(tempos) else None,
+        'fim': str(tempos.max()) if len(tempos) else None,
+        'somas': {var: repr(float(df[var].sum())) for var in variaveis},
+    }
+    return hashlib.sha1(json.dumps(resumo, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def ler_tabela(caminho, assinatura):
+    """Tabela Parquet gravada por `gravar_tabela`, ou None se não existir ou for de outros dados"""
+    if caminho is None or not PYARROW_DISPONIVEL or not os.path.exists(caminho):
+        return None
+    metadados = pq.read_schema(caminho).metadata or {}
+    if metadados.get(CHAVE_ASSINATURA, b'').decode('utf-8') != assinatura:
+        return None
+    return pq.read_table(caminho).to_pandas()
+
+
+def gravar_tabela(caminho, tabela, assinatura):
+    """Grava a tabela em Parquet com a assinatura dos dados (troca atômica do arquivo)"""
+    if caminho is None or not PYARROW_DISPONIVEL:
+        return
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    tabela = pa.Table.from_pandas(tabela)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[CHAVE_ASSINATURA] = assinatura.encode('utf-8')
+    tabela = tabela.replace_schema_metadata(metadados)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, caminho)
+
+
+class CuboAgregados:
+    """n, soma, média, mínimo e máximo de cada variável por cidade e período.
+
+    Cada resolução (hora do dia, dia, mês, estação do ano) é calculada na
+    primeira consulta com uma única varredura dos dados horários e guardada;
+    relatórios e gráficos leem daqui em vez de reagrupar os dados. Com
+    `diretorio`, as tabelas também são gravadas em Parquet e reaproveitadas
+    enquanto os dados não mudarem.
+    """
+
+    def __init__(self, df, variaveis=None, coluna='cidade', diretorio=None, calendario=None):
+        self.dados = df
+        # Tabela de calendário alinhada às linhas de df (construída aqui se não for dada)
+        self._calendario = calendario
+        self.coluna = coluna
+        if variaveis is None:
+            variaveis = variaveis_medidas(df)
+        self.variaveis = [var for var in variaveis if var in df.columns]
+        self.diretorio = diretorio if PYARROW_DISPONIVEL else None
+        self.tabelas = {}
+        self.varreduras = 0
+        self._assinatura = None
+
+    def tabela(self, resolucao):
+        """Tabela da resolução: índice (cidade, período), colunas (variável, estatística)"""
+        if resolucao not in self.tabelas:
+            tabela = self._ler_disco(resolucao)
+            if tabela is None:
+                tabela = self._agregar(resolucao)
+                self._gravar_disco(resolucao, tabela)
+            self.tabelas[resolucao] = tabela
+        return self.tabelas[resolucao]
+
+    def por_cidade(self, resolucao, cidade):
+        """Linhas de uma cidade, indexadas pelo período (vazio se a cidade não existir)"""
+        tabela = self.tabela(resolucao)
+        if cidade not in tabela.index.get_level_values(self.coluna):
+            return tabela.iloc[:0].droplevel(self.coluna)
+        return tabela.xs(cidade, level=self.coluna)
+
+    def serie(self, resolucao, variavel, estatistica='media', cidade=None):
+        """Uma estatística de uma variável, de todas as cidades ou de uma só"""
+        if cidade is not None:
+            return self.por_cidade(resolucao, cidade)[(variavel, estatistica)]
+        return self.tabela(resolucao)[(variavel, estatistica)]
+
+    @property
+    def calendario(self):
+        if self._calendario is None:
+            self._calendario = construir_calendario(self.dados['datetime'])
+        return self._calendario
+
+    def _agregar(self, resolucao):
+        df = self.dados
+        chaves = chaves_periodo(self.calendario, resolucao)
+        validos = self.calendario['mes'].to_numpy() >= 0
+        if not validos.all():
+            df, chaves = df[validos], chaves[validos]
+
+        # Agrupa por chaves inteiras e só depois converte os rótulos do período
+        chave = pd.Series(chaves, index=df.index, name=resolucao)
+        # Acumular em float64: somas diárias de chuva em float32 mudam limiares e contagens de eventos
+        valores = pd.DataFrame({var: para_float64(df[var].to_numpy(na_value=np.nan))
+                                for var in self.variaveis}, index=df.index)
+        agrupado = valores.groupby([df[self.coluna], chave], observed=True)
+        tabela = agrupado.agg(list(ESTATISTICAS)).rename(columns=ESTATISTICAS, level=1)
+        periodos = tabela.index.levels[1]
+        tabela.index = tabela.index.set_levels(rotulos_periodo(periodos, resolucao), level=1)
+        self.varreduras += 1
+        return tabela.sort_index()
+
+    def _caminho(self, resolucao):
+        if self.diretorio is None:
+            return None
+        return os.path.join(self.diretorio, f"cubo_{resolucao}.parquet")
+
+    def assinatura(self):
+        if self._assinatura is None:
+            self._assinatura = assinatura_dados(self.dados, self.variaveis, self.coluna)
+        return self._assinatura
+
+    def _ler_disco(self, resolucao):
+        if self.diretorio is None:
+            return None
+        return ler_tabela(self._caminho(resolucao), self.assinatura())
+
+    def _gravar_disco(self, resolucao, tabela):
+        if self.diretorio is None:
+            return
+        gravar_tabela(self._caminho(resolucao), tabela, self.assinatura())
@@ -0,0 +1,173 @@
+"""
+🧱 Cubo Denso
+Dados horários como um único array float32 (estações × horas × variáveis), com metadados
+dos eixos e gravação em disco para abrir por memory-map
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from agregacao_streaming import variaveis_medidas
+from calendario import NS_POR_HORA
+from janelas_moveis import extremo_movel, horas_desde_epoca, soma_movel
+
+ARQUIVO_VALORES = 'valores.npy'
+ARQUIVO_EIXOS = 'eixos.json'
+
+
+def somas_por_par(valores):
+    """Somas de todos os pares de linhas de `valores` (estações × horas, NaN = ausente) nas horas em comum.
+
+    Retorna (n, soma, soma_quadrados, produto, centro): em [a, b], n conta as
+    horas em que a e b mediram e soma, soma_quadrados e produto são Σa, Σa² e
+    Σab nessas horas. Cada estação é centrada em `centro` antes, o que reduz
+    o cancelamento numérico (ex.: pressão em mB). Tudo sai de produtos de
+    matrizes, sem laço por par.
+    """
+    x = np.asarray(valores, dtype='float64')
+    medidos = ~np.isnan(x)
+    m = medidos.astype('float64')
+    centro = np.where(medidos, x, 0.0).sum(axis=1) / np.maximum(medidos.sum(axis=1), 1)
+    x = np.where(medidos, x - centro[:, None], 0.0)
+    return m @ m.T, x @ m.T, (x * x) @ m.T, x @ x.T, centro
+
+
+class CuboDenso:
+    """Array contíguo float32 com forma (estações, horas, variáveis) e os rótulos de cada eixo.
+
+    Todas as estações ficam no mesmo eixo de horas (UTC, de `inicio` em
+    diante, passo de uma hora); horas sem medição são NaN. Comparações entre
+    estações, correlações e janelas móveis viram operações sobre fatias do
+    array, sem filtrar linhas de DataFrame. `gravar` salva em .npy e
+    `abrir(..., mmap_mode='r')` mapeia o arquivo, de modo que vários processos
+    compartilham as mesmas páginas.
+    """
+
+    def __init__(self, valores, cidades, variaveis, inicio, assinatura=None):
+        self.valores = valores
+        self.cidades = list(cidades)
+        self.variaveis = list(variaveis)
+        # Hora inicial do eixo de tempo (horas desde 1970-01-01 UTC)
+        self.inicio = int(inicio)
+        self.assinatura = assinatura
+
+    @classmethod
+    def de_grade(cls, grade, coluna='cidade', variaveis=None, assinatura=None):
+        """Monta o cubo a partir da grade horária (ou de qualquer DataFrame com datetime e cidade)"""
+        if variaveis is None:
+            variaveis = variaveis_medidas(grade)
+        variaveis = [var for var in variaveis if var in grade.columns]
+
+        codigos, cidades = pd.factorize(grade[coluna], sort=False)
+        horas = horas_desde_epoca(grade['datetime'])
+        validas = (codigos >= 0) & (horas >= 0)
+        inicio = horas[validas].min() if validas.any() else 0
+        n_horas = int(horas[validas].max() - inicio + 1) if validas.any() else 0
+
+        valores = np.full((len(cidades), n_horas, len(variaveis)), np.nan, dtype='float32')
+        valores[codigos[validas], horas[validas] - inicio] = \
+            grade[variaveis].to_numpy(dtype='float32', na_value=np.nan)[validas]
+        return cls(valores, cidades, variaveis, inicio, assinatura)
+
+    @property
+    def forma(self):
+        return self.valores.shape
+
+    def datas(self):
+        """Rótulos do eixo de horas (DatetimeIndex UTC ingênuo, como em 'datetime')"""
+        return pd.to_datetime((self.inicio + np.arange(self.valores.shape[1])) * NS_POR_HORA)
+
+    def posicao_data(self, data):
+        """Posição no eixo de horas de um datetime (pode cair fora do cubo)"""
+        return int(horas_desde_epoca([pd.Timestamp(data)])[0] - self.inicio)
+
+    def variavel(self, nome):
+        """Visão (estações × horas) de uma variável"""
+        return self.valores[:, :, self.variaveis.index(nome)]
+
+    def cidade(self, nome):
+        """Visão (horas × variáveis) de uma estação"""
+        return self.valores[self.cidades.index(nome)]
+
+    def serie(self, cidade, variavel):
+        """Série horária de uma estação e variável"""
+        valores = self.valores[self.cidades.index(cidade), :, self.variaveis.index(variavel)]
+        return pd.Series(valores, index=self.datas(), name=variavel)
+
+    def janela(self, variavel, horas, estatistica='media'):
+        """Estatística móvel (últimas `horas` horas) de uma variável em todas as estações.
+
+        Retorna (estações × horas); usa as mesmas rotinas de janelas_moveis
+        sobre o eixo de tempo, que aqui já tem passo fixo.
+        """
+        serie = self.variavel(variavel).T.astype('float64')
+        if estatistica in ('soma', 'media', 'n'):
+            soma, contagem = soma_movel(serie, horas)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                resultado = {'soma': soma, 'n': contagem, 'media': soma / contagem}[estatistica]
+            if estatistica != 'n':
+                resultado = np.where(contagem > 0, resultado, np.nan)
+        elif estatistica in ('minimo', 'maximo'):
+            resultado = extremo_movel(serie, horas, np.minimum if estatistica == 'minimo' else np.maximum)
+            resultado = np.where(np.isinf(resultado), np.nan, resultado)
+        else:
+            raise ValueError(f"Estatística desconhecida: {estatistica}")
+        return resultado.T
+
+    def correlacao_estacoes(self, variavel):
+        """Correlação de Pearson entre as estações (DataFrame estações × estações).
+
+        Cada par usa só as horas em que as duas estações mediram (ver somas_por_par).
+        """
+        n, soma_x, soma_xx, soma_xy, _ = somas_por_par(self.variavel(variavel))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = n * soma_xy - soma_x * soma_x.T
+            var_a = n * soma_xx - soma_x ** 2
+            var_b = var_a.T
+            corr = np.where((n > 1) & (var_a > 0) & (var_b > 0), cov / np.sqrt(var_a * var_b), np.nan)
+        return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=self.cidades, columns=self.cidades)
+
+    def gravar(self, diretorio):
+        """Grava valores (.npy) e eixos (.json); o .npy pode ser aberto por memory-map
+
+        Os dois arquivos são escritos num diretório temporário ao lado, que
+        então toma o lugar de `diretorio`: quem abre vê o par antigo ou o novo,
+        nunca um .npy novo com eixos antigos.
+        """
+        pai = os.path.dirname(os.path.abspath(diretorio))
+        os.makedirs(pai, exist_ok=True)
+        temporario = tempfile.mkdtemp(prefix=f".{os.path.basename(diretorio)}.", dir=pai)
+        antigo = None
+        try:
+            np.save(os.path.join(temporario, ARQUIVO_VALORES), np.ascontiguousarray(self.valores))
+            eixos = {
+                'cidades': self.cidades, 'variaveis': self.variaveis,
+                'inicio': self.inicio, 'assinatura': self.assinatura,
+            }
+            with open(os.path.join(temporario, ARQUIVO_EIXOS), 'w', encoding='utf-8') as f:
+                json.dump(eixos, f, ensure_ascii=False)
+            if os.path.isdir(diretorio):
+                antigo = f"{temporario}.antigo"
+                os.replace(diretorio, antigo)
+            os.replace(temporario, diretorio)
+        finally:
+            for resto in (temporario, antigo):
+                if resto is not None and os.path.isdir(resto):
+                    shutil.rmtree(resto, ignore_errors=True)
+
+    @classmethod
+    def abrir(cls, diretorio, mmap_mode='r'):
+        """Abre um cubo gravado (por padrão mapeado em memória, só leitura); None se não existir"""
+        caminho_eixos = os.path.join(diretorio, ARQUIVO_EIXOS)
+        caminho_valores = os.path.join(diretorio, ARQUIVO_VALORES)
+        if not (os.path.exists(caminho_eixos) and os.path.exists(caminho_valores)):
+            return None
+        with open(caminho_eixos, encoding='utf-8') as f:
+            eixos = json.load(f)
+        valores = np.load(caminho_valores, mmap_mode=mmap_mode)
+        return cls(valores, eixos['cidades'], eixos['variaveis'], eixos['inicio'], eixos.get('assinatura'))
@@ -0,0 +1,248 @@
+"""
+📏 Esboços de Quantis (KLL)
+Percentis, quartis de boxplot e histogramas a partir de resumos pequenos e combináveis
+"""
+
+import numpy as np
+import pandas as pd
+
+from agregacao_streaming import VARIAVEIS_RELATORIO
+
+
+def erro_rank(k):
+    """Erro de rank normalizado típico de um esboço KLL com parâmetro k.
+
+    Aproximação empírica usada pela biblioteca DataSketches (~1,3% para k=200):
+    o quantil devolvido fica, com alta probabilidade, entre os quantis q ± erro.
+    """
+    return 2.296 / k ** 0.9723
+
+
+def k_para_erro(erro):
+    """Menor k cujo erro de rank típico é no máximo `erro`"""
+    return int(np.ceil((2.296 / erro) ** (1 / 0.9723)))
+
+
+class EsbocoQuantis:
+    """Esboço KLL de uma variável: quantis aproximados com memória O(k · log n).
+
+    Os valores ficam em níveis; um item no nível h representa 2**h valores.
+    Quando um nível enche, ele é ordenado e metade dos itens (pares ou ímpares,
+    por sorteio) sobe para o nível seguinte. Esboços de arquivos, anos ou
+    processos diferentes são combinados com `mesclar`. Enquanto nada foi
+    compactado os quantis são exatos (mesma interpolação linear do pandas).
+    """
+
+    def __init__(self, k=200, semente=None):
+        self.k = int(k)
+        self.niveis = [np.empty(0)]
+        self.n = 0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self.semente = semente
+        self._rng = np.random.default_rng(semente)
+
+    @classmethod
+    def para_erro(cls, erro, semente=None):
+        """Esboço dimensionado para um erro de rank típico (ex.: 0.01 = 1%)"""
+        return cls(k_para_erro(erro), semente=semente)
+
+    def _capacidade(self, nivel):
+        profundidade = len(self.niveis) - nivel - 1
+        return max(8, int(np.ceil(self.k * (2 / 3) ** profundidade)))
+
+    def atualizar(self, valores):
+        """Incorpora valores (NaN são ignorados)"""
+        valores = np.asarray(valores, dtype='float64').ravel()
+        valores = valores[~np.isnan(valores)]
+        if len(valores) == 0:
+            return self
+        self.n += len(valores)
+        self.minimo = min(self.minimo, valores.min())
+        self.maximo = max(self.maximo, valores.max())
+        self.niveis[0] = np.concatenate([self.niveis[0], valores])
+        self._compactar()
+        return self
+
+    def mesclar(self, outro):
+        """Combina com outro esboço (o resultado usa o k deste)"""
+        if outro.n == 0:
+            return self
+        while len(self.niveis) < len(outro.niveis):
+            self.niveis.append(np.empty(0))
+        for nivel, itens in enumerate(outro.niveis):
+            self.niveis[nivel] = np.concatenate([self.niveis[nivel], itens])
+        self.n += outro.n
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        self._compactar()
+        return self
+
+    def copia(self):
+        novo = EsbocoQuantis(self.k, semente=self.semente)
+        novo.niveis = [itens.copy() for itens in self.niveis]
+        novo.n, novo.minimo, novo.maximo = self.n, self.minimo, self.maximo
+        return novo
+
+    def _compactar(self):
+        nivel = 0
+        while nivel < len(self.niveis):
+            itens = self.niveis[nivel]
+            if len(itens) > self._capacidade(nivel):
+                if nivel + 1 == len(self.niveis):
+                    self.niveis.append(np.empty(0))
+                itens = np.sort(itens)
+                # Com quantidade ímpar, um item fica no nível (o peso total continua exato)
+                sobra = itens[:len(itens) % 2]
+                pares = itens[len(sobra):]
+                promovidos = pares[self._rng.integers(2)::2]
+                self.niveis[nivel] = sobra
+                self.niveis[nivel + 1] = np.concatenate([self.niveis[nivel + 1], promovidos])
+            nivel += 1
+
+    def _itens_ordenados(self):
+        itens = np.concatenate(self.niveis)
+        pesos = np.concatenate([np.full(len(n), 2 ** h, dtype='float64') for h, n in enumerate(self.niveis)])
+        ordem = np.argsort(itens, kind='stable')
+        return itens[ordem], pesos[ordem]
+
+    def quantis(self, qs):
+        """Quantis aproximados (qs entre 0 e 1); NaN se o esboço estiver vazio"""
+        qs = np.asarray(qs, dtype='float64')
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+
+        itens, pesos = self._itens_ordenados()
+        # Rank (base 0) do centro de cada item; um item de peso w cobre w ranks
+        centros = np.cumsum(pesos) - (pesos + 1) / 2
+        centros = np.concatenate([[0.0], centros, [self.n - 1.0]])
+        valores = np.concatenate([[self.minimo], itens, [self.maximo]])
+        return np.interp(qs * (self.n - 1), centros, valores)
+
+    def quantil(self, q):
+        return float(self.quantis([q])[0])
+
+    def cdf(self, pontos):
+        """Fração aproximada dos valores menores ou iguais a cada ponto"""
+        pontos = np.asarray(pontos, dtype='float64')
+        if self.n == 0:
+            return np.full(pontos.shape, np.nan)
+        itens, pesos = self._itens_ordenados()
+        acumulado = np.concatenate([[0.0], np.cumsum(pesos)])
+        return acumulado[np.searchsorted(itens, pontos, side='right')] / self.n
+
+    def histograma(self, bordas):
+        """Contagens aproximadas em cada intervalo (bordas[i], bordas[i+1]]"""
+        return np.diff(self.cdf(bordas)) * self.n
+
+    def boxplot(self, whis=1.5):
+        """Estatísticas de boxplot no formato de matplotlib Axes.bxp (sem outliers individuais)"""
+        q1, mediana, q3 = self.quantis([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        itens, _ = self._itens_ordenados()
+        itens = np.concatenate([[self.minimo], itens, [self.maximo]])
+        dentro = itens[(itens >= q1 - whis * iqr) & (itens <= q3 + whis * iqr)]
+        return {
+            'med': mediana, 'q1': q1, 'q3': q3,
+            'whislo': dentro.min() if len(dentro) else q1,
+            'whishi': dentro.max() if len(dentro) else q3,
+            'fliers': [],
+        }
+
+    def para_dict(self):
+        """Estado em tipos simples (serializável em JSON)"""
+        return {
+            'k': self.k, 'n': self.n, 'semente': self.semente,
+            'minimo': float(self.minimo), 'maximo': float(self.maximo),
+            'niveis': [itens.tolist() for itens in self.niveis],
+        }
+
+    @classmethod
+    def de_dict(cls, estado):
+        esboco = cls(estado['k'], semente=estado.get('semente'))
+        esboco.n = estado['n']
+        esboco.minimo, esboco.maximo = estado['minimo'], estado['maximo']
+        esboco.niveis = [np.asarray(itens, dtype='float64') for itens in estado['niveis']]
+        return esboco
+
+
+class EsbocosGrupos:
+    """Um EsbocoQuantis por grupo (ex.: cidade × ano) e variável.
+
+    Consultas sem o período combinam os esboços de todos os períodos da cidade,
+    então acrescentar um ano novo só exige esboçar esse ano. Com `semente`,
+    os sorteios da compactação (e portanto os percentis) se repetem entre
+    execuções.
+    """
+
+    def __init__(self, chaves=('cidade', 'ano'), variaveis=None, k=200, semente=None):
+        self.chaves = list(chaves)
+        self.variaveis = list(variaveis) if variaveis is not None else list(VARIAVEIS_RELATORIO)
+        self.k = k
+        self.semente = semente
+        # (grupo..., variavel) -> EsbocoQuantis
+        self.esbocos = {}
+
+    def atualizar(self, bloco):
+        """Incorpora um bloco de dados (DataFrame com as chaves e as variáveis)"""
+        variaveis = [var for var in self.variaveis if var in bloco.columns]
+        if bloco.empty or not variaveis:
+            return self
+
+        grupos = bloco.groupby(self.chaves, observed=True, sort=False).indices
+        for variavel in variaveis:
+            valores = bloco[variavel].to_numpy(dtype='float64', na_value=np.nan)
+            for grupo, posicoes in grupos.items():
+                grupo = grupo if isinstance(grupo, tuple) else (grupo,)
+                chave = grupo + (variavel,)
+                if chave not in self.esbocos:
+                    self.esbocos[chave] = EsbocoQuantis(self.k, semente=self.semente)
+                self.esbocos[chave].atualizar(valores[posicoes])
+        return self
+
+    def mesclar(self, outro):
+        """Combina com outro conjunto de esboços com as mesmas chaves"""
+        for chave, esboco in outro.esbocos.items():
+            if chave in self.esbocos:
+                self.esbocos[chave].mesclar(esboco)
+            else:
+                self.esbocos[chave] = esboco.copia()
+        return self
+
+    def esboco(self, variavel, **filtros):
+        """Esboço combinado dos grupos que casam com os filtros (ex.: cidade='Rio Grande')"""
+        combinado = EsbocoQuantis(self.k, semente=self.semente)
+        for chave, esboco in self.esbocos.items():
+            grupo = dict(zip(self.chaves, chave[:-1]))
+            if chave[-1] == variavel and all(grupo.get(nome) == valor for nome, valor in filtros.items()):
+                combinado.mesclar(esboco)
+        return combinado
+
+    def tabela_percentis(self, variavel, por='cidade', qs=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Percentis de uma variável para cada valor de `por` (uma linha por valor)"""
+        posicao = self.chaves.index(por)
+        valores = list(dict.fromkeys(chave[posicao] for chave in self.esbocos if chave[-1] == variavel))
+        linhas = {
+            valor: self.esboco(variavel, **{por: valor}).quantis(qs)
+            for valor in valores
+        }
+        colunas = [f"P{round(q * 100):02d}" for q in qs]
+        return pd.DataFrame.from_dict(linhas, orient='index', columns=colunas).rename_axis(por)
+
+    def para_dict(self):
+        """Estado em tipos simples (serializável em JSON)"""
+        return {
+            'chaves': self.chaves, 'variaveis': self.variaveis, 'k': self.k, 'semente': self.semente,
+            'esbocos': [
+                {'chave': [valor.item() if hasattr(valor, 'item') else valor for valor in chave],
+                 'esboco': esboco.para_dict()}
+                for chave, esboco in self.esbocos.items()
+            ],
+        }
+
+    @classmethod
+    def de_dict(cls, estado):
+        grupos = cls(estado['chaves'], estado['variaveis'], estado['k'], estado.get('semente'))
+        for item in estado['esbocos']:
+            grupos.esbocos[tuple(item['chave'])] = EsbocoQuantis.de_dict(item['esboco'])
+        return grupos
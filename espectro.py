@@ -0,0 +1,175 @@
+"""
+🎼 Análise Espectral
+Periodograma e estimativa de Welch de todas as estações e variáveis numa única FFT em lote sobre
+o cubo horário, e amplitude/fase dos harmônicos diários e anual
+"""
+
+import numpy as np
+import pandas as pd
+
+# Frequências em ciclos por dia (amostragem horária)
+AMOSTRAS_POR_DIA = 24
+
+# Harmônico -> período em horas
+HARMONICOS = {'diurno': 24.0, 'semidiurno': 12.0, 'anual': 365.25 * 24}
+
+# Segmentos de Welch: 30 dias com 50% de sobreposição; segmentos com menos horas medidas que isso ficam de fora
+SEGMENTO_WELCH = 30 * 24
+SOBREPOSICAO_WELCH = 0.5
+COBERTURA_MINIMA_SEGMENTO = 0.8
+
+COLUNAS_HARMONICOS = ['periodo_horas', 'media', 'amplitude', 'fase', 'pico_horas', 'variancia_explicada']
+
+
+def _series(cubo, variaveis):
+    """(x, medidos, media, horas): séries (estações, variáveis, horas) em float64, centradas e com zero nas lacunas"""
+    indices = [cubo.variaveis.index(var) for var in variaveis]
+    valores = np.moveaxis(np.asarray(cubo.valores[:, :, indices], dtype='float64'), 1, -1)
+    medidos = ~np.isnan(valores)
+    n = medidos.sum(axis=-1, keepdims=True)
+    media = np.where(medidos, valores, 0.0).sum(axis=-1, keepdims=True) / np.maximum(n, 1)
+    x = np.where(medidos, valores - media, 0.0)
+    horas = cubo.inicio + np.arange(valores.shape[-1], dtype='float64')
+    return x, medidos, media[..., 0], horas
+
+
+def _variaveis(cubo, variaveis):
+    return cubo.variaveis if variaveis is None else [var for var in variaveis if var in cubo.variaveis]
+
+
+def periodograma(cubo, variaveis=None):
+    """(frequências em ciclos/dia, densidade espectral (estações, variáveis, frequências)).
+
+    Uma única rfft ao longo das horas do cubo inteiro. As lacunas entram como
+    zero depois de remover a média de cada série, e a densidade é
+    normalizada pelo número de horas medidas (unilateral, unidade² por
+    ciclo/dia).
+    """
+    variaveis = _variaveis(cubo, variaveis)
+    x, medidos, _, _ = _series(cubo, variaveis)
+    n_horas = x.shape[-1]
+    espectro = np.fft.rfft(x, axis=-1)
+    n = np.maximum(medidos.sum(axis=-1, keepdims=True), 1)
+    densidade = np.abs(espectro) ** 2 / (AMOSTRAS_POR_DIA * n)
+    # Unilateral: dobra tudo menos a frequência zero e a de Nyquist
+    densidade[..., 1:(n_horas + 1) // 2] *= 2
+    return np.fft.rfftfreq(n_horas, d=1 / AMOSTRAS_POR_DIA), densidade
+
+
+def welch(cubo, variaveis=None, segmento=SEGMENTO_WELCH, sobreposicao=SOBREPOSICAO_WELCH,
+          cobertura_minima=COBERTURA_MINIMA_SEGMENTO):
+    """(frequências em ciclos/dia, densidade (estações, variáveis, frequências), segmentos usados (estações, variáveis)).
+
+    Estimativa de Welch: segmentos de `segmento` horas com janela de Hann,
+    média removida em cada segmento; todos os segmentos de todas as séries
+    vão numa única rfft (visão por sliding_window_view, sem laço). Segmentos
+    com menos de `cobertura_minima` das horas medidas não entram na média.
+    """
+    variaveis = _variaveis(cubo, variaveis)
+    x, medidos, _, _ = _series(cubo, variaveis)
+    n_horas = x.shape[-1]
+    frequencias = np.fft.rfftfreq(segmento, d=1 / AMOSTRAS_POR_DIA)
+    if n_horas < segmento:
+        return frequencias, np.full(x.shape[:-1] + (len(frequencias),), np.nan), np.zeros(x.shape[:-1], dtype='int64')
+
+    passo = max(1, segmento - int(segmento * sobreposicao))
+    inicios = np.arange(0, n_horas - segmento + 1, passo)
+    janelas_x = np.lib.stride_tricks.sliding_window_view(x, segmento, axis=-1)[..., inicios, :]
+    janelas_m = np.lib.stride_tricks.sliding_window_view(medidos, segmento, axis=-1)[..., inicios, :]
+
+    # Horas medidas e média de cada segmento (só sobre as horas medidas)
+    contagem = janelas_m.sum(axis=-1, keepdims=True)
+    media = janelas_x.sum(axis=-1, keepdims=True) / np.maximum(contagem, 1)
+    hann = np.hanning(segmento + 1)[:-1]
+    espectro = np.fft.rfft(np.where(janelas_m, janelas_x - media, 0.0) * hann, axis=-1)
+
+    densidade = np.abs(espectro) ** 2 / (AMOSTRAS_POR_DIA * (hann ** 2).sum())
+    densidade[..., 1:(segmento + 1) // 2] *= 2
+    validos = contagem[..., 0] >= cobertura_minima * segmento
+    usados = validos.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_segmentos = (densidade * validos[..., None]).sum(axis=-2) / usados[..., None]
+    return frequencias, np.where(usados[..., None] > 0, media_segmentos, np.nan), usados
+
+
+def picos_espectrais(frequencias, densidade, cubo, variaveis=None, frequencia_minima=0.0):
+    """Período (horas) de maior densidade de cada estação e variável, acima de `frequencia_minima` (ciclos/dia)"""
+    variaveis = _variaveis(cubo, variaveis)
+    faixa = frequencias > frequencia_minima
+    recorte = np.where(np.isnan(densidade[..., faixa]), -np.inf, densidade[..., faixa])
+    pico = recorte.argmax(axis=-1)
+    periodo = AMOSTRAS_POR_DIA / frequencias[faixa][pico]
+    tabela = pd.DataFrame(
+        periodo.T, index=pd.Index(variaveis, name='variavel'), columns=pd.Index(cubo.cidades, name='cidade')
+    )
+    return tabela.where(np.isfinite(recorte.max(axis=-1)).T)
+
+
+def harmonicos(cubo, variaveis=None, periodos=None):
+    """Amplitude e fase dos harmônicos (diurno, semidiurno, anual) de cada estação e variável.
+
+    Ajuste por mínimos quadrados de média + Σ amplitude·cos(2π·t/período -
+    fase) só nas horas medidas, com as equações normais de todas as séries
+    montadas por produtos de matrizes (máscara × produtos das funções base) e
+    resolvidas em lote; os períodos não precisam cair em frequências da FFT
+    (o anual nunca cai). pico_horas é o instante do máximo dentro do período,
+    contado de 1970-01-01 00h UTC: a hora UTC para os harmônicos diários e
+    horas desde 1º de janeiro (aprox.) para o anual. Índice: (variavel,
+    cidade, harmonico).
+    """
+    variaveis = _variaveis(cubo, variaveis)
+    periodos = HARMONICOS if periodos is None else periodos
+    nomes = list(periodos)
+    x, medidos, media, horas = _series(cubo, variaveis)
+    n_estacoes, n_variaveis, n_horas = x.shape
+    periodo = np.array([periodos[nome] for nome in nomes], dtype='float64')
+    # Harmônicos mais longos que o cubo não entram no ajuste
+    ajustaveis = periodo <= n_horas
+
+    angulos = 2 * np.pi * horas[:, None] / periodo[ajustaveis][None, :]
+    base = np.concatenate([np.ones((n_horas, 1)), np.cos(angulos), np.sin(angulos)], axis=1)
+    n_base = base.shape[1]
+
+    m = medidos.reshape(-1, n_horas).astype('float64')
+    gram = (m @ (base[:, :, None] * base[:, None, :]).reshape(n_horas, -1)).reshape(-1, n_base, n_base)
+    lado_direito = x.reshape(-1, n_horas) @ base
+    coeficientes = np.full((len(m), n_base), np.nan)
+    resolviveis = np.linalg.matrix_rank(gram) == n_base
+    if resolviveis.any():
+        coeficientes[resolviveis] = np.linalg.solve(gram[resolviveis], lado_direito[resolviveis][..., None])[..., 0]
+
+    n = m.sum(axis=1)
+    variancia = np.where(n > 1, (x.reshape(-1, n_horas) ** 2).sum(axis=1) / np.maximum(n - 1, 1), np.nan)
+    # A série foi centrada antes do ajuste; a média do ajuste volta somada ao centro
+    media = media.reshape(-1) + coeficientes[:, 0]
+
+    k = len(nomes)
+    a, b = np.full((len(m), k), np.nan), np.full((len(m), k), np.nan)
+    a[:, ajustaveis] = coeficientes[:, 1:1 + ajustaveis.sum()]
+    b[:, ajustaveis] = coeficientes[:, 1 + ajustaveis.sum():]
+    # ... nem os mais longos que o trecho medido de cada série
+    primeira = np.where(m.any(axis=1), m.argmax(axis=1), 0)
+    ultima = np.where(m.any(axis=1), n_horas - 1 - m[:, ::-1].argmax(axis=1), -1)
+    curtas = periodo[None, :] > (ultima - primeira + 1)[:, None]
+    a[curtas] = b[curtas] = np.nan
+    amplitude = np.hypot(a, b)
+    fase = np.arctan2(b, a)
+    pico = np.mod(fase / (2 * np.pi) * periodo, periodo)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        explicada = amplitude ** 2 / 2 / variancia[:, None]
+
+    def por_variavel(valores):
+        # (estações × variáveis, harmônicos) -> ordem (variável, estação, harmônico)
+        return np.broadcast_to(valores, amplitude.shape).reshape(n_estacoes, n_variaveis, k).transpose(1, 0, 2).ravel()
+
+    indice = pd.MultiIndex.from_product(
+        [variaveis, cubo.cidades, nomes], names=['variavel', 'cidade', 'harmonico']
+    )
+    return pd.DataFrame({
+        'periodo_horas': por_variavel(periodo),
+        'media': por_variavel(media[:, None]),
+        'amplitude': por_variavel(amplitude),
+        'fase': por_variavel(fase),
+        'pico_horas': por_variavel(pico),
+        'variancia_explicada': por_variavel(explicada),
+    }, index=indice, columns=COLUNAS_HARMONICOS)
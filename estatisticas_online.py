@@ -0,0 +1,213 @@
+"""
+📐 Estatísticas Online Combináveis
+Contagem, média, variância (Welford/Chan), mínimo, máximo, soma e co-momentos,
+acumulados bloco a bloco e combináveis entre arquivos, blocos ou processos
+"""
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_MOMENTOS = ['n', 'media', 'desvio_padrao', 'minimo', 'maximo', 'soma']
+
+
+def combinar_momentos(n_a, media_a, m2_a, n_b, media_b, m2_b):
+    """Combina (n, média, M2) de duas partes pela fórmula de Chan et al.
+
+    M2 é a soma dos quadrados dos desvios em relação à média. Aceita escalares
+    ou arrays do mesmo formato; partes vazias devem ter n = média = M2 = 0.
+    """
+    n_a, media_a, m2_a = (np.asarray(x, dtype='float64') for x in (n_a, media_a, m2_a))
+    n_b, media_b, m2_b = (np.asarray(x, dtype='float64') for x in (n_b, media_b, m2_b))
+
+    n = n_a + n_b
+    fracao = np.divide(n_b, n, out=np.zeros_like(n), where=n > 0)
+    delta = media_b - media_a
+    media = media_a + delta * fracao
+    m2 = m2_a + m2_b + delta * delta * n_a * fracao
+    return n, media, m2
+
+
+def _matriz(dados, variaveis):
+    """Valores float64 (linhas × variáveis) de um DataFrame ou array"""
+    if isinstance(dados, pd.DataFrame):
+        return dados[variaveis].to_numpy(dtype='float64', na_value=np.nan)
+    valores = np.asarray(dados, dtype='float64')
+    return valores.reshape(len(valores), -1)
+
+
+def _momentos_do_bloco(valores):
+    """(n, soma, média, M2, mínimo, máximo) por coluna, em duas passadas sobre o bloco"""
+    validos = ~np.isnan(valores)
+    n = validos.sum(axis=0).astype('float64')
+    soma = np.where(validos, valores, 0.0).sum(axis=0)
+    media = np.divide(soma, n, out=np.zeros_like(soma), where=n > 0)
+    m2 = np.where(validos, (valores - media) ** 2, 0.0).sum(axis=0)
+    minimo = np.where(validos, valores, np.inf).min(axis=0)
+    maximo = np.where(validos, valores, -np.inf).max(axis=0)
+    return n, soma, media, m2, minimo, maximo
+
+
+class AcumuladorMomentos:
+    """n, soma, média, M2, mínimo e máximo de cada variável.
+
+    O estado tem tamanho fixo (um valor de cada por variável); blocos são
+    incorporados com `atualizar` e acumuladores de outros arquivos ou processos
+    com `mesclar`. A variância usa Welford/Chan em vez de soma dos quadrados,
+    então não perde precisão com médias grandes (ex.: pressão em mB) e coincide
+    com `.mean()`/`.std()` do pandas.
+    """
+
+    def __init__(self, variaveis):
+        self.variaveis = list(variaveis)
+        k = len(self.variaveis)
+        self.n = np.zeros(k)
+        self.soma = np.zeros(k)
+        self.media = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.minimo = np.full(k, np.inf)
+        self.maximo = np.full(k, -np.inf)
+
+    def atualizar(self, dados):
+        """Incorpora um bloco (DataFrame com as variáveis, ou array linhas × variáveis)"""
+        valores = _matriz(dados, self.variaveis)
+        if len(valores) == 0:
+            return self
+        self._incorporar(*_momentos_do_bloco(valores))
+        return self
+
+    def mesclar(self, outro):
+        """Combina com outro acumulador das mesmas variáveis"""
+        if outro.variaveis != self.variaveis:
+            raise ValueError("Acumuladores com variáveis diferentes não podem ser combinados")
+        self._incorporar(outro.n, outro.soma, outro.media, outro.m2, outro.minimo, outro.maximo)
+        return self
+
+    def _incorporar(self, n, soma, media, m2, minimo, maximo):
+        self.n, self.media, self.m2 = combinar_momentos(self.n, self.media, self.m2, n, media, m2)
+        self.soma = self.soma + soma
+        self.minimo = np.minimum(self.minimo, minimo)
+        self.maximo = np.maximum(self.maximo, maximo)
+
+    def variancia(self, ddof=1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > ddof, self.m2 / (self.n - ddof), np.nan)
+
+    def resultado(self, ddof=1):
+        """DataFrame (uma linha por variável) com n, média, desvio padrão, mínimo, máximo e soma"""
+        vazio = self.n == 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = np.where(vazio, np.nan, self.soma / self.n)
+        return pd.DataFrame({
+            'n': self.n.astype('int64'),
+            'media': media,
+            'desvio_padrao': np.sqrt(self.variancia(ddof)),
+            'minimo': np.where(vazio, np.nan, self.minimo),
+            'maximo': np.where(vazio, np.nan, self.maximo),
+            'soma': self.soma,
+        }, index=pd.Index(self.variaveis, name='variavel'))[COLUNAS_MOMENTOS]
+
+    def para_dict(self):
+        """Estado em tipos simples (serializável em JSON); mínimo/máximo de variáveis vazias vão como None"""
+        estado = {'variaveis': self.variaveis}
+        for nome in ('n', 'soma', 'media', 'm2'):
+            estado[nome] = getattr(self, nome).tolist()
+        for nome in ('minimo', 'maximo'):
+            estado[nome] = [valor if np.isfinite(valor) else None for valor in getattr(self, nome).tolist()]
+        return estado
+
+    @classmethod
+    def de_dict(cls, estado):
+        acumulador = cls(estado['variaveis'])
+        for nome in ('n', 'soma', 'media', 'm2'):
+            setattr(acumulador, nome, np.asarray(estado[nome], dtype='float64'))
+        for nome, neutro in (('minimo', np.inf), ('maximo', -np.inf)):
+            setattr(acumulador, nome, np.array([neutro if valor is None else valor for valor in estado[nome]],
+                                               dtype='float64'))
+        return acumulador
+
+
+class AcumuladorCovariancia:
+    """Co-momentos de cada par de variáveis, para covariância e correlação de Pearson.
+
+    Como em `DataFrame.cov()`/`.corr()` do pandas, cada par usa só as linhas em
+    que as duas variáveis têm valor. Para o par (i, j) guarda n[i, j],
+    media[i, j] (média de i nessas linhas), m2[i, j] (M2 de i nessas linhas) e
+    c[i, j] (soma dos produtos dos desvios).
+    """
+
+    def __init__(self, variaveis):
+        self.variaveis = list(variaveis)
+        k = len(self.variaveis)
+        self.n = np.zeros((k, k))
+        self.media = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.c = np.zeros((k, k))
+
+    def atualizar(self, dados):
+        """Incorpora um bloco (DataFrame com as variáveis, ou array linhas × variáveis)"""
+        valores = _matriz(dados, self.variaveis)
+        if len(valores) == 0:
+            return self
+
+        k = len(self.variaveis)
+        validos = ~np.isnan(valores)
+        n, media, m2, c = (np.zeros((k, k)) for _ in range(4))
+        for i in range(k):
+            for j in range(i, k):
+                linhas = validos[:, i] & validos[:, j]
+                n_par = linhas.sum()
+                if n_par == 0:
+                    continue
+                xi, xj = valores[linhas, i], valores[linhas, j]
+                di, dj = xi - xi.mean(), xj - xj.mean()
+                n[i, j] = n[j, i] = n_par
+                media[i, j], media[j, i] = xi.mean(), xj.mean()
+                m2[i, j], m2[j, i] = (di * di).sum(), (dj * dj).sum()
+                c[i, j] = c[j, i] = (di * dj).sum()
+
+        self._incorporar(n, media, m2, c)
+        return self
+
+    def mesclar(self, outro):
+        """Combina com outro acumulador das mesmas variáveis"""
+        if outro.variaveis != self.variaveis:
+            raise ValueError("Acumuladores com variáveis diferentes não podem ser combinados")
+        self._incorporar(outro.n, outro.media, outro.m2, outro.c)
+        return self
+
+    def _incorporar(self, n, media, m2, c):
+        n_a = self.n
+        fracao = np.divide(n, n_a + n, out=np.zeros_like(n), where=(n_a + n) > 0)
+        # delta[i, j] é o deslocamento da média de i no par; delta.T o de j
+        delta = media - self.media
+        self.c = self.c + c + delta * delta.T * n_a * fracao
+        self.n, self.media, self.m2 = combinar_momentos(n_a, self.media, self.m2, n, media, m2)
+
+    def covariancia(self, ddof=1):
+        """Matriz de covariância (DataFrame variáveis × variáveis)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = np.where(self.n > ddof, self.c / (self.n - ddof), np.nan)
+        return pd.DataFrame(cov, index=self.variaveis, columns=self.variaveis)
+
+    def correlacao(self):
+        """Matriz de correlação de Pearson (DataFrame variáveis × variáveis)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            denominador = np.sqrt(self.m2 * self.m2.T)
+            corr = np.where((self.n > 1) & (denominador > 0), self.c / denominador, np.nan)
+        diagonal = np.diag_indices_from(corr)
+        corr[diagonal] = np.where(np.isnan(corr[diagonal]), np.nan, 1.0)
+        return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=self.variaveis, columns=self.variaveis)
+
+    def para_dict(self):
+        """Estado em tipos simples (serializável em JSON)"""
+        estado = {'variaveis': self.variaveis}
+        for nome in ('n', 'media', 'm2', 'c'):
+            estado[nome] = getattr(self, nome).tolist()
+        return estado
+
+    @classmethod
+    def de_dict(cls, estado):
+        acumulador = cls(estado['variaveis'])
+        for nome in ('n', 'media', 'm2', 'c'):
+            setattr(acumulador, nome, np.asarray(estado[nome], dtype='float64'))
+        return acumulador
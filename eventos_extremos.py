@@ -0,0 +1,159 @@
+"""
+🔥 Eventos Extremos
+Ondas de calor e de frio, estiagens e chuvas fortes detectadas por codificação de sequências (run-length)
+"""
+
+import numpy as np
+import pandas as pd
+
+# Tipo de evento -> série diária, limiar e duração mínima (dias)
+#   estatistica: estatística diária do cubo ('maximo', 'minimo', 'soma', ...)
+#   percentil: limiar = percentil da estação (ou limiar fixo em 'limiar')
+#   base_minima: só dias com valor >= base_minima entram no percentil (ex.: dias chuvosos)
+#   acima: True = dias acima do limiar, False = dias abaixo
+EVENTOS = {
+    'onda_de_calor': {
+        'variavel': 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', 'estatistica': 'maximo',
+        'percentil': 90, 'acima': True, 'duracao_minima': 3,
+    },
+    'onda_de_frio': {
+        'variavel': 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', 'estatistica': 'minimo',
+        'percentil': 10, 'acima': False, 'duracao_minima': 3,
+    },
+    'estiagem': {
+        'variavel': 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)', 'estatistica': 'soma',
+        'limiar': 1.0, 'acima': False, 'duracao_minima': 10,
+    },
+    'chuva_forte': {
+        'variavel': 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)', 'estatistica': 'soma',
+        'percentil': 95, 'base_minima': 1.0, 'acima': True, 'duracao_minima': 1,
+    },
+}
+
+# Dias com menos horas válidas que isso contam como ausentes (interrompem os eventos)
+MIN_HORAS_DIA = 18
+
+COLUNAS_EVENTOS = ['cidade', 'evento', 'inicio', 'fim', 'duracao', 'pico', 'intensidade', 'limiar']
+
+
+def sequencias(mascara):
+    """(início, duração) de cada sequência de True em um array booleano 1D"""
+    bordas = np.diff(np.concatenate([[False], mascara, [False]]).astype('int8'))
+    inicios = np.flatnonzero(bordas == 1)
+    return inicios, np.flatnonzero(bordas == -1) - inicios
+
+
+def grade_diaria(cubo, variavel, estatistica, min_horas=MIN_HORAS_DIA):
+    """(cidades, dias, grade cidades × dias) de uma estatística diária do cubo.
+
+    Todas as cidades ficam no mesmo calendário contínuo de dias; dias sem
+    dados ou com menos de `min_horas` horas válidas ficam NaN.
+    """
+    tabela = cubo.tabela('dia')
+    cidades = list(tabela.index.get_level_values(0).unique())
+    dias_tabela = tabela.index.get_level_values(1)
+    if len(tabela) == 0:
+        return cidades, pd.DatetimeIndex([]), np.empty((len(cidades), 0))
+
+    dias = pd.date_range(dias_tabela.min(), dias_tabela.max(), freq='D')
+    linhas = pd.Categorical(tabela.index.get_level_values(0), categories=cidades).codes
+    colunas = (dias_tabela - dias[0]).days.to_numpy()
+
+    valores = np.where(tabela[(variavel, 'n')].to_numpy() >= min_horas,
+                       tabela[(variavel, estatistica)].to_numpy(dtype='float64', na_value=np.nan), np.nan)
+    grade = np.full((len(cidades), len(dias)), np.nan)
+    grade[linhas, colunas] = valores
+    return cidades, dias, grade
+
+
+def limiares_por_estacao(grade, definicao):
+    """Limiar de cada estação (linha da grade): fixo ou percentil dos próprios dias"""
+    if 'limiar' in definicao:
+        return np.full(len(grade), float(definicao['limiar']))
+    base = grade
+    if 'base_minima' in definicao:
+        base = np.where(grade >= definicao['base_minima'], grade, np.nan)
+    limiares = np.full(len(grade), np.nan)
+    com_dados = ~np.isnan(base).all(axis=1)
+    limiares[com_dados] = np.nanpercentile(base[com_dados], definicao['percentil'], axis=1)
+    return limiares
+
+
+def eventos_na_grade(grade, limiares, acima=True, duracao_minima=1):
+    """Sequências de posições além do limiar em cada linha de uma grade (estações × tempo).
+
+    Todas as estações são processadas juntas: as linhas são concatenadas com
+    uma posição vazia entre elas (nenhuma sequência atravessa estações) e a
+    codificação de sequências, o pico (np.maximum.reduceat) e o excesso médio
+    (np.add.reduceat) saem de operações vetoriais.
+
+    Retorna (estação, posição inicial, duração, pico, intensidade), com
+    intensidade = excesso médio além do limiar.
+    """
+    n_estacoes, n_posicoes = grade.shape
+    separada = np.concatenate([grade, np.full((n_estacoes, 1), np.nan)], axis=1)
+    limiar = np.broadcast_to(np.asarray(limiares, dtype='float64')[:, None], separada.shape)
+    # Orientado para que "extremo" seja sempre o maior valor
+    sinal = 1.0 if acima else -1.0
+    excesso = (sinal * (separada - limiar)).ravel()
+
+    with np.errstate(invalid='ignore'):
+        inicios, duracoes = sequencias(excesso > 0)
+    manter = duracoes >= duracao_minima
+    inicios, duracoes = inicios[manter], duracoes[manter]
+    if len(inicios) == 0:
+        vazio = np.empty(0)
+        return vazio.astype('int64'), vazio.astype('int64'), vazio.astype('int64'), vazio, vazio
+
+    # reduceat sobre [início, fim) de cada sequência; fins intercalados com os inícios
+    limites = np.column_stack([inicios, inicios + duracoes]).ravel()
+    excesso_pico = np.maximum.reduceat(excesso, limites)[::2]
+    excesso_total = np.add.reduceat(excesso, limites)[::2]
+
+    estacao, posicao = np.divmod(inicios, n_posicoes + 1)
+    limiar_evento = np.asarray(limiares, dtype='float64')[estacao]
+    pico = limiar_evento + sinal * excesso_pico
+    return estacao, posicao, duracoes, pico, excesso_total / duracoes
+
+
+def detectar_eventos(cubo, eventos=None, min_horas=MIN_HORAS_DIA):
+    """Tabela de eventos extremos diários de todas as estações do cubo.
+
+    Colunas: cidade, evento, inicio, fim (primeiro e último dia), duracao
+    (dias), pico (valor diário mais extremo), intensidade (excesso médio além
+    do limiar) e limiar. `eventos` escolhe tipos de EVENTOS ou traz
+    definições próprias no mesmo formato.
+    """
+    if eventos is None:
+        eventos = EVENTOS
+    elif not isinstance(eventos, dict):
+        eventos = {nome: EVENTOS[nome] for nome in eventos}
+
+    partes = []
+    grades = {}
+    for nome, definicao in eventos.items():
+        chave = (definicao['variavel'], definicao['estatistica'])
+        if definicao['variavel'] not in cubo.variaveis:
+            continue
+        if chave not in grades:
+            grades[chave] = grade_diaria(cubo, *chave, min_horas=min_horas)
+        cidades, dias, grade = grades[chave]
+
+        limiares = limiares_por_estacao(grade, definicao)
+        estacao, posicao, duracao, pico, intensidade = eventos_na_grade(
+            grade, limiares, definicao['acima'], definicao['duracao_minima']
+        )
+        partes.append(pd.DataFrame({
+            'cidade': np.asarray(cidades, dtype=object)[estacao],
+            'evento': nome,
+            'inicio': dias[posicao],
+            'fim': dias[posicao + duracao - 1],
+            'duracao': duracao,
+            'pico': pico,
+            'intensidade': intensidade,
+            'limiar': limiares[estacao],
+        }))
+
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_EVENTOS)
+    return pd.concat(partes, ignore_index=True).sort_values(['cidade', 'evento', 'inicio'], ignore_index=True)
@@ -0,0 +1,76 @@
+"""
+📦 Fontes dos Arquivos INMET
+Abre CSVs soltos ou membros de ZIPs anuais do INMET sem extraí-los para o disco
+"""
+
+import fnmatch
+import io
+import os
+import zipfile
+from contextlib import contextmanager
+
+# Um membro de ZIP é referenciado como "2023.zip::2023/INMET_S_RS_A802_..._.CSV"
+SEPARADOR_ZIP = '::'
+
+
+def eh_membro_zip(arquivo):
+    """Indica se o caminho se refere a um arquivo dentro de um ZIP"""
+    return SEPARADOR_ZIP in arquivo
+
+
+def caminho_membro(caminho_zip, membro):
+    """Monta a referência a um membro de ZIP"""
+    return f"{caminho_zip}{SEPARADOR_ZIP}{membro}"
+
+
+def separar_membro(arquivo):
+    """Divide a referência em (caminho do ZIP, nome do membro)"""
+    caminho_zip, _, membro = arquivo.partition(SEPARADOR_ZIP)
+    return caminho_zip, membro
+
+
+@contextmanager
+def abrir_binario(arquivo):
+    """Abre um CSV solto ou um membro de ZIP para leitura binária.
+
+    Membros de ZIP são descomprimidos em fluxo, conforme são lidos.
+    """
+    if eh_membro_zip(arquivo):
+        caminho_zip, membro = separar_membro(arquivo)
+        with zipfile.ZipFile(caminho_zip) as zf, zf.open(membro) as f:
+            yield f
+    else:
+        with open(arquivo, 'rb') as f:
+            yield f
+
+
+@contextmanager
+def abrir_texto(arquivo):
+    """Como abrir_binario, mas decodificando latin-1 (codificação dos CSVs do INMET)"""
+    with abrir_binario(arquivo) as f:
+        texto = io.TextIOWrapper(f, encoding='latin-1', newline='')
+        try:
+            yield texto
+        finally:
+            texto.detach()
+
+
+def estado_arquivo(arquivo):
+    """(tamanho, mtime_ns) do CSV; para membros de ZIP, tamanho descomprimido e mtime do ZIP"""
+    if eh_membro_zip(arquivo):
+        caminho_zip, membro = separar_membro(arquivo)
+        with zipfile.ZipFile(caminho_zip) as zf:
+            tamanho = zf.getinfo(membro).file_size
+        return tamanho, os.stat(caminho_zip).st_mtime_ns
+
+    estado = os.stat(arquivo)
+    return estado.st_size, estado.st_mtime_ns
+
+
+def listar_membros_zip(caminho_zip, padrao='INMET_*.CSV'):
+    """Membros do ZIP cujo nome (sem pastas) casa com `padrao`; lê só o diretório central"""
+    with zipfile.ZipFile(caminho_zip) as zf:
+        return [
+            info.filename for info in zf.infolist()
+            if not info.is_dir() and fnmatch.fnmatch(os.path.basename(info.filename).upper(), padrao.upper())
+        ]
@@ -0,0 +1,153 @@
+"""
+🕳️ Grade Horária e Lacunas
+Reindexa cada estação numa grade horária UTC completa, marca as lacunas em uma
+máscara de bits, interpola lacunas curtas e mede a cobertura mensal
+"""
+
+import numpy as np
+import pandas as pd
+
+from agregacao_streaming import variaveis_medidas
+from calendario import NS_POR_HORA
+from eventos_extremos import sequencias
+from janelas_moveis import COBERTURA_MINIMA, VARIAVEIS_SEM_JANELAS, horas_desde_epoca
+
+# Bit 0 da máscara: a hora não existia no arquivo; bit i + 1: variável i sem valor medido
+HORA_AUSENTE = 1
+
+# Não interpoladas: chuva interpolada inventa precipitação e a direção do vento
+# é circular (entre 350° e 10° a média linear daria ~180°)
+VARIAVEIS_SEM_INTERPOLACAO = ['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'] + VARIAVEIS_SEM_JANELAS
+
+
+def bit_variavel(posicao):
+    """Bit da máscara de lacunas da variável na posição `posicao` de `variaveis`"""
+    return 1 << (posicao + 1)
+
+
+def interpolar_lacunas_curtas(valores, segmentos, max_lacuna):
+    """Preenche por interpolação linear as sequências de até `max_lacuna` NaN.
+
+    `valores` é uma grade (posições × variáveis) com várias estações em
+    sequência; `segmentos` lista (início, fim) de cada estação. Só lacunas com
+    valores medidos dos dois lados, dentro da mesma estação, são preenchidas.
+    Retorna uma cópia; tudo é vetorial (np.interp sobre os pontos medidos e
+    codificação de sequências para achar as lacunas).
+    """
+    valores = valores.copy()
+    if max_lacuna <= 0 or len(valores) == 0:
+        return valores
+
+    posicoes = np.arange(len(valores))
+    # Posições de início e fim de estação: lacunas que as tocam não têm os dois lados
+    bordas = np.zeros(len(valores) + 1, dtype=bool)
+    for inicio, fim in segmentos:
+        bordas[inicio] = bordas[fim] = True
+    # Estação de cada posição: uma lacuna que atravessa o fim de uma estação e o
+    # início da seguinte não toca nenhuma borda, mas não pode ser interpolada
+    estacao = np.searchsorted(np.sort([inicio for inicio, _ in segmentos]), posicoes, side='right') - 1
+
+    for i in range(valores.shape[1]):
+        coluna = valores[:, i]
+        ausentes = np.isnan(coluna)
+        if not ausentes.any() or ausentes.all():
+            continue
+        inicios, duracoes = sequencias(ausentes)
+        fins = inicios + duracoes
+        curtas = ((duracoes <= max_lacuna) & ~bordas[inicios] & ~bordas[fins]
+                  & (estacao[inicios] == estacao[fins - 1]))
+        if not curtas.any():
+            continue
+
+        # Marca as posições das lacunas curtas: +1 no início, -1 no fim, soma acumulada
+        marcas = np.zeros(len(coluna) + 1, dtype='int64')
+        np.add.at(marcas, inicios[curtas], 1)
+        np.add.at(marcas, fins[curtas], -1)
+        preencher = np.cumsum(marcas[:-1]) > 0
+
+        medidos = ~ausentes
+        coluna[preencher] = np.interp(posicoes[preencher], posicoes[medidos], coluna[medidos])
+    return valores
+
+
+def reindexar_grade_horaria(indice_estacoes, variaveis=None, max_lacuna=0):
+    """Dados de cada estação numa grade horária UTC completa, da primeira à última hora medida.
+
+    Horas ausentes viram linhas com NaN; horas duplicadas ficam com a última
+    linha. A coluna 'lacunas' (uint32) tem o bit HORA_AUSENTE para horas que
+    não estavam no arquivo e o bit `bit_variavel(i)` quando a variável i não
+    tinha valor medido, mesmo que tenha sido preenchida depois. Com
+    `max_lacuna` > 0, lacunas de até essa quantidade de horas são
+    interpoladas linearmente, exceto nas VARIAVEIS_SEM_INTERPOLACAO. Como cada estação tem uma linha por hora,
+    operações de janela e defasagem podem usar passos fixos de linhas.
+    """
+    df = indice_estacoes.dados
+    coluna = indice_estacoes.coluna
+    if variaveis is None:
+        variaveis = variaveis_medidas(df)
+    variaveis = [var for var in variaveis if var in df.columns]
+
+    horas = horas_desde_epoca(df['datetime'])
+    valores = df[variaveis].to_numpy(dtype='float64', na_value=np.nan)
+
+    # Posição de cada estação na grade concatenada
+    cidades, segmentos, origem, destino = [], [], [], []
+    total = 0
+    for cidade, (inicio, fim) in indice_estacoes.limites.items():
+        linhas = np.arange(inicio, fim)[horas[inicio:fim] >= 0]
+        if len(linhas) == 0:
+            continue
+        primeira, ultima = horas[linhas].min(), horas[linhas].max()
+        cidades.append((cidade, primeira, ultima - primeira + 1))
+        segmentos.append((total, total + ultima - primeira + 1))
+        origem.append(linhas)
+        destino.append(total + horas[linhas] - primeira)
+        total += ultima - primeira + 1
+
+    grade = np.full((total, len(variaveis)), np.nan)
+    existe = np.zeros(total, dtype=bool)
+    if origem:
+        origem, destino = np.concatenate(origem), np.concatenate(destino)
+        grade[destino] = valores[origem]
+        existe[destino] = True
+
+    # Máscara de lacunas, antes de qualquer preenchimento
+    lacunas = np.where(existe, 0, HORA_AUSENTE).astype('uint32')
+    for i in range(len(variaveis)):
+        lacunas[np.isnan(grade[:, i])] |= np.uint32(bit_variavel(i))
+
+    interpolaveis = [i for i, var in enumerate(variaveis) if var not in VARIAVEIS_SEM_INTERPOLACAO]
+    grade[:, interpolaveis] = interpolar_lacunas_curtas(grade[:, interpolaveis], segmentos, max_lacuna)
+
+    horas_grade = np.concatenate([np.arange(primeira, primeira + n) for _, primeira, n in cidades]) \
+        if cidades else np.empty(0, dtype='int64')
+    datetimes = pd.to_datetime(horas_grade * NS_POR_HORA)
+    nomes = [cidade for cidade, _, _ in cidades]
+    resultado = pd.DataFrame(grade, columns=variaveis)
+    resultado.insert(0, 'datetime', datetimes)
+    resultado[coluna] = pd.Categorical.from_codes(
+        np.repeat(np.arange(len(cidades)), [n for _, _, n in cidades]), categories=nomes
+    ) if cidades else pd.Categorical([])
+    resultado['ano'] = datetimes.year.astype(df['ano'].dtype if 'ano' in df.columns else 'int16')
+    resultado['lacunas'] = lacunas
+
+    # Mantém os tipos das medições (ex.: float32 na representação compacta)
+    tipos = {var: df[var].dtype for var in variaveis if df[var].dtype != 'float64'}
+    if tipos:
+        resultado = resultado.astype(tipos)
+    if not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+        resultado[coluna] = resultado[coluna].astype(object)
+    return resultado
+
+
+def cobertura_mensal(cubo):
+    """Fração das horas de cada mês com valor medido, por cidade e variável.
+
+    Vem da contagem 'n' do cubo mensal dividida pelas horas do mês no
+    calendário (meses sem nenhum dado não aparecem).
+    """
+    mensal = cubo.tabela('mes')
+    meses = pd.DatetimeIndex(mensal.index.get_level_values(1))
+    horas_mes = (meses.days_in_month * 24).to_numpy(dtype='float64')
+    contagens = mensal.xs('n', axis=1, level=1)
+    return contagens.div(horas_mes, axis=0).clip(upper=1.0)
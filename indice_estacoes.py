@@ -0,0 +1,53 @@
+"""
+🗂️ Índice Particionado por Estação
+Mantém os dados ordenados por estação e tempo, com a posição de cada estação
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class IndiceEstacoes:
+    """Dados ordenados por estação e datetime, com limites (início, fim) de cada estação.
+
+    Como as linhas de uma estação ficam contíguas, `fatia(cidade)` é um recorte
+    por posição (sem cópia), em vez de uma máscara booleana que percorre e copia
+    todas as linhas a cada consulta.
+    """
+
+    def __init__(self, df, coluna='cidade', coluna_tempo='datetime'):
+        self.coluna = coluna
+
+        # Estações na ordem em que aparecem nos dados; linhas sem estação vão para o fim
+        codigos, cidades = pd.factorize(df[coluna], sort=False)
+        codigos = np.where(codigos < 0, len(cidades), codigos)
+
+        if coluna_tempo in df.columns:
+            ordem = np.lexsort((df[coluna_tempo].to_numpy(), codigos))
+        else:
+            ordem = np.argsort(codigos, kind='stable')
+
+        # Dados já particionados (caso comum) não são copiados
+        if not np.array_equal(ordem, np.arange(len(df))):
+            df = df.take(ordem)
+            codigos = codigos[ordem]
+        self.dados = df.reset_index(drop=True)
+
+        contagens = np.bincount(codigos, minlength=len(cidades) + 1)[:len(cidades)]
+        fins = np.cumsum(contagens)
+        self.limites = {
+            cidade: (int(fim - n), int(fim))
+            for cidade, n, fim in zip(cidades, contagens, fins)
+        }
+
+    def cidades(self):
+        """Estações presentes, na ordem dos dados"""
+        return list(self.limites)
+
+    def __contains__(self, cidade):
+        return cidade in self.limites
+
+    def fatia(self, cidade):
+        """Linhas da estação (recorte por posição; vazio se a estação não existir)"""
+        inicio, fim = self.limites.get(cidade, (0, 0))
+        return self.dados.iloc[inicio:fim]
@@ -0,0 +1,175 @@
+"""
+🔁 Ingestão Incremental dos Arquivos INMET
+Acrescenta ao conjunto persistido só as linhas novas de cada estação
+"""
+
+import json
+import os
+import re
+import zipfile
+
+import pandas as pd
+
+from fontes_inmet import estado_arquivo
+from leitura_inmet import inicio_dos_dados, ler_csv_a_partir_de
+
+# Import condicional: a gravação em Parquet requer pyarrow
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
+
+# O INMET renomeia o arquivo parcial do ano conforme ele cresce
+# (..._01-01-2025_A_31-05-2025.CSV -> ..._01-01-2025_A_30-06-2025.CSV)
+PADRAO_FIM_PERIODO = re.compile(r'_A_\d{2}-\d{2}-\d{4}\.CSV$', re.IGNORECASE)
+
+
+def chave_arquivo(arquivo):
+    """Identifica um arquivo pela estação e data inicial, ignorando a data final do nome"""
+    return PADRAO_FIM_PERIODO.sub('', os.path.basename(arquivo))
+
+
+def _nome_pasta(cidade):
+    return re.sub(r'[^\w-]+', '_', cidade, flags=re.UNICODE).strip('_')
+
+
+class IngestaoIncremental:
+    """Conjunto de dados persistido em Parquet, atualizado de forma incremental.
+
+    Para cada estação guarda a marca d'água (último datetime gravado) e, para
+    cada arquivo, até onde ele já foi lido. Arquivos que só cresceram são lidos
+    a partir desse ponto; se um arquivo encolher ou for substituído, ele é
+    relido inteiro e a marca d'água descarta as linhas já gravadas. Pelo mesmo
+    motivo, linhas anteriores à marca d'água (ex.: um ano mais antigo incluído
+    depois) não são incorporadas.
+
+    O estado (marcas, posições e partes gravadas) é salvo depois de cada
+    parte: uma parte só conta quando aparece no estado, então uma execução
+    interrompida entre as duas gravações não duplica linhas na seguinte.
+    """
+
+    def __init__(self, diretorio='dados_persistidos'):
+        self.diretorio = diretorio
+        self.caminho_estado = os.path.join(diretorio, 'estado.json')
+        self.marcas = {}
+        self.posicoes = {}
+        # cidade -> nomes das partes confirmadas; o contador nunca volta atrás
+        self.partes = {}
+        self.proxima_parte = 0
+        self._carregar_estado()
+
+    def _carregar_estado(self):
+        if os.path.exists(self.caminho_estado):
+            with open(self.caminho_estado, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+            self.marcas = estado.get('marcas', {})
+            self.posicoes = estado.get('posicoes', {})
+            if 'partes' in estado:
+                self.partes = estado['partes']
+                self.proxima_parte = estado.get('proxima_parte', 0)
+            else:
+                self._partes_existentes()
+
+    def _partes_existentes(self):
+        """Estados antigos não listam as partes: todas as que estão em disco contam"""
+        for cidade in self.marcas:
+            pasta = os.path.join(self.diretorio, _nome_pasta(cidade))
+            if os.path.isdir(pasta):
+                self.partes[cidade] = sorted(nome for nome in os.listdir(pasta) if nome.endswith('.parquet'))
+        numeros = [int(nome[6:12]) for nomes in self.partes.values() for nome in nomes
+                   if re.fullmatch(r'parte-\d{6}\.parquet', nome)]
+        self.proxima_parte = max(numeros, default=-1) + 1
+
+    def _salvar_estado(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = f"{self.caminho_estado}.tmp"
+        estado = {'marcas': self.marcas, 'posicoes': self.posicoes,
+                  'partes': self.partes, 'proxima_parte': self.proxima_parte}
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.caminho_estado)
+
+    def marca_dagua(self, cidade):
+        """Último datetime gravado para a estação (ou None)"""
+        marca = self.marcas.get(cidade)
+        return pd.Timestamp(marca) if marca else None
+
+    def atualizar(self, tarefas, colunas):
+        """Lê as linhas novas dos arquivos (cidade, ano, arquivo) e as acrescenta ao conjunto.
+
+        Retorna o número de linhas gravadas por cidade.
+        """
+        if not PYARROW_DISPONIVEL:
+            print("❌ pyarrow não disponível. A ingestão incremental requer Parquet.")
+            return {}
+
+        novas = {}
+        for cidade, ano, arquivo in tarefas:
+            try:
+                linhas = self._atualizar_arquivo(cidade, ano, arquivo, colunas)
+            except (OSError, pd.errors.ParserError, pd.errors.EmptyDataError, ValueError, KeyError,
+                    zipfile.BadZipFile) as e:
+                # O estado das partes anteriores já foi salvo; este arquivo fica para a próxima execução
+                print(f"⚠️ Erro ao ingerir {arquivo}: {e}")
+                continue
+            if linhas:
+                novas[cidade] = novas.get(cidade, 0) + linhas
+        return novas
+
+    def _atualizar_arquivo(self, cidade, ano, arquivo, colunas):
+        """Grava as linhas novas de um arquivo e salva o estado; retorna quantas linhas entraram"""
+        chave = chave_arquivo(arquivo)
+        tamanho, _ = estado_arquivo(arquivo)
+        posicao = self.posicoes.get(chave, {}).get('posicao')
+        if posicao is None or tamanho < posicao:
+            posicao = inicio_dos_dados(arquivo)
+        elif tamanho == posicao:
+            return 0
+
+        df, nova_posicao = ler_csv_a_partir_de(arquivo, colunas, posicao)
+        marca = self.marca_dagua(cidade)
+        if df is not None and marca is not None:
+            df = df[df['datetime'] > marca]
+
+        linhas = 0
+        if df is not None and not df.empty:
+            df['cidade'] = cidade
+            df['ano'] = int(ano)
+            self._gravar_parte(cidade, df)
+            self.marcas[cidade] = df['datetime'].max().isoformat()
+            linhas = len(df)
+        self.posicoes[chave] = {'posicao': nova_posicao, 'arquivo': arquivo}
+        self._salvar_estado()
+        return linhas
+
+    def _gravar_parte(self, cidade, df):
+        """Grava uma parte nova; ela só passa a valer quando o estado for salvo"""
+        pasta = os.path.join(self.diretorio, _nome_pasta(cidade))
+        os.makedirs(pasta, exist_ok=True)
+        nome = f"parte-{self.proxima_parte:06d}.parquet"
+        caminho = os.path.join(pasta, nome)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, caminho)
+        self.proxima_parte += 1
+        self.partes.setdefault(cidade, []).append(nome)
+
+    def carregar(self, cidades=None):
+        """Lê o conjunto persistido (todas as partes das cidades pedidas)"""
+        if not os.path.isdir(self.diretorio):
+            return None
+
+        cidades = list(self.marcas) if cidades is None else cidades
+        partes = []
+        for cidade in cidades:
+            pasta = os.path.join(self.diretorio, _nome_pasta(cidade))
+            # Só as partes confirmadas no estado (uma gravação interrompida deixa a sua de fora)
+            for nome in self.partes.get(cidade, []):
+                caminho = os.path.join(pasta, nome)
+                if os.path.exists(caminho):
+                    partes.append(pd.read_parquet(caminho))
+
+        if not partes:
+            return None
+        return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,166 @@
+"""
+🪟 Janelas Móveis
+Médias, somas, mínimos e máximos em janelas de 24h, 72h, 7 e 30 dias por estação
+"""
+
+import numpy as np
+import pandas as pd
+
+from agregacao_streaming import variaveis_medidas
+from calendario import NS_POR_HORA
+
+# Nome da janela -> duração em horas
+JANELAS = {'24h': 24, '72h': 72, '7d': 168, '30d': 720}
+
+ESTATISTICAS_JANELA = ('media', 'soma', 'minimo', 'maximo')
+
+# Janelas (e meses) com menos que isso das horas medidas ficam sem valor
+COBERTURA_MINIMA = 0.8
+
+# Direção do vento é circular: média e soma de ângulos não significam nada
+VARIAVEIS_SEM_JANELAS = ['VENTO, DIREÇÃO HORARIA (gr) (° (gr))']
+
+
+def horas_desde_epoca(datetimes):
+    """Horas inteiras desde 1970-01-01 (UTC) de cada datetime; -1 onde não há datetime"""
+    valores = pd.Series(datetimes).to_numpy(dtype='datetime64[ns]')
+    horas = np.floor_divide(valores.astype('int64'), NS_POR_HORA)
+    horas[np.isnat(valores)] = -1
+    return horas
+
+
+def soma_movel(valores, janela):
+    """Soma e contagem de valores válidos nas últimas `janela` posições (inclusive a atual).
+
+    `valores` é uma grade (posições × variáveis) com NaN nas lacunas; cada
+    janela sai de duas somas acumuladas, sem percorrer a janela.
+    """
+    validos = ~np.isnan(valores)
+    zeros = np.zeros((1, valores.shape[1]))
+    soma = np.concatenate([zeros, np.cumsum(np.where(validos, valores, 0.0), axis=0)])
+    contagem = np.concatenate([zeros, np.cumsum(validos, axis=0)])
+    inicio = np.maximum(np.arange(1, len(valores) + 1) - janela, 0)
+    return soma[1:] - soma[inicio], contagem[1:] - contagem[inicio]
+
+
+def extremo_movel(valores, janela, funcao=np.maximum):
+    """Máximo (ou mínimo, com np.minimum) das últimas `janela` posições, ignorando NaN.
+
+    Algoritmo de van Herk/Gil-Werman: a grade é cortada em blocos do tamanho da
+    janela e cada janela é o extremo entre o acumulado do fim de um bloco e o do
+    começo do seguinte. Faz o mesmo que uma fila monotônica (O(1) por posição,
+    qualquer tamanho de janela), mas com operações vetoriais do numpy. Janelas
+    sem nenhum valor válido ficam com ±inf.
+    """
+    neutro = -np.inf if funcao is np.maximum else np.inf
+    n, k = valores.shape
+    valores = np.where(np.isnan(valores), neutro, valores)
+
+    # janela - 1 posições neutras antes (janelas truncadas no início) e completar o último bloco
+    total = n + janela - 1
+    blocos = -(-total // janela)
+    grade = np.full((blocos * janela, k), neutro)
+    grade[janela - 1:total] = valores
+    grade = grade.reshape(blocos, janela, k)
+
+    prefixo = funcao.accumulate(grade, axis=1).reshape(-1, k)
+    sufixo = funcao.accumulate(grade[:, ::-1], axis=1)[:, ::-1].reshape(-1, k)
+
+    # Janela que termina na posição i da grade original: sufixo a partir de i, prefixo até i + janela - 1
+    return funcao(sufixo[:n], prefixo[janela - 1:janela - 1 + n])
+
+
+def minimo_validos(duracao, cobertura_minima=COBERTURA_MINIMA):
+    """Valores medidos exigidos numa janela de `duracao` horas (pelo menos 1)"""
+    return max(1, int(np.ceil(round(cobertura_minima * duracao, 9))))
+
+
+def _estatistica_janela(grade, duracao, estatistica, soma, contagem):
+    if estatistica == 'n':
+        return contagem
+    if estatistica == 'soma':
+        return soma
+    if estatistica == 'media':
+        return soma / np.maximum(contagem, 1)
+    if estatistica == 'minimo':
+        return extremo_movel(grade, duracao, np.minimum)
+    if estatistica == 'maximo':
+        return extremo_movel(grade, duracao, np.maximum)
+    raise ValueError(f"Estatística desconhecida: {estatistica}")
+
+
+def _janelas_da_estacao(horas, valores, pedidos, n_colunas, cobertura_minima):
+    """Colunas pedidas de uma estação (linhas × colunas), em float32.
+
+    `pedidos` leva cada duração à lista de (coluna de saída, variável,
+    estatística). Os valores vão uma vez para a grade horária completa
+    (lacunas viram NaN) e cada duração soma só as variáveis que a usam.
+    """
+    inicio = horas.min()
+    posicoes = horas - inicio
+    grade = np.full((posicoes.max() + 1, valores.shape[1]), np.nan)
+    grade[posicoes] = valores
+
+    resultado = np.empty((len(horas), n_colunas), dtype='float32')
+    for duracao, itens in pedidos.items():
+        usadas = sorted({var for _, var, _ in itens})
+        recorte = grade[:, usadas]
+        soma, contagem = soma_movel(recorte, duracao)
+        poucos = contagem < minimo_validos(duracao, cobertura_minima)
+        for coluna, var, estatistica in itens:
+            k = usadas.index(var)
+            valores_janela = _estatistica_janela(
+                recorte[:, k:k + 1], duracao, estatistica, soma[:, k:k + 1], contagem[:, k:k + 1]
+            )[:, 0]
+            if estatistica != 'n':
+                valores_janela = np.where(poucos[:, k], np.nan, valores_janela)
+            # De volta às linhas originais
+            resultado[:, coluna] = valores_janela[posicoes]
+    return resultado
+
+
+def calcular_janelas_moveis(indice_estacoes, variaveis=None, janelas=None,
+                            estatisticas=ESTATISTICAS_JANELA, cobertura_minima=COBERTURA_MINIMA,
+                            colunas=None):
+    """Estatísticas móveis de cada variável por estação, alinhadas às linhas de indice_estacoes.dados.
+
+    As janelas são de tempo, não de linhas: a janela de 72h termina na hora da
+    linha e cobre as 72 horas anteriores, então horas ausentes no arquivo não
+    alongam a janela. Janelas com menos de `cobertura_minima` das horas
+    medidas ficam NaN, para que uma média de 7 dias não saia de duas horas.
+
+    `colunas` restringe o cálculo a tuplas (variável, janela, estatística);
+    sem ela, todas as combinações de variaveis × janelas × estatisticas (sem
+    a direção do vento). Colunas: MultiIndex (variável, janela, estatística)
+    em float32, estatísticas entre 'n', 'soma', 'media', 'minimo' e 'maximo'.
+    """
+    df = indice_estacoes.dados
+    janelas = JANELAS if janelas is None else janelas
+    if colunas is None:
+        if variaveis is None:
+            variaveis = variaveis_medidas(df, excluir=VARIAVEIS_SEM_JANELAS)
+        colunas = [(var, janela, estatistica) for var in variaveis
+                   for janela in janelas for estatistica in estatisticas]
+    duracoes = {**JANELAS, **janelas}
+    colunas = [coluna for coluna in colunas if coluna[0] in df.columns]
+    variaveis = list(dict.fromkeys(var for var, _, _ in colunas))
+
+    pedidos = {}
+    for posicao, (var, janela, estatistica) in enumerate(colunas):
+        pedidos.setdefault(duracoes[janela], []).append((posicao, variaveis.index(var), estatistica))
+
+    horas = horas_desde_epoca(df['datetime'])
+    valores = df[variaveis].to_numpy(dtype='float64', na_value=np.nan)
+    resultado = np.full((len(df), len(colunas)), np.nan, dtype='float32')
+
+    for inicio, fim in indice_estacoes.limites.values():
+        linhas = np.arange(inicio, fim)[horas[inicio:fim] >= 0]
+        if len(linhas) > 0:
+            resultado[linhas] = _janelas_da_estacao(
+                horas[linhas], valores[linhas], pedidos, len(colunas), cobertura_minima
+            )
+
+    nomes = ['variavel', 'janela', 'estatistica']
+    indice = (pd.MultiIndex.from_tuples(colunas, names=nomes) if colunas
+              else pd.MultiIndex.from_arrays([[], [], []], names=nomes))
+    return pd.DataFrame(resultado, index=df.index, columns=indice)
@@ -0,0 +1,191 @@
+"""
+⚡ Leitura Rápida dos CSVs do INMET
+Lê só as colunas usadas, com tipos e separador decimal declarados na leitura,
+e monta o datetime sem concatenar strings linha a linha
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from catalogo_estacoes import LINHAS_METADADOS
+from fontes_inmet import abrir_binario, abrir_texto
+
+# Import condicional: o engine pyarrow do pandas é opcional
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_CSV_DISPONIVEL = True
+except ImportError:
+    PYARROW_CSV_DISPONIVEL = False
+
+COLUNAS_DATA_HORA = ['Data', 'Hora UTC']
+
+# Arquivos anteriores a 2019 usam outros nomes para data e hora
+ALIASES_COLUNAS = {
+    'DATA (YYYY-MM-DD)': 'Data',
+    'HORA (UTC)': 'Hora UTC',
+}
+
+# Formatos de data já usados pelo INMET ('2023/01/31' e '2018-01-31')
+FORMATOS_DATA = ['%Y/%m/%d', '%Y-%m-%d']
+
+NS_POR_MINUTO = 60 * 10**9
+
+# Marcador do INMET para medição ausente (lido como NaN)
+VALORES_AUSENTES = ['-9999', '-9999,0', '-9999.0']
+
+
+def padronizar_colunas(colunas):
+    """Remove espaços das pontas e aplica os nomes atuais às colunas de data/hora antigas"""
+    return [ALIASES_COLUNAS.get(col.strip(), col.strip()) for col in colunas]
+
+
+def construir_datetime(datas, horas):
+    """Combina as colunas de data e hora do INMET em datetime64[ns].
+
+    Cada data distinta é convertida uma única vez (aceitando os formatos de
+    FORMATOS_DATA) e cada hora distinta ('0000 UTC' ou '00:00') também; o
+    resultado é montado somando os inteiros em nanossegundos. Valores que não
+    podem ser interpretados resultam em NaT.
+    """
+    codigos_data, datas_unicas = pd.factorize(np.asarray(datas, dtype=object))
+    codigos_hora, horas_unicas = pd.factorize(np.asarray(horas, dtype=object))
+
+    # Datas: tentar cada formato só nas que ainda não foram reconhecidas
+    dias = pd.Series(pd.NaT, index=range(len(datas_unicas)), dtype='datetime64[ns]')
+    datas_unicas = pd.Series(datas_unicas, dtype=object).str.strip()
+    for formato in FORMATOS_DATA:
+        faltando = dias.isna().to_numpy()
+        if not faltando.any():
+            break
+        dias[faltando] = pd.to_datetime(datas_unicas[faltando], format=formato, errors='coerce')
+
+    # Horas: 'HHMM UTC' ou 'HH:MM'
+    partes = pd.Series(horas_unicas, dtype=object).str.extract(r'^\s*(\d{1,2}):?(\d{2})')
+    hh = pd.to_numeric(partes[0], errors='coerce').to_numpy()
+    mm = pd.to_numeric(partes[1], errors='coerce').to_numpy()
+    minutos = np.where((hh < 24) & (mm < 60), hh * 60 + mm, np.nan)
+
+    dias_ns = dias.to_numpy().astype('int64')
+    dias_validos = dias.notna().to_numpy()
+    horas_validas = ~np.isnan(minutos)
+    offsets_ns = np.where(horas_validas, minutos, 0).astype('int64') * NS_POR_MINUTO
+
+    validos = (codigos_data >= 0) & (codigos_hora >= 0)
+    validos[validos] = dias_validos[codigos_data[validos]] & horas_validas[codigos_hora[validos]]
+
+    resultado = np.full(len(codigos_data), np.iinfo('int64').min, dtype='int64')
+    resultado[validos] = dias_ns[codigos_data[validos]] + offsets_ns[codigos_hora[validos]]
+    return resultado.view('datetime64[ns]')
+
+
+def ler_nomes_colunas(arquivo):
+    """Nomes das colunas (sem espaços nas pontas) exatamente como aparecem no arquivo"""
+    with abrir_texto(arquivo) as f:
+        for _ in range(LINHAS_METADADOS):
+            f.readline()
+        cabecalho = f.readline().rstrip('\r\n')
+    return [nome for nome in cabecalho.split(';') if nome.strip()]
+
+
+def inicio_dos_dados(arquivo):
+    """Posição (em bytes) da primeira linha de dados, logo após metadados e cabeçalho"""
+    with abrir_binario(arquivo) as f:
+        for _ in range(LINHAS_METADADOS + 1):
+            f.readline()
+        return f.tell()
+
+
+def _opcoes_leitura_rapida(arquivo, colunas):
+    """Colunas existentes (nomes padronizados), usecols e dtypes para a leitura rápida"""
+    nomes_arquivo = ler_nomes_colunas(arquivo)
+    nomes_brutos = dict(zip(padronizar_colunas(nomes_arquivo), nomes_arquivo))
+    existentes = [col for col in colunas if col in nomes_brutos]
+
+    usecols = [nomes_brutos[col] for col in existentes]
+    dtype = {
+        nomes_brutos[col]: ('str' if col in COLUNAS_DATA_HORA else 'float64')
+        for col in existentes
+    }
+    return existentes, usecols, dtype
+
+
+def ler_csv_rapido(arquivo, colunas, engine='c'):
+    """Lê um CSV do INMET já com as colunas numéricas convertidas.
+
+    Apenas as colunas de `colunas` presentes no arquivo são lidas (usecols);
+    as de medição chegam como float64, com a vírgula decimal tratada pelo
+    próprio leitor. `engine='pyarrow'` usa o leitor multithread do Arrow
+    quando disponível.
+    """
+    existentes, usecols, dtype = _opcoes_leitura_rapida(arquivo, colunas)
+
+    if engine == 'pyarrow' and not PYARROW_CSV_DISPONIVEL:
+        engine = 'c'
+
+    with abrir_binario(arquivo) as f:
+        df = pd.read_csv(
+            f, sep=';', header=LINHAS_METADADOS, encoding='latin-1',
+            usecols=usecols, dtype=dtype, decimal=',', engine=engine,
+            na_values=VALORES_AUSENTES
+        )
+    df.columns = padronizar_colunas(df.columns)
+    # usecols não garante a ordem pedida
+    return df[existentes]
+
+
+def ler_csv_em_blocos(arquivo, colunas, tamanho_bloco=100_000):
+    """Lê um CSV do INMET em blocos de `tamanho_bloco` linhas.
+
+    Cada bloco sai como na leitura rápida, já com a coluna 'datetime' e sem
+    as linhas de data/hora inválidas, de modo que a memória usada depende só
+    do tamanho do bloco e não do tamanho do arquivo.
+    """
+    existentes, usecols, dtype = _opcoes_leitura_rapida(arquivo, colunas)
+
+    with abrir_binario(arquivo) as f, pd.read_csv(
+        f, sep=';', header=LINHAS_METADADOS, encoding='latin-1',
+        usecols=usecols, dtype=dtype, decimal=',', chunksize=tamanho_bloco,
+        na_values=VALORES_AUSENTES
+    ) as leitor:
+        for bloco in leitor:
+            bloco.columns = padronizar_colunas(bloco.columns)
+            bloco = bloco[existentes]
+            bloco.insert(0, 'datetime', construir_datetime(bloco['Data'], bloco['Hora UTC']))
+            yield bloco[bloco['datetime'].notna()]
+
+
+def ler_csv_a_partir_de(arquivo, colunas, posicao):
+    """Lê as linhas completas de um CSV do INMET a partir de `posicao` (em bytes).
+
+    Retorna (DataFrame, nova_posicao); a nova posição aponta para o fim da
+    última linha completa lida, para continuar dali na próxima chamada. Uma
+    linha final ainda incompleta fica para a próxima leitura. O DataFrame é
+    None quando não há linhas novas.
+    """
+    with abrir_binario(arquivo) as f:
+        f.seek(posicao)
+        dados = f.read()
+
+    fim = dados.rfind(b'\n') + 1
+    nova_posicao = posicao + fim
+    if not dados[:fim].strip():
+        return None, nova_posicao
+
+    # Nomes de todos os campos da linha de cabeçalho (o ';' final gera um campo vazio)
+    with abrir_texto(arquivo) as f:
+        for _ in range(LINHAS_METADADOS):
+            f.readline()
+        campos = f.readline().rstrip('\r\n').split(';')
+    nomes = [campo if campo.strip() else f'_vazio_{i}' for i, campo in enumerate(campos)]
+
+    existentes, usecols, dtype = _opcoes_leitura_rapida(arquivo, colunas)
+    df = pd.read_csv(
+        io.BytesIO(dados[:fim]), sep=';', header=None, names=nomes, encoding='latin-1',
+        usecols=usecols, dtype=dtype, decimal=',', na_values=VALORES_AUSENTES
+    )
+    df.columns = padronizar_colunas(df.columns)
+    df = df[existentes]
+    df.insert(0, 'datetime', construir_datetime(df['Data'], df['Hora UTC']))
+    return df[df['datetime'].notna()], nova_posicao
@@ -0,0 +1,96 @@
+"""
+🧮 Motor de Estatísticas Agrupadas
+Calcula todas as métricas de todas as estações e variáveis em uma única passada agrupada
+"""
+
+import numpy as np
+import pandas as pd
+
+# Colunas da tabela de estatísticas (mesmo formato de AcumuladorGrupos.resumo)
+COLUNAS_ESTATISTICAS = ['variavel', 'n', 'media', 'desvio_padrao', 'minimo', 'maximo', 'soma']
+
+# Nome da agregação do pandas -> coluna da tabela
+AGREGACOES = {
+    'count': 'n',
+    'mean': 'media',
+    'std': 'desvio_padrao',
+    'min': 'minimo',
+    'max': 'maximo',
+    'sum': 'soma',
+}
+
+
+def calcular_estatisticas(df, variaveis, por=('cidade',)):
+    """Tabela organizada com n, média, desvio padrão, mínimo, máximo e soma.
+
+    Uma linha por grupo (`por`) e variável. Os grupos são fatorados uma vez e
+    todas as agregações de todas as variáveis saem do mesmo groupby, em vez de
+    uma máscara booleana e uma passada por métrica.
+    """
+    por = list(por)
+    variaveis = [var for var in variaveis if var in df.columns]
+    if df.empty or not variaveis:
+        return pd.DataFrame(columns=por + COLUNAS_ESTATISTICAS)
+
+    agregado = df.groupby(por, observed=True, sort=False)[variaveis].agg(list(AGREGACOES))
+
+    # Colunas (variável, agregação) -> linhas por variável
+    partes = {
+        var: agregado[var].rename(columns=AGREGACOES)
+        for var in variaveis
+    }
+    tabela = pd.concat(partes, names=['variavel'] + por).reset_index()
+    return tabela[por + COLUNAS_ESTATISTICAS]
+
+
+def indexar_estatisticas(tabela, por=('cidade',)):
+    """Indexa a tabela por grupo e variável para consultas do tipo tabela.loc[(cidade, variavel)]"""
+    return tabela.set_index(list(por) + ['variavel']).sort_index()
+
+
+# Métricas da comparação entre pares de grupos
+METRICAS_PAREADAS = ['diferenca_media', 'diferenca_percentual', 'razao_desvio']
+
+
+def comparacao_pareada(tabela, variaveis=None, por='cidade'):
+    """Diferença de médias, diferença percentual e razão de desvios de todos os pares de grupos.
+
+    Parte da tabela de `calcular_estatisticas` (uma linha por grupo e
+    variável): médias e desvios viram arrays (variáveis × grupos) e todos os
+    pares saem de uma única operação com broadcasting (variáveis × grupos ×
+    grupos), sem laço por par. Índice: (variavel, <por>_a, <por>_b); a
+    diferença é a - b, a percentual é |a - b| dividido pela média de a e b, e
+    a razão é desvio de a / desvio de b.
+    """
+    if variaveis is None:
+        variaveis = list(dict.fromkeys(tabela['variavel']))
+    grupos = list(dict.fromkeys(tabela[por]))
+    indice = pd.MultiIndex.from_product([variaveis, grupos, grupos],
+                                        names=['variavel', f'{por}_a', f'{por}_b'])
+    if not variaveis or not grupos:
+        return pd.DataFrame(columns=METRICAS_PAREADAS, index=indice)
+
+    formato = (len(variaveis), len(grupos))
+    completa = tabela.set_index(['variavel', por]).reindex(pd.MultiIndex.from_product([variaveis, grupos]))
+    n = completa['n'].to_numpy(dtype='float64', na_value=0).reshape(formato)
+    media = np.where(n > 0, completa['media'].to_numpy(dtype='float64', na_value=np.nan).reshape(formato), np.nan)
+    desvio = np.where(n > 0, completa['desvio_padrao'].to_numpy(dtype='float64', na_value=np.nan).reshape(formato), np.nan)
+
+    a, b = media[:, :, None], media[:, None, :]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        diferenca = a - b
+        percentual = np.abs(diferenca) / ((a + b) / 2) * 100
+        razao = desvio[:, :, None] / desvio[:, None, :]
+
+    return pd.DataFrame({
+        'diferenca_media': diferenca.ravel(),
+        'diferenca_percentual': percentual.ravel(),
+        'razao_desvio': razao.ravel(),
+    }, index=indice)
+
+
+def matriz_pareada(comparacao, variavel, metrica='diferenca_media'):
+    """Matriz grupos × grupos de uma métrica de `comparacao_pareada` (linhas = a, colunas = b)"""
+    valores = comparacao.xs(variavel, level='variavel')[metrica]
+    grupos = list(dict.fromkeys(valores.index.get_level_values(0)))
+    return pd.DataFrame(valores.to_numpy().reshape(len(grupos), len(grupos)), index=grupos, columns=grupos)
@@ -0,0 +1,158 @@
+"""
+🔗 Pareamento de Estações no Tempo
+Alinha as estações num índice horário comum para comparar as mesmas horas
+(diferenças pareadas, teste t pareado e séries de diferenças)
+"""
+
+import numpy as np
+import pandas as pd
+
+from agregacao_streaming import variaveis_medidas
+from calendario import NS_POR_HORA
+from cubo_denso import somas_por_par
+
+# Import condicional: sem scipy o teste t sai sem valor-p
+try:
+    from scipy import stats
+    SCIPY_DISPONIVEL = True
+except ImportError:
+    SCIPY_DISPONIVEL = False
+
+COLUNAS_PAREADAS = ['n', 'media_a', 'media_b', 'diferenca_media', 'desvio_diferenca', 't', 'p']
+
+
+class EstacoesAlinhadas:
+    """Valores de todas as estações num índice de tempo comum: array (horas, estações, variáveis).
+
+    Sem tolerância, o alinhamento é exato por hash do datetime (cada datetime
+    distinto vira uma linha). Com `tolerancia` (ex.: '30min'), o índice é a
+    grade horária do período e cada estação entra com a medição mais próxima
+    de cada hora dentro da tolerância (merge_asof). Depois do alinhamento,
+    comparar estações nas mesmas horas é subtrair colunas do array.
+    """
+
+    def __init__(self, df, variaveis=None, coluna='cidade', tolerancia=None):
+        if variaveis is None:
+            variaveis = variaveis_medidas(df)
+        self.variaveis = [var for var in variaveis if var in df.columns]
+        self.coluna = coluna
+        self.tolerancia = tolerancia
+
+        df = df[df['datetime'].notna() & df[coluna].notna()]
+        codigos, cidades = pd.factorize(df[coluna], sort=False)
+        self.cidades = list(cidades)
+
+        if tolerancia is None:
+            self.datas, self.valores = self._alinhar_exato(df, codigos)
+        else:
+            self.datas, self.valores = self._alinhar_proximo(df, codigos, pd.Timedelta(tolerancia))
+
+    @classmethod
+    def de_cubo(cls, cubo, variaveis=None, coluna='cidade'):
+        """Alinhamento exato a partir de um cubo_denso.CuboDenso, que já tem um eixo de horas comum.
+
+        `valores` fica em float32 (como no cubo) e só com as variáveis pedidas,
+        sem montar outra cópia densa de todas as colunas. As horas são as do
+        cubo, então lacunas curtas entram interpoladas conforme max_lacuna.
+        """
+        alinhadas = cls.__new__(cls)
+        variaveis = cubo.variaveis if variaveis is None else variaveis
+        alinhadas.variaveis = [var for var in variaveis if var in cubo.variaveis]
+        alinhadas.coluna = coluna
+        alinhadas.tolerancia = None
+        alinhadas.cidades = list(cubo.cidades)
+        alinhadas.datas = cubo.datas()
+        indices = [cubo.variaveis.index(var) for var in alinhadas.variaveis]
+        # (estações, horas, variáveis) -> (horas, estações, variáveis), visão sem cópia
+        alinhadas.valores = np.moveaxis(cubo.valores[:, :, indices], 0, 1)
+        return alinhadas
+
+    def _alinhar_exato(self, df, codigos):
+        linhas, datas = pd.factorize(df['datetime'], sort=True)
+        valores = np.full((len(datas), len(self.cidades), len(self.variaveis)), np.nan)
+        # Horas repetidas numa estação ficam com a última linha
+        valores[linhas, codigos] = df[self.variaveis].to_numpy(dtype='float64', na_value=np.nan)
+        return pd.DatetimeIndex(datas), valores
+
+    def _alinhar_proximo(self, df, codigos, tolerancia):
+        tempos = df['datetime'].to_numpy(dtype='datetime64[ns]')
+        folga = tolerancia.to_timedelta64()
+        # Horas cheias a até `tolerancia` de alguma medição
+        primeira = -((-(tempos.min() - folga).astype('int64')) // NS_POR_HORA)
+        ultima = (tempos.max() + folga).astype('int64') // NS_POR_HORA
+        datas = pd.to_datetime(np.arange(primeira, ultima + 1) * NS_POR_HORA)
+        grade = pd.DataFrame({'datetime': datas})
+
+        valores = np.full((len(datas), len(self.cidades), len(self.variaveis)), np.nan)
+        for i in range(len(self.cidades)):
+            estacao = df[codigos == i].sort_values('datetime', kind='stable')
+            alinhada = pd.merge_asof(
+                grade, estacao[['datetime'] + self.variaveis], on='datetime',
+                direction='nearest', tolerance=tolerancia
+            )
+            valores[:, i] = alinhada[self.variaveis].to_numpy(dtype='float64', na_value=np.nan)
+        return datas, valores
+
+    def tabela(self, variavel):
+        """DataFrame horas × estações de uma variável"""
+        return pd.DataFrame(self.valores[:, :, self.variaveis.index(variavel)],
+                            index=self.datas, columns=self.cidades)
+
+    def diferencas(self, variavel, a, b):
+        """Série a - b nas horas em que as duas estações mediram"""
+        valores = self.valores[:, :, self.variaveis.index(variavel)]
+        diferenca = valores[:, self.cidades.index(a)] - valores[:, self.cidades.index(b)]
+        medidas = ~np.isnan(diferenca)
+        return pd.Series(diferenca[medidas], index=self.datas[medidas], name=variavel)
+
+    def comparacao_pareada(self, variaveis=None):
+        """n, médias, diferença média, desvio da diferença, t e valor-p pareados de todos os pares.
+
+        Para cada variável, as somas por par (só horas em que as duas
+        estações mediram) saem de produtos de matrizes (horas × estações),
+        então todos os pares são calculados juntos. Índice: (variavel,
+        <coluna>_a, <coluna>_b).
+        """
+        variaveis = self.variaveis if variaveis is None else [var for var in variaveis if var in self.variaveis]
+        partes = [self._comparacao_variavel(var) for var in variaveis]
+        indice = pd.MultiIndex.from_product(
+            [variaveis, self.cidades, self.cidades],
+            names=['variavel', f'{self.coluna}_a', f'{self.coluna}_b']
+        )
+        if not partes:
+            return pd.DataFrame(columns=COLUNAS_PAREADAS, index=indice)
+        colunas = {nome: np.concatenate([parte[nome].ravel() for parte in partes]) for nome in COLUNAS_PAREADAS}
+        return pd.DataFrame(colunas, index=indice)
+
+    def _comparacao_variavel(self, variavel):
+        # [a, b]: somas de a nas horas em que a e b mediram, centradas em cada estação
+        # (a diferença de centros volta no fim) para não perder precisão
+        n, soma, soma_quadrados, produto, centro = somas_por_par(self.valores[:, :, self.variaveis.index(variavel)].T)
+        deslocamento = centro[:, None] - centro[None, :]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media_a = soma / n
+            media_b = soma.T / n
+            diferenca = media_a - media_b
+            # Σ(a - b)² nas horas comuns, depois a variância das diferenças
+            quadrados = soma_quadrados + soma_quadrados.T - 2 * produto
+            variancia = (quadrados - n * diferenca ** 2) / (n - 1)
+            desvio = np.sqrt(np.clip(variancia, 0, None))
+
+        validos = n > 1
+        resultado = {
+            'n': n,
+            'media_a': np.where(n > 0, media_a + centro[:, None], np.nan),
+            'media_b': np.where(n > 0, media_b + centro[None, :], np.nan),
+            'diferenca_media': np.where(n > 0, diferenca + deslocamento, np.nan),
+            'desvio_diferenca': np.where(validos, desvio, np.nan),
+        }
+        # t e p da diferença sem centrar (com o deslocamento dos centros)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = np.where(validos, resultado['diferenca_media'] / (desvio / np.sqrt(n)), np.nan)
+        resultado['t'] = t
+        if SCIPY_DISPONIVEL:
+            resultado['p'] = np.where(validos, 2 * stats.t.sf(np.abs(t), np.maximum(n - 1, 1)), np.nan)
+        else:
+            resultado['p'] = np.full(n.shape, np.nan)
+        return resultado
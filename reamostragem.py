@@ -0,0 +1,261 @@
+"""
+🎲 Testes por Reamostragem em Blocos
+Bootstrap em blocos e testes de permutação para diferenças entre estações (cidades)
+e entre estações do ano, respeitando a autocorrelação das séries horárias
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from agregacao_streaming import variaveis_medidas
+from calendario import NOMES_ESTACAO, construir_calendario
+from janelas_moveis import horas_desde_epoca
+
+# Horas por bloco: horas vizinhas são correlacionadas, blocos de um dia já são quase independentes
+TAMANHO_BLOCO = 24
+N_REAMOSTRAGENS = 10_000
+NIVEL_CONFIANCA = 0.95
+
+# Elementos por matriz de índices (reamostragens × blocos) processada de uma vez
+ELEMENTOS_POR_LOTE = 2_000_000
+
+COLUNAS_TESTES = ['n', 'blocos', 'diferenca', 'ic_inferior', 'ic_superior', 'p_bootstrap', 'p_permutacao']
+
+
+def somas_por_bloco(valores, blocos):
+    """(somas, contagens) dos valores válidos de cada bloco; blocos sem valores ficam de fora"""
+    validos = ~np.isnan(valores)
+    blocos = np.asarray(blocos)[validos]
+    if len(blocos) == 0:
+        return np.empty(0), np.empty(0)
+    ids, blocos = np.unique(blocos, return_inverse=True)
+    somas = np.bincount(blocos, valores[validos], minlength=len(ids))
+    contagens = np.bincount(blocos, minlength=len(ids)).astype('float64')
+    return somas, contagens
+
+
+def _lotes(n_reamostragens, n_blocos):
+    """Tamanhos dos lotes de reamostragens, para a matriz de índices caber na memória"""
+    tamanho = max(1, ELEMENTOS_POR_LOTE // max(n_blocos, 1))
+    for inicio in range(0, n_reamostragens, tamanho):
+        yield min(tamanho, n_reamostragens - inicio)
+
+
+def _valor_p(reamostradas, observada):
+    """Valor-p bilateral com a correção +1 (nunca exatamente zero)"""
+    extremas = np.count_nonzero(np.abs(reamostradas) >= abs(observada) - 1e-12 * abs(observada))
+    return (extremas + 1) / (len(reamostradas) + 1)
+
+
+def _intervalo(reamostradas, nivel):
+    alfa = (1 - nivel) / 2
+    return tuple(np.quantile(reamostradas, [alfa, 1 - alfa]))
+
+
+def teste_media_blocos(somas, contagens, n_reamostragens=N_REAMOSTRAGENS, rng=None,
+                       nivel=NIVEL_CONFIANCA):
+    """Testa se a média de uma série (ex.: diferenças pareadas a - b) é zero.
+
+    Recebe as somas e contagens por bloco. Bootstrap: cada reamostragem
+    sorteia blocos com reposição (uma linha da matriz de índices) e a média é
+    Σ somas / Σ contagens dos blocos sorteados; dá o intervalo de confiança e
+    o valor-p centrado. Permutação: sob H0 o sinal de cada bloco é
+    intercambiável, então cada reamostragem é um vetor de sinais e as médias
+    do lote saem de um produto matriz × vetor.
+    """
+    rng = np.random.default_rng(rng)
+    n_blocos = len(somas)
+    total = contagens.sum()
+    if n_blocos < 2 or total < 2:
+        return dict(zip(COLUNAS_TESTES, [total, n_blocos] + [np.nan] * 5))
+    observada = somas.sum() / total
+
+    bootstrap, permutacao = [], []
+    for lote in _lotes(n_reamostragens, n_blocos):
+        indices = rng.integers(0, n_blocos, size=(lote, n_blocos), dtype=np.int32)
+        bootstrap.append(somas[indices].sum(axis=1) / contagens[indices].sum(axis=1))
+        # Sinais como bits aleatórios: Σ ±somas = 2·Σ(bit·somas) - Σ somas
+        bits = np.unpackbits(rng.integers(0, 256, size=(lote, (n_blocos + 7) // 8), dtype=np.uint8),
+                             axis=1, count=n_blocos)
+        permutacao.append((2 * (bits @ somas) - somas.sum()) / total)
+    bootstrap, permutacao = np.concatenate(bootstrap), np.concatenate(permutacao)
+
+    inferior, superior = _intervalo(bootstrap, nivel)
+    return {
+        'n': total, 'blocos': n_blocos, 'diferenca': observada,
+        'ic_inferior': inferior, 'ic_superior': superior,
+        'p_bootstrap': _valor_p(bootstrap - observada, observada),
+        'p_permutacao': _valor_p(permutacao, observada),
+    }
+
+
+def teste_dois_grupos_blocos(somas_a, contagens_a, somas_b, contagens_b,
+                             n_reamostragens=N_REAMOSTRAGENS, rng=None, nivel=NIVEL_CONFIANCA):
+    """Testa a diferença de médias entre dois grupos de blocos (ex.: verão × inverno).
+
+    Bootstrap: os blocos de cada grupo são sorteados com reposição dentro do
+    grupo. Permutação: os blocos dos dois grupos são embaralhados juntos
+    (cada linha de uma matriz indicadora sorteia n_a blocos para o grupo a);
+    o grupo b é o complemento, obtido por subtração dos totais.
+    """
+    rng = np.random.default_rng(rng)
+    n_a, n_b = len(somas_a), len(somas_b)
+    total_a, total_b = contagens_a.sum(), contagens_b.sum()
+    if n_a < 2 or n_b < 2:
+        return dict(zip(COLUNAS_TESTES, [total_a + total_b, n_a + n_b] + [np.nan] * 5))
+    observada = somas_a.sum() / total_a - somas_b.sum() / total_b
+
+    somas = np.concatenate([somas_a, somas_b])
+    contagens = np.concatenate([contagens_a, contagens_b])
+    soma_total, contagem_total = somas.sum(), contagens.sum()
+
+    bootstrap, permutacao = [], []
+    for lote in _lotes(n_reamostragens, n_a + n_b):
+        indices_a = rng.integers(0, n_a, size=(lote, n_a), dtype=np.int32)
+        indices_b = rng.integers(0, n_b, size=(lote, n_b), dtype=np.int32)
+        bootstrap.append(somas_a[indices_a].sum(axis=1) / contagens_a[indices_a].sum(axis=1)
+                         - somas_b[indices_b].sum(axis=1) / contagens_b[indices_b].sum(axis=1))
+
+        # Os n_a menores de uma linha de números aleatórios formam uma permutação do grupo a
+        aleatorios = rng.random((lote, n_a + n_b))
+        corte = np.partition(aleatorios, n_a - 1, axis=1)[:, n_a - 1:n_a]
+        grupo_a = (aleatorios <= corte).astype('float64')
+        soma_a, contagem_a = grupo_a @ somas, grupo_a @ contagens
+        permutacao.append(soma_a / contagem_a - (soma_total - soma_a) / (contagem_total - contagem_a))
+    bootstrap, permutacao = np.concatenate(bootstrap), np.concatenate(permutacao)
+
+    inferior, superior = _intervalo(bootstrap, nivel)
+    return {
+        'n': total_a + total_b, 'blocos': n_a + n_b, 'diferenca': observada,
+        'ic_inferior': inferior, 'ic_superior': superior,
+        'p_bootstrap': _valor_p(bootstrap - observada, observada),
+        'p_permutacao': _valor_p(permutacao, observada),
+    }
+
+
+def _executar_tarefa(tarefa):
+    """Roda um teste (em processo separado ou não); `tarefa` = (função, arrays, semente, reamostragens, nível)"""
+    funcao, arrays, semente, n_reamostragens, nivel = tarefa
+    return funcao(*arrays, n_reamostragens=n_reamostragens, rng=np.random.default_rng(semente), nivel=nivel)
+
+
+def executar_testes(tarefas, n_reamostragens=N_REAMOSTRAGENS, semente=None, nivel=NIVEL_CONFIANCA,
+                    n_workers=None):
+    """Roda (função, arrays) de cada tarefa e retorna os resultados na mesma ordem.
+
+    Cada tarefa recebe um gerador independente derivado de `semente`
+    (SeedSequence.spawn), então o resultado não depende de quantos processos
+    foram usados. Com `n_workers` > 1 as tarefas são distribuídas num pool de
+    processos; os arrays enviados são só as somas por bloco.
+    """
+    sementes = np.random.SeedSequence(semente).spawn(len(tarefas))
+    argumentos = [(funcao, arrays, filha, n_reamostragens, nivel)
+                  for (funcao, arrays), filha in zip(tarefas, sementes)]
+    n_workers = min(n_workers or 1, len(argumentos))
+    if n_workers <= 1:
+        return [_executar_tarefa(argumento) for argumento in argumentos]
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return list(executor.map(_executar_tarefa, argumentos, chunksize=max(1, len(argumentos) // (4 * n_workers))))
+
+
+def _trabalhadores(paralelo, n_workers):
+    return (n_workers or os.cpu_count() or 1) if paralelo else 1
+
+
+def _tabela(chaves, resultados, nomes):
+    if not chaves:
+        return pd.DataFrame(columns=COLUNAS_TESTES,
+                            index=pd.MultiIndex.from_arrays([[]] * len(nomes), names=nomes))
+    return pd.DataFrame(resultados, index=pd.MultiIndex.from_tuples(chaves, names=nomes), columns=COLUNAS_TESTES)
+
+
+def testar_pares_estacoes(alinhadas, variaveis=None, tamanho_bloco=TAMANHO_BLOCO,
+                          n_reamostragens=N_REAMOSTRAGENS, semente=None, nivel=NIVEL_CONFIANCA,
+                          paralelo=False, n_workers=None):
+    """Bootstrap em blocos e permutação de sinais das diferenças pareadas de cada par de estações.
+
+    `alinhadas` é um pareamento.EstacoesAlinhadas; só entram as horas em que
+    as duas estações mediram. Os blocos são intervalos fixos de
+    `tamanho_bloco` horas do calendário. Índice: (variavel, <coluna>_a,
+    <coluna>_b), com a antes de b na ordem das estações; colunas em
+    COLUNAS_TESTES (diferenca = média de a - b).
+    """
+    variaveis = alinhadas.variaveis if variaveis is None else [var for var in variaveis if var in alinhadas.variaveis]
+    blocos = horas_desde_epoca(alinhadas.datas) // tamanho_bloco
+    cidades = alinhadas.cidades
+
+    chaves, tarefas = [], []
+    for variavel in variaveis:
+        valores = alinhadas.valores[:, :, alinhadas.variaveis.index(variavel)].astype('float64')
+        for i in range(len(cidades)):
+            for j in range(i + 1, len(cidades)):
+                somas, contagens = somas_por_bloco(valores[:, i] - valores[:, j], blocos)
+                chaves.append((variavel, cidades[i], cidades[j]))
+                tarefas.append((teste_media_blocos, (somas, contagens)))
+
+    resultados = executar_testes(tarefas, n_reamostragens, semente, nivel, _trabalhadores(paralelo, n_workers))
+    return _tabela(chaves, resultados, ['variavel', f'{alinhadas.coluna}_a', f'{alinhadas.coluna}_b'])
+
+
+def testar_estacoes_do_ano(df, variaveis=None, coluna='cidade', calendario=None,
+                           tamanho_bloco=TAMANHO_BLOCO, n_reamostragens=N_REAMOSTRAGENS, semente=None,
+                           nivel=NIVEL_CONFIANCA, paralelo=False, n_workers=None):
+    """Bootstrap em blocos e permutação de blocos da diferença entre cada par de estações do ano.
+
+    Para cada cidade e variável, compara as médias de duas estações do ano;
+    os blocos são intervalos de `tamanho_bloco` horas dentro de uma mesma
+    estação do ano. Índice: (variavel, <coluna>, estacao_a, estacao_b);
+    colunas em COLUNAS_TESTES (diferenca = média de a - b).
+    """
+    if variaveis is None:
+        variaveis = variaveis_medidas(df)
+    variaveis = [var for var in variaveis if var in df.columns]
+    if calendario is None:
+        calendario = construir_calendario(df['datetime'], index=df.index)
+
+    codigos, cidades = pd.factorize(df[coluna], sort=False)
+    estacao = calendario['estacao'].to_numpy(dtype='int64')
+    horas = horas_desde_epoca(df['datetime'])
+    validos = (codigos >= 0) & (estacao >= 0) & (horas >= 0)
+    # Bloco = (cidade, estação do ano, intervalo de horas); nenhum bloco mistura estações do ano
+    n_estacoes = len(NOMES_ESTACAO)
+    chave = (horas // tamanho_bloco * len(cidades) + codigos) * n_estacoes + estacao
+    chave = np.where(validos, chave, -1)
+
+    chaves, tarefas = [], []
+    for variavel in variaveis:
+        valores = df[variavel].to_numpy(dtype='float64', na_value=np.nan)
+        valores = np.where(validos, valores, np.nan)
+        medidos = ~np.isnan(valores)
+        ids, blocos = np.unique(chave[medidos], return_inverse=True)
+        somas = np.bincount(blocos, valores[medidos], minlength=len(ids))
+        contagens = np.bincount(blocos, minlength=len(ids)).astype('float64')
+        cidade_bloco = ids // n_estacoes % len(cidades)
+        estacao_bloco = ids % n_estacoes
+
+        for c, cidade in enumerate(cidades):
+            for a in range(n_estacoes):
+                for b in range(a + 1, n_estacoes):
+                    em_a = (cidade_bloco == c) & (estacao_bloco == a)
+                    em_b = (cidade_bloco == c) & (estacao_bloco == b)
+                    chaves.append((variavel, cidade, NOMES_ESTACAO[a], NOMES_ESTACAO[b]))
+                    tarefas.append((teste_dois_grupos_blocos,
+                                    (somas[em_a], contagens[em_a], somas[em_b], contagens[em_b])))
+
+    resultados = executar_testes(tarefas, n_reamostragens, semente, nivel, _trabalhadores(paralelo, n_workers))
+    return _tabela(chaves, resultados, ['variavel', coluna, 'estacao_a', 'estacao_b'])
+
+
+def resultado_par(testes, variavel, a, b):
+    """Linha de testar_pares_estacoes orientada como a - b (None se o par não foi testado)"""
+    if (variavel, a, b) in testes.index:
+        return testes.loc[(variavel, a, b)]
+    if (variavel, b, a) not in testes.index:
+        return None
+    linha = testes.loc[(variavel, b, a)].copy()
+    linha['diferenca'] = -linha['diferenca']
+    linha['ic_inferior'], linha['ic_superior'] = -linha['ic_superior'], -linha['ic_inferior']
+    return linha
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Testes de regressão dos motores numéricos (grade horária, janelas, cache, pareamento...)
+Cada teste monta dados sintéticos pequenos e compara com o resultado esperado.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def teste_interpolacao_nao_atravessa_estacoes():
+    """Lacuna no fim de uma estação e no início da seguinte não é interpolada entre as duas"""
+    print("🔍 Testando interpolação de lacunas entre estações...")
+    from grade_horaria import reindexar_grade_horaria
+    from indice_estacoes import IndiceEstacoes
+
+    variavel = 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'
+    inicio_a, inicio_b = pd.Timestamp('2023-01-01 00:00'), pd.Timestamp('2023-01-01 05:00')
+    # A termina em [.., 3, NaN, NaN]; B começa em [NaN, 20, ..]
+    a = pd.DataFrame({'datetime': pd.date_range(inicio_a, periods=5, freq='h'),
+                      variavel: [1.0, 2.0, 3.0, np.nan, np.nan], 'cidade': 'A'})
+    b = pd.DataFrame({'datetime': pd.date_range(inicio_b, periods=4, freq='h'),
+                      variavel: [np.nan, 20.0, 21.0, 22.0], 'cidade': 'B'})
+    dados = pd.concat([a, b], ignore_index=True)
+    dados['ano'] = dados['datetime'].dt.year
+
+    grade = reindexar_grade_horaria(IndiceEstacoes(dados), [variavel], max_lacuna=3)
+    valores_a = grade.loc[grade['cidade'] == 'A', variavel].to_numpy()
+    valores_b = grade.loc[grade['cidade'] == 'B', variavel].to_numpy()
+    if not (np.isnan(valores_a[-2:]).all() and np.isnan(valores_b[0])):
+        print(f"❌ Lacuna interpolada entre estações: A={valores_a}, B={valores_b}")
+        return False
+
+    # Lacunas curtas dentro de uma estação continuam sendo preenchidas
+    dados.loc[1, variavel] = np.nan
+    grade = reindexar_grade_horaria(IndiceEstacoes(dados), [variavel], max_lacuna=3)
+    if grade.loc[1, variavel] != 2.0:
+        print(f"❌ Lacuna interna não interpolada: {grade.loc[1, variavel]}")
+        return False
+    print("✅ Interpolação restrita a cada estação: OK")
+    return True
+
+
+def teste_janelas_exigem_cobertura():
+    """Janela de 7 dias com poucas horas medidas fica sem valor; só as colunas pedidas saem, em float32"""
+    print("🔍 Testando cobertura mínima das janelas móveis...")
+    from indice_estacoes import IndiceEstacoes
+    from janelas_moveis import calcular_janelas_moveis
+
+    variavel = 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'
+    direcao = 'VENTO, DIREÇÃO HORARIA (gr) (° (gr))'
+    # Duas horas medidas, depois 7 dias completos
+    datas = pd.date_range('2023-01-01', periods=2, freq='h').append(
+        pd.date_range('2023-01-10', periods=168, freq='h'))
+    dados = pd.DataFrame({'datetime': datas, 'cidade': 'A', variavel: np.arange(len(datas), dtype='float64'),
+                          direcao: 180.0})
+    dados['ano'] = dados['datetime'].dt.year
+
+    indice = IndiceEstacoes(dados)
+    media = calcular_janelas_moveis(indice, colunas=[(variavel, '7d', 'media')])
+    if list(media.columns) != [(variavel, '7d', 'media')] or media.dtypes.iloc[0] != np.float32:
+        print(f"❌ Colunas inesperadas: {list(media.columns)} {media.dtypes.tolist()}")
+        return False
+    # 80% de 168h = 135 horas medidas: antes disso a média não sai
+    validos = ~np.isnan(media.iloc[:, 0].to_numpy())
+    esperado = np.arange(len(datas)) >= 2 + 134
+    if not np.array_equal(validos, esperado):
+        print(f"❌ Janelas válidas: {np.flatnonzero(validos)[:3]}, esperado a partir de 136")
+        return False
+
+    todas = calcular_janelas_moveis(indice)
+    if direcao in todas.columns.get_level_values('variavel'):
+        print("❌ Direção do vento entrou nas janelas")
+        return False
+    print("✅ Janelas exigem cobertura mínima: OK")
+    return True
+
+
+def teste_catalogo_um_arquivo_por_ano():
+    """Arquivo parcial e arquivo do ano completo da mesma estação: só o completo é selecionado"""
+    print("🔍 Testando seleção de arquivos do catálogo...")
+    import os
+    import tempfile
+    from catalogo_estacoes import CatalogoEstacoes
+
+    def registro(inicio, fim):
+        return {'codigo': 'A802', 'estacao': 'RIO GRANDE', 'inicio': inicio, 'fim': fim}
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        catalogo = CatalogoEstacoes(os.path.join(diretorio, 'catalogo.json'))
+        parcial = 'INMET_S_RS_A802_RIO GRANDE_01-01-2024_A_30-06-2024.CSV'
+        completo = 'INMET_S_RS_A802_RIO GRANDE_01-01-2024_A_31-12-2024.CSV'
+        anterior = 'INMET_S_RS_A802_RIO GRANDE_01-01-2023_A_31-12-2023.CSV'
+        catalogo.arquivos = {
+            os.path.join('dados', parcial): registro('2024-01-01', '2024-06-30'),
+            os.path.join('dados', completo): registro('2024-01-01', '2024-12-31'),
+            os.path.join('dados', anterior): registro('2023-01-01', '2023-12-31'),
+        }
+        selecionados = [os.path.basename(arquivo) for _, _, arquivo in catalogo.selecionar()]
+
+    if selecionados != [anterior, completo]:
+        print(f"❌ Arquivos selecionados: {selecionados}")
+        return False
+    print("✅ Um arquivo por estação e ano: OK")
+    return True
+
+
+def teste_cubo_denso_gravacao_atomica():
+    """Regravar o cubo troca valores e eixos juntos e não deixa diretórios temporários"""
+    print("🔍 Testando gravação do cubo denso...")
+    import os
+    import tempfile
+    from cubo_denso import CuboDenso
+
+    with tempfile.TemporaryDirectory() as raiz:
+        diretorio = os.path.join(raiz, 'cubo_denso', 'abc')
+        CuboDenso(np.zeros((1, 3, 1), dtype='float32'), ['A'], ['x'], 0, assinatura='1').gravar(diretorio)
+        CuboDenso(np.ones((2, 4, 1), dtype='float32'), ['A', 'B'], ['x'], 10, assinatura='2').gravar(diretorio)
+        cubo = CuboDenso.abrir(diretorio)
+        restos = sorted(os.listdir(os.path.dirname(diretorio)))
+        ok = (cubo.assinatura == '2' and cubo.cidades == ['A', 'B'] and cubo.valores.shape == (2, 4, 1)
+              and cubo.inicio == 10 and restos == ['abc'])
+        del cubo
+
+    if not ok:
+        print(f"❌ Cubo regravado inconsistente (restos: {restos})")
+        return False
+    print("✅ Gravação do cubo denso: OK")
+    return True
+
+
+def teste_esbocos_deterministicos():
+    """Com semente, os percentis de esboços compactados são os mesmos em toda execução"""
+    print("🔍 Testando percentis reprodutíveis dos esboços...")
+    from esbocos_quantis import EsbocosGrupos
+
+    variavel = 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'
+    gerador = np.random.default_rng(1)
+    dados = pd.DataFrame({'cidade': 'A', 'ano': 2024, variavel: gerador.normal(20, 5, 20_000)})
+
+    tabelas = [
+        EsbocosGrupos(variaveis=[variavel], k=50, semente=0).atualizar(dados).tabela_percentis(variavel)
+        for _ in range(3)
+    ]
+    if not all(tabela.equals(tabelas[0]) for tabela in tabelas[1:]):
+        print(f"❌ Percentis variam entre execuções:\n{pd.concat(tabelas)}")
+        return False
+    print("✅ Percentis reprodutíveis: OK")
+    return True
+
+
+def teste_cache_atualiza_mtime():
+    """Arquivo só "tocado": o hash confere uma vez e o mtime novo fica gravado no cache"""
+    print("🔍 Testando atualização do mtime no cache...")
+    import os
+    import tempfile
+    from cache_dados import PYARROW_DISPONIVEL, CacheColunar
+
+    if not PYARROW_DISPONIVEL:
+        print("⚠️ pyarrow não instalado, teste ignorado")
+        return True
+
+    class CacheContando(CacheColunar):
+        hashes = 0
+
+        def hash_conteudo(self, arquivo, tamanho_bloco=1 << 20):
+            CacheContando.hashes += 1
+            return super().hash_conteudo(arquivo, tamanho_bloco)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = os.path.join(diretorio, 'dados.csv')
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            f.write('a;b\n1;2\n')
+        cache = CacheContando(os.path.join(diretorio, 'cache'))
+        cache.salvar(arquivo, pd.DataFrame({'a': [1], 'b': [2]}))
+
+        estado = os.stat(arquivo)
+        os.utime(arquivo, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+        CacheContando.hashes = 0
+        primeira = cache.carregar(arquivo)
+        segunda = cache.carregar(arquivo)
+
+    if primeira is None or segunda is None or CacheContando.hashes != 1:
+        print(f"❌ Hash recalculado {CacheContando.hashes} vezes (esperado 1)")
+        return False
+    print("✅ mtime atualizado no cache: OK")
+    return True
+
+
+def teste_pareamento_do_cubo():
+    """Alinhamento exato a partir do cubo denso: mesmas comparações pareadas que a partir do DataFrame"""
+    print("🔍 Testando pareamento a partir do cubo denso...")
+    from cubo_denso import CuboDenso
+    from pareamento import EstacoesAlinhadas
+
+    temperatura = 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'
+    umidade = 'UMIDADE RELATIVA DO AR, HORARIA (%)'
+    gerador = np.random.default_rng(2)
+    datas = pd.date_range('2024-01-01', periods=200, freq='h')
+    partes = []
+    for cidade, deslocamento in [('A', 0.0), ('B', 1.5)]:
+        parte = pd.DataFrame({'datetime': datas, 'cidade': cidade,
+                              temperatura: 1000 + gerador.normal(20, 3, len(datas)) + deslocamento,
+                              umidade: gerador.uniform(40, 100, len(datas))})
+        parte.loc[gerador.random(len(datas)) < 0.1, temperatura] = np.nan
+        partes.append(parte)
+    dados = pd.concat(partes, ignore_index=True)
+
+    cubo = CuboDenso.de_grade(dados, variaveis=[temperatura, umidade])
+    do_cubo = EstacoesAlinhadas.de_cubo(cubo, [temperatura])
+    do_dataframe = EstacoesAlinhadas(dados, [temperatura])
+    if do_cubo.variaveis != [temperatura] or do_cubo.valores.dtype != np.float32:
+        print(f"❌ Cubo alinhado com {do_cubo.variaveis} em {do_cubo.valores.dtype}")
+        return False
+
+    colunas = ['n', 'media_a', 'media_b', 'diferenca_media', 'desvio_diferenca', 't']
+    a = do_cubo.comparacao_pareada().loc[(temperatura, 'A', 'B'), colunas].astype('float64')
+    b = do_dataframe.comparacao_pareada().loc[(temperatura, 'A', 'B'), colunas].astype('float64')
+    correlacao = cubo.correlacao_estacoes(temperatura).loc['A', 'B']
+    esperada = dados.pivot(index='datetime', columns='cidade', values=temperatura).corr().loc['A', 'B']
+    if not (np.allclose(a, b, rtol=1e-4) and np.isclose(correlacao, esperada, atol=1e-5)):
+        print(f"❌ Divergência: cubo={a.tolist()}, DataFrame={b.tolist()}, r={correlacao} vs {esperada}")
+        return False
+    print("✅ Pareamento a partir do cubo: OK")
+    return True
+
+
+def teste_variaveis_medidas():
+    """Ano, máscara de lacunas e colunas de texto não entram como variáveis medidas"""
+    print("🔍 Testando seleção das variáveis medidas...")
+    from agregacao_streaming import variaveis_medidas
+
+    dados = pd.DataFrame({'cidade': ['A'], 'ano': [2024], 'lacunas': np.array([0], dtype='uint32'),
+                          'x': [1.0], 'y': [2], 'z': [3.0]})
+    if variaveis_medidas(dados) != ['x', 'y', 'z'] or variaveis_medidas(dados, excluir=['y']) != ['x', 'z']:
+        print(f"❌ Variáveis medidas: {variaveis_medidas(dados)}")
+        return False
+    print("✅ Variáveis medidas: OK")
+    return True
+
+
+def teste_defasagem_sem_sazonalidade():
+    """Com as anomalias, a defasagem sai do sinal comum e não do ciclo anual; ruído puro não tem defasagem clara"""
+    print("🔍 Testando defasagens sobre anomalias...")
+    from climatologia import Climatologia
+    from correlacao_cruzada import defasagem_clara, defasagens_estacoes
+    from cubo_denso import CuboDenso
+
+    variavel = 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'
+    gerador = np.random.default_rng(3)
+    datas = pd.date_range('2023-01-01', periods=2 * 365 * 24, freq='h')
+    horas = np.arange(len(datas))
+    ciclos = 8 * np.cos(2 * np.pi * horas / (365.25 * 24)) + 4 * np.cos(2 * np.pi * horas / 24)
+    # Sinal comum (passeio aleatório amortecido) que chega em B 3 horas depois de A
+    sinal = np.zeros(len(datas) + 3)
+    for i in range(1, len(sinal)):
+        sinal[i] = 0.9 * sinal[i - 1] + gerador.normal()
+
+    def montar(sinal_a, sinal_b):
+        partes = [pd.DataFrame({'datetime': datas, 'cidade': cidade, variavel: ciclos + serie})
+                  for cidade, serie in [('A', sinal_a), ('B', sinal_b)]]
+        dados = pd.concat(partes, ignore_index=True)
+        cubo = CuboDenso.de_grade(dados, variaveis=[variavel])
+        clima = Climatologia(dados, variaveis=[variavel], meia_janela=5)
+        return defasagens_estacoes(cubo, [variavel], 12, sem_ciclo_diario=True, climatologia=clima).iloc[0]
+
+    comum = montar(sinal[3:], sinal[:-3])
+    ruido = montar(gerador.normal(size=len(datas)), gerador.normal(size=len(datas)))
+    clara = defasagem_clara(comum['defasagem'], comum['correlacao'], comum['correlacao_sem_defasagem'])
+    ruido_claro = defasagem_clara(ruido['defasagem'], ruido['correlacao'], ruido['correlacao_sem_defasagem'])
+    if comum['defasagem'] != 3 or not clara or ruido_claro:
+        print(f"❌ Defasagens: sinal comum={comum.to_dict()}, ruído={ruido.to_dict()}")
+        return False
+    print("✅ Defasagens sobre anomalias: OK")
+    return True
+
+
+def _escrever_csv_inmet(caminho, datas, temperaturas):
+    """CSV no formato do INMET (8 linhas de metadados, cabeçalho, ';' e vírgula decimal, latin-1)"""
+    linhas = ['REGIAO:;S', 'UF:;RS', 'ESTACAO:;RIO GRANDE', 'CODIGO (WMO):;A802',
+              'LATITUDE:;-32,07', 'LONGITUDE:;-52,16', 'ALTITUDE:;2,46', 'DATA DE FUNDACAO:;01/01/01',
+              'Data;Hora UTC;TEMPERATURA DO AR - BULBO SECO, HORARIA (°C);']
+    linhas += [f"{data:%Y/%m/%d};{data:%H%M} UTC;{str(valor).replace('.', ',')};"
+               for data, valor in zip(datas, temperaturas)]
+    with open(caminho, 'w', encoding='latin-1') as f:
+        f.write('\n'.join(linhas) + '\n')
+
+
+def teste_ingestao_interrompida_sem_duplicatas():
+    """Parte gravada sem o estado salvo (execução interrompida) não é lida nem duplicada depois"""
+    print("🔍 Testando ingestão incremental interrompida...")
+    import os
+    import tempfile
+    from ingestao_incremental import PYARROW_DISPONIVEL, IngestaoIncremental
+
+    if not PYARROW_DISPONIVEL:
+        print("⚠️ pyarrow não instalado, teste ignorado")
+        return True
+
+    class Interrompida(IngestaoIncremental):
+        def _salvar_estado(self):
+            # Morre depois de gravar a parte do segundo arquivo, antes de salvar o estado
+            if self.proxima_parte == 2:
+                raise KeyboardInterrupt
+            super()._salvar_estado()
+
+    colunas = ['Data', 'Hora UTC', 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)']
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivos = []
+        for ano in (2023, 2024):
+            caminho = os.path.join(diretorio, f'INMET_S_RS_A802_RIO GRANDE_01-01-{ano}_A_31-12-{ano}.CSV')
+            _escrever_csv_inmet(caminho, pd.date_range(f'{ano}-01-01', periods=48, freq='h'),
+                                np.round(np.linspace(10, 20, 48), 1))
+            arquivos.append(caminho)
+        tarefas = [('Rio Grande', 2023, arquivos[0]),
+                   ('Rio Grande', 2023, os.path.join(diretorio, 'inexistente.CSV')),
+                   ('Rio Grande', 2024, arquivos[1])]
+        persistidos = os.path.join(diretorio, 'persistidos')
+
+        try:
+            Interrompida(persistidos).atualizar(tarefas, colunas)
+        except KeyboardInterrupt:
+            pass
+        # A parte órfã do arquivo de 2024 fica fora da leitura
+        if len(IngestaoIncremental(persistidos).carregar()) != 48:
+            print("❌ Parte sem estado salvo foi lida")
+            return False
+
+        ingestao = IngestaoIncremental(persistidos)
+        novas = ingestao.atualizar(tarefas, colunas)
+        dados = ingestao.carregar()
+        # Apagar uma parte não faz a próxima gravação sobrescrever outra
+        os.remove(os.path.join(persistidos, 'Rio_Grande', ingestao.partes['Rio Grande'][0]))
+        _escrever_csv_inmet(arquivos[1].replace('2024', '2025'),
+                            pd.date_range('2025-01-01', periods=5, freq='h'), [1.0] * 5)
+        ingestao.atualizar([('Rio Grande', 2025, arquivos[1].replace('2024', '2025'))], colunas)
+        restantes = len(ingestao.carregar())
+
+    if (novas != {'Rio Grande': 48} or len(dados) != 96 or dados.duplicated(['cidade', 'datetime']).any()
+            or restantes != 53):
+        print(f"❌ Reingestão: novas={novas}, linhas={len(dados)}, depois de apagar uma parte={restantes}")
+        return False
+    print("✅ Ingestão interrompida sem duplicatas: OK")
+    return True
+
+
+def teste_grade_nao_interpola_chuva_nem_direcao():
+    """Precipitação e direção do vento não são interpoladas, mas as lacunas continuam marcadas"""
+    print("🔍 Testando variáveis fora da interpolação...")
+    from grade_horaria import bit_variavel, reindexar_grade_horaria
+    from indice_estacoes import IndiceEstacoes
+
+    temperatura = 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'
+    precipitacao = 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'
+    direcao = 'VENTO, DIREÇÃO HORARIA (gr) (° (gr))'
+    dados = pd.DataFrame({'datetime': pd.date_range('2023-01-01', periods=3, freq='h'), 'cidade': 'A',
+                          temperatura: [10.0, np.nan, 12.0], precipitacao: [4.0, np.nan, 6.0],
+                          direcao: [350.0, np.nan, 10.0]})
+    dados['ano'] = 2023
+
+    variaveis = [temperatura, precipitacao, direcao]
+    grade = reindexar_grade_horaria(IndiceEstacoes(dados), variaveis, max_lacuna=3)
+    meio = grade.iloc[1]
+    marcadas = all(int(meio['lacunas']) & bit_variavel(i) for i in range(len(variaveis)))
+    if meio[temperatura] != 11.0 or pd.notna(meio[precipitacao]) or pd.notna(meio[direcao]) or not marcadas:
+        print(f"❌ Hora preenchida: {meio.to_dict()}")
+        return False
+    print("✅ Chuva e direção do vento sem interpolação: OK")
+    return True
+
+
+def teste_cubo_compacto_igual_ao_float64():
+    """Agregados de medições float32 (modo compacto) iguais aos de float64: 9.9 continua 9.9"""
+    print("🔍 Testando agregados da representação compacta...")
+    from cubo_agregados import CuboAgregados
+
+    precipitacao = 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'
+    gerador = np.random.default_rng(4)
+    dados = pd.DataFrame({'datetime': pd.date_range('2024-01-01', periods=24 * 60, freq='h'), 'cidade': 'A',
+                          precipitacao: np.round(gerador.exponential(0.7, 24 * 60), 1)})
+    dados.loc[0, precipitacao] = 9.9
+    compactos = dados.astype({precipitacao: 'float32'})
+
+    completo = CuboAgregados(dados, [precipitacao]).tabela('dia')
+    compacto = CuboAgregados(compactos, [precipitacao]).tabela('dia')
+    if not np.allclose(compacto.to_numpy(), completo.to_numpy(), rtol=0, atol=1e-9):
+        print(f"❌ Diferença máxima: {np.abs(compacto.to_numpy() - completo.to_numpy()).max()}")
+        return False
+    print("✅ Agregados compactos em float64: OK")
+    return True
+
+
+def teste_assinatura_tabela_no_esquema():
+    """A assinatura das tabelas do cubo vai nos metadados do esquema Parquet, não em df.attrs"""
+    print("🔍 Testando assinatura das tabelas gravadas...")
+    import os
+    import tempfile
+    import pyarrow.parquet as pq
+    from cubo_agregados import CHAVE_ASSINATURA, gravar_tabela, ler_tabela
+
+    tabela = pd.DataFrame({('temperatura', 'media'): [1.5, 2.5]},
+                          index=pd.MultiIndex.from_tuples([('A', 1), ('A', 2)], names=['cidade', 'mes']))
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'tabela.parquet')
+        gravar_tabela(caminho, tabela, 'abc')
+        if pq.read_schema(caminho).metadata.get(CHAVE_ASSINATURA) != b'abc':
+            print("❌ Assinatura fora dos metadados do esquema")
+            return False
+        lida = ler_tabela(caminho, 'abc')
+        if lida is None or not lida.equals(tabela):
+            print("❌ Tabela não voltou igual")
+            return False
+        if ler_tabela(caminho, 'outra') is not None:
+            print("❌ Tabela de outros dados foi aceita")
+            return False
+    print("✅ Assinatura no esquema Parquet: OK")
+    return True
+
+
+def teste_acumuladores_online():
+    """Acumuladores de momentos e co-momentos iguais ao pandas, em blocos, mesclados e após JSON"""
+    print("🔍 Testando estatísticas online...")
+    import json
+    from estatisticas_online import AcumuladorCovariancia, AcumuladorMomentos
+
+    gerador = np.random.default_rng(5)
+    variaveis = ['pressao', 'temperatura', 'vazia']
+    dados = pd.DataFrame({'pressao': 1013 + gerador.normal(0, 3, 500),
+                          'temperatura': gerador.normal(20, 5, 500), 'vazia': np.nan})
+    dados.loc[gerador.random(500) < 0.2, 'temperatura'] = np.nan
+
+    def em_blocos(classe, limites):
+        partes = [classe(variaveis).atualizar(dados.iloc[inicio:fim]) for inicio, fim in limites]
+        acumulador = classe(variaveis)
+        for parte in partes:
+            acumulador.mesclar(classe.de_dict(json.loads(json.dumps(parte.para_dict(), allow_nan=False))))
+        return acumulador
+
+    limites = [(0, 7), (7, 7), (7, 260), (260, 500)]
+    momentos = em_blocos(AcumuladorMomentos, limites).resultado()
+    esperado = pd.DataFrame({'n': dados.count(), 'media': dados.mean(), 'desvio_padrao': dados.std(),
+                             'minimo': dados.min(), 'maximo': dados.max(), 'soma': dados.sum()})
+    for coluna in esperado.columns:
+        if not np.allclose(momentos[coluna].to_numpy(dtype='float64'), esperado[coluna].to_numpy(dtype='float64'),
+                           rtol=1e-9, equal_nan=True):
+            print(f"❌ {coluna} diferente do pandas")
+            return False
+
+    covariancia = em_blocos(AcumuladorCovariancia, limites)
+    for calculado, referencia in [(covariancia.covariancia(), dados.cov()), (covariancia.correlacao(), dados.corr())]:
+        if not np.allclose(calculado.to_numpy(), referencia.to_numpy(), rtol=1e-9, equal_nan=True):
+            print("❌ Covariância/correlação diferente do pandas")
+            return False
+
+    vazio = AcumuladorMomentos(variaveis).para_dict()
+    if vazio['minimo'] != [None] * 3 or AcumuladorMomentos.de_dict(vazio).minimo[0] != np.inf:
+        print("❌ Mínimo de acumulador vazio não vai como None")
+        return False
+    print("✅ Estatísticas online: OK")
+    return True
+
+
+TESTES = [
+    teste_interpolacao_nao_atravessa_estacoes,
+    teste_janelas_exigem_cobertura,
+    teste_catalogo_um_arquivo_por_ano,
+    teste_cubo_denso_gravacao_atomica,
+    teste_esbocos_deterministicos,
+    teste_cache_atualiza_mtime,
+    teste_pareamento_do_cubo,
+    teste_variaveis_medidas,
+    teste_defasagem_sem_sazonalidade,
+    teste_ingestao_interrompida_sem_duplicatas,
+    teste_grade_nao_interpola_chuva_nem_direcao,
+    teste_cubo_compacto_igual_ao_float64,
+    teste_assinatura_tabela_no_esquema,
+    teste_acumuladores_online,
+]
+
+
+def main():
+    """Executa todos os testes"""
+    print("🚀 Iniciando testes de regressão...")
+    print("=" * 50)
+
+    todos_ok = True
+    for teste in TESTES:
+        if not teste():
+            todos_ok = False
+
+    print("\n" + "=" * 50)
+    if todos_ok:
+        print("🎉 TODOS OS TESTES PASSARAM!")
+    else:
+        print("❌ ALGUNS TESTES FALHARAM!")
+    return todos_ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -5,15 +5,42 @@ import numpy as np
 from datetime import datetime
 import warnings
 
+from cubo_agregados import CuboAgregados
+from esbocos_quantis import EsbocosGrupos
+from grade_horaria import COBERTURA_MINIMA, cobertura_mensal
+from indice_estacoes import IndiceEstacoes
+
 warnings.filterwarnings("ignore")
 
 class VisualizacoesMeteorlogicas:
-    def __init__(self, dados_combinados):
-        self.dados = dados_combinados
+    def __init__(self, dados_combinados, indice_estacoes=None, cubo=None, esbocos=None, harmonicos=None):
+        # Reaproveita o índice da análise quando ele corresponde aos mesmos dados
+        if indice_estacoes is None or indice_estacoes.dados is not dados_combinados:
+            indice_estacoes = IndiceEstacoes(dados_combinados)
+        self.indice_estacoes = indice_estacoes
+        self.dados = indice_estacoes.dados
+        # Agregados por dia/hora/mês/estação compartilhados entre os gráficos
+        if cubo is None or cubo.dados is not self.dados:
+            cubo = CuboAgregados(self.dados)
+        self.cubo = cubo
+        # Esboços de quantis (cidade × ano); construídos na primeira consulta se não forem dados
+        self._esbocos = esbocos
+        # Tabela de espectro.harmonicos (opcional): sobrepõe o ajuste harmônico ao ciclo diário
+        self.harmonicos = harmonicos
         # Configurar estilo
         plt.style.use('seaborn-v0_8')
         sns.set_palette("husl")
         
+    def _dados_cidade(self, cidade):
+        """Linhas de uma cidade (recorte contíguo, sem máscara nem cópia)"""
+        return self.indice_estacoes.fatia(cidade)
+    
+    @property
+    def esbocos(self):
+        if self._esbocos is None:
+            self._esbocos = EsbocosGrupos(chaves=('cidade', 'ano'), semente=0).atualizar(self.dados)
+        return self._esbocos
+    
     def configurar_matplotlib(self):
         """Configura matplotlib para melhor visualização"""
         plt.rcParams['figure.figsize'] = (15, 10)
@@ -76,11 +103,8 @@ class VisualizacoesMeteorlogicas:
     def _plot_serie_temporal_temperatura(self, ax):
         """Série temporal de temperaturas"""
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_cidade = self.dados[self.dados['cidade'] == cidade]
-            
-            # Agrupar por dia para reduzir pontos
-            temp_diaria = dados_cidade.groupby(dados_cidade['datetime'].dt.date)[
-                'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].mean()
+            # Médias diárias (reduz pontos)
+            temp_diaria = self.cubo.serie('dia', 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', 'media', cidade)
             
             ax.plot(temp_diaria.index, temp_diaria.values, 
                    label=cidade, linewidth=1.5, alpha=0.8)
@@ -95,33 +119,25 @@ class VisualizacoesMeteorlogicas:
         plt.setp(ax.xaxis.get_majorticklabels(), rotation=45)
     
     def _plot_boxplot_temperatura(self, ax):
-        """Box plot comparativo de temperaturas"""
-        dados_temp = []
-        cidades = []
+        """Box plot comparativo de temperaturas (quartis e bigodes vindos dos esboços de quantis)"""
+        estatisticas = []
         
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            temp_data = self.dados[
-                (self.dados['cidade'] == cidade) & 
-                (self.dados['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].notna())
-            ]['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)']
-            
-            dados_temp.extend(temp_data.tolist())
-            cidades.extend([cidade] * len(temp_data))
+            esboco = self.esbocos.esboco('TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', cidade=cidade)
+            if esboco.n > 0:
+                estatisticas.append(dict(esboco.boxplot(), label=cidade))
         
-        df_boxplot = pd.DataFrame({'Temperatura': dados_temp, 'Cidade': cidades})
-        
-        sns.boxplot(data=df_boxplot, x='Cidade', y='Temperatura', ax=ax)
+        if estatisticas:
+            ax.bxp(estatisticas, showfliers=False)
         ax.set_title('Distribuição de Temperaturas por Cidade')
+        ax.set_xlabel('Cidade')
         ax.set_ylabel('Temperatura (°C)')
     
     def _plot_distribuicao_precipitacao(self, ax):
         """Distribuição de precipitação"""
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            precip_data = self.dados[
-                (self.dados['cidade'] == cidade) & 
-                (self.dados['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'] > 0) &
-                (self.dados['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'].notna())
-            ]['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)']
+            precip_cidade = self._dados_cidade(cidade)['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)']
+            precip_data = precip_cidade[precip_cidade > 0]
             
             if len(precip_data) > 0:
                 ax.hist(precip_data, bins=30, alpha=0.6, label=cidade, density=True)
@@ -135,7 +151,7 @@ class VisualizacoesMeteorlogicas:
     def _plot_correlacao_variaveis(self, ax):
         """Heatmap de correlação entre variáveis"""
         # Selecionar apenas dados de uma cidade para correlação
-        dados_rg = self.dados[self.dados['cidade'] == 'Rio Grande']
+        dados_rg = self._dados_cidade('Rio Grande')
         
         colunas_numericas = [
             'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)',
@@ -162,14 +178,15 @@ class VisualizacoesMeteorlogicas:
     def _plot_padrao_diario(self, ax):
         """Padrão diário médio de temperatura"""
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_cidade = self.dados[self.dados['cidade'] == cidade]
-            dados_cidade['hora'] = dados_cidade['datetime'].dt.hour
-            
-            temp_por_hora = dados_cidade.groupby('hora')[
-                'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].mean()
+            temp_por_hora = self.cubo.serie('hora', 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', 'media', cidade)
             
-            ax.plot(temp_por_hora.index, temp_por_hora.values, 
+            linha, = ax.plot(temp_por_hora.index, temp_por_hora.values, 
                    marker='o', label=cidade, linewidth=2)
+            
+            ajuste = self._ciclo_harmonico(cidade, 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)')
+            if ajuste is not None:
+                ax.plot(ajuste.index, ajuste.values, linestyle='--', color=linha.get_color(),
+                        label=f'{cidade} (harmônicos)')
         
         ax.set_title('Padrão Diário Médio de Temperatura')
         ax.set_xlabel('Hora do Dia')
@@ -178,16 +195,29 @@ class VisualizacoesMeteorlogicas:
         ax.grid(True, alpha=0.3)
         ax.set_xticks(range(0, 24, 3))
     
+    def _ciclo_harmonico(self, cidade, variavel):
+        """Média + harmônicos diurno e semidiurno por hora UTC (None sem a tabela de harmônicos)"""
+        if self.harmonicos is None or (variavel, cidade, 'diurno') not in self.harmonicos.index:
+            return None
+        horas = np.linspace(0, 24, 97)
+        tabela = self.harmonicos.loc[(variavel, cidade)]
+        valores = np.full_like(horas, tabela['media'].iloc[0])
+        for harmonico in ('diurno', 'semidiurno'):
+            if harmonico in tabela.index and pd.notna(tabela.loc[harmonico, 'amplitude']):
+                linha = tabela.loc[harmonico]
+                valores += linha['amplitude'] * np.cos(2 * np.pi * horas / linha['periodo_horas'] - linha['fase'])
+        return pd.Series(valores, index=horas)
+    
     def _plot_umidade_temperatura(self, ax):
         """Scatter plot umidade vs temperatura"""
         cores = {'Rio Grande': 'blue', 'Capão do Leão': 'orange'}
         
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_scatter = self.dados[
-                (self.dados['cidade'] == cidade) &
-                (self.dados['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].notna()) &
-                (self.dados['UMIDADE RELATIVA DO AR, HORARIA (%)'].notna())
-            ].sample(n=min(500, len(self.dados[self.dados['cidade'] == cidade])))
+            dados_cidade = self._dados_cidade(cidade)
+            dados_scatter = dados_cidade[
+                (dados_cidade['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].notna()) &
+                (dados_cidade['UMIDADE RELATIVA DO AR, HORARIA (%)'].notna())
+            ].sample(n=min(500, len(dados_cidade)))
             
             ax.scatter(
                 dados_scatter['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'],
@@ -204,10 +234,10 @@ class VisualizacoesMeteorlogicas:
     def _plot_rosa_ventos(self, ax):
         """Rosa dos ventos simplificada"""
         # Usar dados de Rio Grande
-        dados_vento = self.dados[
-            (self.dados['cidade'] == 'Rio Grande') &
-            (self.dados['VENTO, DIREÇÃO HORARIA (gr) (° (gr))'].notna()) &
-            (self.dados['VENTO, VELOCIDADE HORARIA (m/s)'].notna())
+        dados_rg = self._dados_cidade('Rio Grande')
+        dados_vento = dados_rg[
+            (dados_rg['VENTO, DIREÇÃO HORARIA (gr) (° (gr))'].notna()) &
+            (dados_rg['VENTO, VELOCIDADE HORARIA (m/s)'].notna())
         ]
         
         if len(dados_vento) > 0:
@@ -235,11 +265,9 @@ class VisualizacoesMeteorlogicas:
     def _plot_pressao_atmosferica(self, ax):
         """Série temporal de pressão atmosférica"""
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_cidade = self.dados[self.dados['cidade'] == cidade]
-            
-            # Agrupar por dia
-            pressao_diaria = dados_cidade.groupby(dados_cidade['datetime'].dt.date)[
-                'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)'].mean()
+            # Médias diárias
+            pressao_diaria = self.cubo.serie(
+                'dia', 'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)', 'media', cidade)
             
             if len(pressao_diaria) > 0:
                 ax.plot(pressao_diaria.index, pressao_diaria.values, 
@@ -254,18 +282,16 @@ class VisualizacoesMeteorlogicas:
     
     def _plot_heatmap_mensal(self, ax):
         """Heatmap de temperatura média mensal"""
-        # Preparar dados
-        dados_temp = self.dados[self.dados['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].notna()].copy()
-        dados_temp['mes'] = dados_temp['datetime'].dt.month
-        dados_temp['ano'] = dados_temp['datetime'].dt.year
-        
-        # Calcular temperatura média por mês e cidade
-        temp_mensal = dados_temp.groupby(['cidade', 'ano', 'mes'])[
-            'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].mean().reset_index()
+        # Temperatura média mensal (meses sem medição ficam de fora)
+        temp_mensal = self.cubo.serie('mes', 'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)', 'media', 'Rio Grande')
+        temp_mensal = temp_mensal.dropna()
         
         # Pivot para heatmap
-        pivot_rg = temp_mensal[temp_mensal['cidade'] == 'Rio Grande'].pivot(
-            index='ano', columns='mes', values='TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)')
+        pivot_rg = pd.DataFrame({
+            'ano': temp_mensal.index.year,
+            'mes': temp_mensal.index.month,
+            'temperatura': temp_mensal.to_numpy()
+        }).pivot(index='ano', columns='mes', values='temperatura')
         
         if not pivot_rg.empty:
             sns.heatmap(pivot_rg, annot=True, fmt='.1f', cmap='RdYlBu_r',
@@ -298,19 +324,15 @@ class VisualizacoesMeteorlogicas:
     
     def _plot_precipitacao_mensal(self, ax):
         """Precipitação acumulada mensal"""
-        dados_precip = self.dados.copy()
-        dados_precip['mes'] = dados_precip['datetime'].dt.month
-        dados_precip['ano'] = dados_precip['datetime'].dt.year
-        
-        precip_mensal = dados_precip.groupby(['cidade', 'ano', 'mes'])[
-            'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'].sum().reset_index()
-        
         meses = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun',
                 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
         
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_cidade = precip_mensal[precip_mensal['cidade'] == cidade]
-            precip_por_mes = dados_cidade.groupby('mes')['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'].mean()
+            # Total de cada mês, depois a média entre os anos (meses com muitas horas faltando ficam de fora)
+            precip_mensal = self.cubo.serie('mes', 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)', 'soma', cidade)
+            cobertura = cobertura_mensal(self.cubo).xs(cidade, level=0)['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)']
+            precip_mensal = precip_mensal[cobertura.reindex(precip_mensal.index) >= COBERTURA_MINIMA]
+            precip_por_mes = precip_mensal.groupby(precip_mensal.index.month).mean()
             
             ax.bar([meses[i-1] for i in precip_por_mes.index], precip_por_mes.values,
                   alpha=0.7, label=cidade)
@@ -322,19 +344,7 @@ class VisualizacoesMeteorlogicas:
     
     def _plot_vento_estacional(self, ax):
         """Velocidade do vento por estação"""
-        dados_vento = self.dados.copy()
-        dados_vento['mes'] = dados_vento['datetime'].dt.month
-        
-        def definir_estacao(mes):
-            if mes in [12, 1, 2]: return 'Verão'
-            elif mes in [3, 4, 5]: return 'Outono'
-            elif mes in [6, 7, 8]: return 'Inverno'
-            else: return 'Primavera'
-        
-        dados_vento['estacao'] = dados_vento['mes'].apply(definir_estacao)
-        
-        vento_estacional = dados_vento.groupby(['cidade', 'estacao'])[
-            'VENTO, VELOCIDADE HORARIA (m/s)'].mean().unstack()
+        vento_estacional = self.cubo.serie('estacao', 'VENTO, VELOCIDADE HORARIA (m/s)', 'media').unstack()
         
         vento_estacional.plot(kind='bar', ax=ax, width=0.8)
         ax.set_title('Velocidade Média do Vento por Estação')
@@ -344,15 +354,12 @@ class VisualizacoesMeteorlogicas:
     
     def _plot_amplitude_termica(self, ax):
         """Amplitude térmica diária"""
-        dados_temp = self.dados.copy()
-        dados_temp['data'] = dados_temp['datetime'].dt.date
-        
-        amplitude_diaria = dados_temp.groupby(['cidade', 'data'])[
-            'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)'].agg(['min', 'max']).reset_index()
-        amplitude_diaria['amplitude'] = amplitude_diaria['max'] - amplitude_diaria['min']
-        
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_cidade = amplitude_diaria[amplitude_diaria['cidade'] == cidade]
+            diario = self.cubo.por_cidade('dia', cidade)['TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)']
+            dados_cidade = pd.DataFrame({
+                'data': diario.index,
+                'amplitude': (diario['maximo'] - diario['minimo']).to_numpy()
+            })
             
             # Mostrar apenas uma amostra para clareza
             sample_data = dados_cidade.sample(n=min(100, len(dados_cidade)))
@@ -368,19 +375,17 @@ class VisualizacoesMeteorlogicas:
     
     def _plot_dias_precipitacao(self, ax):
         """Número de dias com precipitação por mês"""
-        dados_precip = self.dados[self.dados['PRECIPITAÇÃO TOTAL, HORÁRIO (mm)'] > 0].copy()
-        dados_precip['data'] = dados_precip['datetime'].dt.date
-        dados_precip['mes'] = dados_precip['datetime'].dt.month
-        
-        dias_chuva = dados_precip.groupby(['cidade', 'mes', 'data']).size().reset_index()
-        dias_por_mes = dias_chuva.groupby(['cidade', 'mes']).size().reset_index(name='dias_chuva')
-        
         meses = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun',
                 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
         
         for cidade in ['Rio Grande', 'Capão do Leão']:
-            dados_cidade = dias_por_mes[dias_por_mes['cidade'] == cidade]
-            dias_mes = dados_cidade.set_index('mes')['dias_chuva'].reindex(range(1, 13), fill_value=0)
+            # Um dia conta se alguma hora teve precipitação; a contagem é a média por ano,
+            # corrigida pelos dias sem medição (senão meses com lacunas parecem mais secos)
+            maxima_diaria = self.cubo.serie('dia', 'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)', 'maximo', cidade).dropna()
+            meses_dia = maxima_diaria.index.month
+            dias_chuva = (maxima_diaria > 0).groupby(meses_dia).mean()
+            dias_no_mes = pd.Series(maxima_diaria.index.days_in_month, index=maxima_diaria.index).groupby(meses_dia).mean()
+            dias_mes = (dias_chuva * dias_no_mes).reindex(range(1, 13), fill_value=0)
             
             ax.plot([meses[i-1] for i in dias_mes.index], dias_mes.values,
                    marker='o', label=cidade, linewidth=2)
@@ -393,9 +398,9 @@ class VisualizacoesMeteorlogicas:
 
 
 # Função para usar as visualizações
-def criar_visualizacoes_completas(dados_combinados):
+def criar_visualizacoes_completas(dados_combinados, indice_estacoes=None, cubo=None, esbocos=None, harmonicos=None):
     """Cria todas as visualizações"""
-    viz = VisualizacoesMeteorlogicas(dados_combinados)
+    viz = VisualizacoesMeteorlogicas(dados_combinados, indice_estacoes, cubo, esbocos, harmonicos)
     
     print("🎨 Criando dashboard principal...")
     viz.dashboard_completo()